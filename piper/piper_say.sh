@@ -5,8 +5,8 @@
 #   piper_say.sh female --file input.txt [out.wav]
 set -euo pipefail
 
-BASE="/c/jf/jirehfaith_swp_kit"
-PIPER="$BASE/piper/piper.exe"
+BASE="${SWP_ROOT:-$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)}"  # kit root (script-relative; SWP_ROOT overrides)
+PIPER="${PIPER:-$BASE/piper/piper.exe}"
 PROFILES="$BASE/voice/profiles"
 WAVS="$BASE/voice/wavs"
 
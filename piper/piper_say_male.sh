@@ -1,8 +1,8 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
-BASE="/c/jf/jirehfaith_swp_kit"
-PIPER="$BASE/piper/piper.exe"
+BASE="${SWP_ROOT:-$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)}"  # kit root (script-relative; SWP_ROOT overrides)
+PIPER="${PIPER:-$BASE/piper/piper.exe}"
 PROFILES="$BASE/voice/profiles"
 WAVS="$BASE/voice/wavs"
 
@@ -3,7 +3,7 @@
 # Default voice family: female (AMY). Override with --male.
 
 set -euo pipefail
-BASE="/c/jf/jirehfaith_swp_kit"
+BASE="${SWP_ROOT:-$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)}"  # kit root (script-relative; SWP_ROOT overrides)
 SAY="$BASE/piper/piper_say.sh"
 
 IN_TXT=""
@@ -49,7 +49,7 @@ ENVFILE="$PROFILES/${VOICE_FAMILY}-default.env"
 [ -f "$ENVFILE" ] || { echo "Missing profile: $ENVFILE" >&2; exit 3; }
 
 set -a; . "$ENVFILE"; set +a
-PIPER="$BASE/piper/piper.exe"
+PIPER="${PIPER:-$BASE/piper/piper.exe}"
 WAVS_DIR="$(dirname "$OUT_WAV")"; mkdir -p "$WAVS_DIR"
 
 # keep existing if empty
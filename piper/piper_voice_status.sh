@@ -1,6 +1,6 @@
 #!/usr/bin/env bash
 set -euo pipefail
-BASE="/c/jf/jirehfaith_swp_kit"
+BASE="${SWP_ROOT:-$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)}"  # kit root (script-relative; SWP_ROOT overrides)
 PROFILES="$BASE/voice/profiles"
 
 echo "== Voice Profiles Folder =="
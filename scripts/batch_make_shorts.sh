@@ -2,13 +2,13 @@
 # Build a batch of shorts from voice/lines/*.txt
 # Usage: batch_make_shorts.sh <male|female> <bg_path> [dur_per_line] [FONT_SIZE] [MARGIN_V]
 set -euo pipefail
+BASE="${SWP_ROOT:-$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)}"  # kit root (script-relative; SWP_ROOT overrides)
 FAM="${1:-female}"
-BG="${2:-/c/jf/jirehfaith_swp_kit/assets/bg/solid_1080x1920.png}"
+BG="${2:-$BASE/assets/bg/solid_1080x1920.png}"
 DUR="${3:-3.5}"
 export FONT_SIZE="${4:-36}"
 export MARGIN_V="${5:-80}"
 
-BASE="/c/jf/jirehfaith_swp_kit"
 LINES_DIR="$BASE/voice/lines"
 
 [ -f "$BG" ] || { echo "Missing BG: $BG"; exit 2; }
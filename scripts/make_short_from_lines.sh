@@ -3,7 +3,7 @@
 #  make_short_from_lines.sh <male|female> <bg_path> <lines.txt> <tag> [dur_per_line]
 set -euo pipefail
 FAM="${1:-}"; BG="${2:-}"; LINES_PATH="${3:-}"; TAG="${4:-}"; DUR="${5:-3.5}"
-BASE="/c/jf/jirehfaith_swp_kit"
+BASE="${SWP_ROOT:-$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)}"  # kit root (script-relative; SWP_ROOT overrides)
 SRT="$BASE/voice/build/${TAG}.srt"
 WAV="$BASE/voice/wavs/${TAG}.wav"
 OUT="$BASE/out/${TAG}.mp4"
@@ -17,8 +17,13 @@ BG="${1:-}"; WAV="${2:-}"; SRT="${3:-}"; OUT="${4:-}"
 [ -f "$WAV" ] || { echo "Missing WAV: $WAV"; exit 3; }
 [ -f "$SRT" ] || { echo "Missing SRT: $SRT"; exit 4; }
 
+TOOLS_DIR="$(cd "$(dirname "$0")/../tools" && pwd)"
+# Media facts via tools/media_probe.py (cached per path + size + mtime; WAV headers read directly)
+PY="${PYTHON:-python}"; command -v "$PY" >/dev/null 2>&1 || PY=python3
+probe(){ "$PY" "$TOOLS_DIR/media_probe.py" --field "$1" "$2"; }
+
 # Duration of the WAV (seconds)
-DUR="$(ffprobe -v error -show_entries format=duration -of default=noprint_wrappers=1:nokey=1 "$WAV")"
+DUR="$(probe duration "$WAV")"
 
 # Convert MSYS path to Windows path for libass, then escape for ffmpeg subtitles filter
 # Example: /c/jf/.. -> C:\jf\..  ->  C\:\\jf\\..  (ffmpeg wants colon + backslashes escaped inside the filter)
@@ -53,8 +58,8 @@ echo "[render_short] OUT      =$OUT"
 echo "[render_short] FONT/MV  =${FONT_SIZE}/${MARGIN_V}"
 
 # ---- Robust BG detection: still image vs real video ----
-BG_FMT="$(ffprobe -v error -show_entries format=format_name -of default=nw=1:nk=1 "$BG" || true)"
-BG_DUR_META="$(ffprobe -v error -show_entries format=duration    -of default=nw=1:nk=1 "$BG" || true)"
+BG_FMT="$(probe format "$BG" || true)"
+BG_DUR_META="$(probe duration "$BG" || true)"    # same cached record: no second probe
 
 # If it's an image format (png_pipe/jpeg_pipe/webp_pipe/image2*) OR there is no duration, treat as still
 if [[ "$BG_FMT" =~ (image2|image2pipe|png_pipe|jpeg_pipe|mjpeg_pipe|bmp_pipe|webp_pipe) ]] || [ -z "${BG_DUR_META:-}" ]; then
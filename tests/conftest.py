@@ -0,0 +1,18 @@
+# The tools import their siblings directly (import media_probe, ...), as when run from tools/.
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tools"))
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not on PATH")
+
+
+@pytest.fixture(autouse=True)
+def _probe_db(tmp_path, monkeypatch):
+    """Keep the media-probe cache out of voice/build/.cache."""
+    import media_probe
+    monkeypatch.setenv("MEDIA_PROBE_DB", str(tmp_path / "media_probe.sqlite"))
+    monkeypatch.setattr(media_probe, "_shared", None)
@@ -0,0 +1,7 @@
+import render_unified as ru
+
+
+def test_strips_only_closed_pos_and_move_blocks():
+    # Expected output is what ass_force_centerbox.sh (sed -E) prints for the same line.
+    line = r"Dialogue: 0,0:00:00.00,0:00:01.00,CenterBox,,0,0,0,,{\pos(10,20)}a{\move(1,2,3,4}b{\pos(1,2)\blur(3)}c{\pos(5}d{\an8}e\N"
+    assert ru.force_centerbox([line]) == [r"Dialogue: 0,0:00:00.00,0:00:01.00,CenterBox,,0,0,0,,a{\move(1,2,3,4}bc{\pos(5}de"]
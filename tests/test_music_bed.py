@@ -0,0 +1,25 @@
+import subprocess
+
+from conftest import needs_ffmpeg
+
+import render_unified as ru
+
+
+@needs_ffmpeg
+def test_music_bed_is_48k_pcm_wav(tmp_path, monkeypatch):
+    # 44.1 kHz mono sine with silence at both ends: resampled, upmixed and trimmed into the bed.
+    track = tmp_path / "track.wav"
+    subprocess.run(["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "sine=frequency=440:duration=2:sample_rate=44100",
+                    "-af", "adelay=500,apad=pad_dur=0.5", "-ac", "1", str(track)], check=True)
+    monkeypatch.setenv("CACHE_ROOT", str(tmp_path / "cache"))
+    s = ru.Settings("1080x1920")
+
+    got = ru.ensure_music_bed(track, s, tmp_path)
+
+    assert got is not None, "music track rejected"
+    bed, _key, facts = got
+    rate, dur = ru.wav_params(bed)
+    assert rate == 48000
+    assert 1.5 < dur < 2.5
+    assert float(facts["MUSIC_I"]) < 0
+    assert ru.ensure_music_bed(track, s, tmp_path)[0] == bed      # second call: cache hit
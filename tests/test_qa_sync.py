@@ -0,0 +1,26 @@
+import types
+
+import qa_sync as qa
+
+SIZE = qa.CROP_W * qa.CROP_H
+
+
+def _clip(on: int, off: int, n: int = 90) -> bytes:
+    """Still plate with an "Amen."-sized caption (mean |Δ| ≈ 1.2/px) from frame on to frame off."""
+    plate = bytes((37 * i) % 200 for i in range(SIZE))
+    caption = bytearray(plate)
+    for i in range(SIZE // 20):                    # 5% of the band, +24 levels
+        caption[i * 20] = min(255, caption[i * 20] + 24)
+    noise = [bytes(b + (k and i % 16 == 3) for i, b in enumerate(plate)) for k in range(2)]   # x264-ish flicker
+    return b"".join(bytes(caption) if on <= f < off else noise[f % 2] for f in range(n))
+
+
+def test_short_cue_on_and_off_are_detected():
+    frames = _clip(30, 60)
+    diffs = qa.frame_diffs(frames)
+    thr = qa.noise_threshold(diffs)
+    assert thr < 1.0
+    changes = qa.caption_changes(diffs, thr)
+    assert changes == [30, 60]
+    cues = [types.SimpleNamespace(start_ms=1000, end_ms=2000)]
+    assert qa.caption_clears(frames, changes, qa.blank_frame(len(diffs), cues), thr) == [60]
@@ -0,0 +1,54 @@
+import wave
+
+from conftest import needs_ffmpeg
+
+import render_unified as ru
+
+ROOT = ru.ROOT
+SRT = "1\n00:00:00,200 --> 00:00:01,200\nFirst line.\n\n2\n00:00:01,300 --> 00:00:02,400\nSecond line.\n"
+TITLE_HOOK = """defaults:
+  timeout_s: 5
+stages:
+  pre_autosync:
+    - name: scroll_stop_title
+      call: hooks_builtin:inject_title
+      mutates: true
+      enabled: {enabled}
+      args:
+        title: "Hook title"
+        seconds: 0.5
+"""
+
+
+def _silence(path, seconds=2.5, rate=22050):
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"\0\0" * int(seconds * rate))
+
+
+@needs_ffmpeg
+def test_mutating_hook_changes_cached_captions(tmp_path, monkeypatch):
+    build = tmp_path / "build"
+    monkeypatch.setattr(ru, "BUILD", build)
+    monkeypatch.setattr(ru, "JOBS_DIR", build / "jobs")
+    monkeypatch.setattr(ru, "HOOKS_YAML", tmp_path / "hooks.yaml")
+    for k, v in {"CACHE_ROOT": str(tmp_path / "cache"), "AUTOSYNC": "0", "TEMPO_MATCH": "0",
+                 "AUTO_ONSET_ALIGN": "0", "APPLY_SHIFT_TO_AUDIO": "0", "SYNC_CACHE": "1"}.items():
+        monkeypatch.setenv(k, v)
+    wav, srt = tmp_path / "voice.wav", tmp_path / "c.srt"
+    _silence(wav)
+    srt.write_text(SRT, encoding="utf-8")
+    bg = ROOT / "assets" / "bg" / "anger.png"
+
+    def render(enabled: bool) -> str:
+        (tmp_path / "hooks.yaml").write_text(TITLE_HOOK.format(enabled=str(enabled).lower()), encoding="utf-8")
+        assert ru.main(["--size=1080x1920", str(bg), str(wav), str(srt), str(tmp_path / "out.mp4")]) == 0
+        return (build / "captions" / "out.ass").read_text(encoding="utf-8")
+
+    plain = render(False)
+    hooked = render(True)        # same WAV + captions: a sync key without the hook would hit and drop it
+    assert "Hook title" not in plain
+    assert "Hook title" in hooked
+    assert render(False) == plain
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# Background asset index: emotion × orientation → variants, with what the renderer wants to know.
+#
+# Every PNG under assets/bg, bg_h, bg_v (kind "bg") and bg_mid, bg_mid_h (kind "mid") gets an entry:
+# emotion + variant parsed from the file name ("Fear 2.png" → fear #2, "financial_trials.png" →
+# financial_trials #1), width/height (PNG header, via tools/media_probe.py), orientation from those
+# dimensions (not from the folder), a sha256 of the content and the mean luma of the CenterBox band
+# (the same middle band tools/qa_sync.py watches) so a caller can tell a bright plate from a dark one.
+# Names that are not an emotion (ChatGPT exports, solid_1080x1920) are "untagged" unless
+# assets/bg_tags.json maps them: {"bg/ChatGPT Image ... AM.png": "hope"}. Tagged files are numbered
+# after the emotion's named variants of the same orientation, in path order, so every plate has a
+# variant number a caller can ask for (find_background(..., variant=N); --list shows the numbers).
+# Without one, or when the emotion has no such variant, the best plate is used.
+#
+# The index lives in voice/build/.cache/asset_index.json. refresh() rescans the folders (one
+# directory listing each) and only re-hashes / re-measures files whose size or mtime changed.
+# Callers refresh once per batch (load(refresh=True)) and pass the index to their lookups, so a
+# lookup is a dict scan, not a scandir, an ffmpeg or a hash per candidate.
+#
+#   python tools/asset_index.py                       # refresh + summary (untagged files listed)
+#   python tools/asset_index.py --find FEAR --size 1920x1080 [--variant 2]
+#   python tools/asset_index.py --list [--json] [--rebuild]
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import media_probe
+
+APP_ROOT = Path(__file__).resolve().parent.parent
+ASSETS_DIR = APP_ROOT / "assets"
+INDEX_PATH = APP_ROOT / "voice" / "build" / ".cache" / "asset_index.json"
+TAGS_PATH = ASSETS_DIR / "bg_tags.json"
+INDEX_VERSION = 2
+
+# folder → (kind, rank within the kind: earlier folders win between equal variants)
+ASSET_DIRS = {"bg": ("bg", 0), "bg_h": ("bg", 1), "bg_v": ("bg", 2), "bg_mid": ("mid", 0), "bg_mid_h": ("mid", 1)}
+# CenterBox (Alignment 5) caption band, as in qa_sync.CROP_FILTER
+CENTERBOX_CROP = "crop=iw*0.84:ih*0.40:iw*0.08:ih*0.30"
+NAME_RE = re.compile(r"^(?P<name>.+?)(?:[\s_-]+(?P<variant>\d{1,2}))?$")
+EMOTION_RE = re.compile(r"^[a-z]+(?:_[a-z]+)*$")
+
+
+@dataclass
+class Asset:
+    rel: str                               # path under assets/, forward slashes ("bg_h/fear 2.png")
+    kind: str                              # bg | mid
+    emotion: str                           # "" = untagged
+    variant: int
+    width: int
+    height: int
+    sha256: str
+    center_luma: Optional[float]           # 0..1 mean luma behind the CenterBox; None if not measured
+    size: int
+    mtime_ns: int
+    tagged: bool = False                   # emotion comes from bg_tags.json (variant numbered after the named ones)
+
+    @property
+    def path(self) -> Path:
+        return ASSETS_DIR / self.rel
+
+    @property
+    def orientation(self) -> str:
+        return "v" if self.height > self.width else "h"
+
+    def matches(self, size: str) -> bool:
+        return f"{self.width}x{self.height}" == size
+
+
+def orientation_of(size: str) -> str:
+    w, _, h = size.partition("x")
+    return "v" if int(h or 0) > int(w or 0) else "h"
+
+def parse_name(stem: str) -> Tuple[str, int]:
+    """File stem → (emotion, variant); emotion is "" when the name is not an emotion word."""
+    m = NAME_RE.match(stem.strip())
+    name = re.sub(r"[\s-]+", "_", m.group("name").strip().lower())
+    return (name if EMOTION_RE.match(name) else ""), int(m.group("variant") or 1)
+
+def norm_emotion(emotion: str) -> str:
+    return (emotion or "").strip().lower().replace(" ", "_")
+
+
+# -------- per-file facts --------
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def center_luma(path: Path) -> Optional[float]:
+    """Mean luma of the CenterBox band: ffmpeg crops, area-averages to one gray pixel."""
+    try:
+        p = subprocess.run(["ffmpeg", "-v", "error", "-nostdin", "-i", str(path), "-frames:v", "1",
+                            "-vf", f"{CENTERBOX_CROP},scale=1:1:flags=area,format=gray", "-f", "rawvideo", "-"],
+                           capture_output=True)
+    except OSError:
+        return None
+    return round(p.stdout[0] / 255.0, 3) if p.returncode == 0 and len(p.stdout) == 1 else None
+
+
+# -------- index --------
+class AssetIndex:
+    def __init__(self, path: Path = INDEX_PATH):
+        self.path = Path(path)
+        self.assets: Dict[str, Asset] = {}
+        self.dirty = False
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") == INDEX_VERSION:
+                self.assets = {k: Asset(**v) for k, v in data.get("assets", {}).items()}
+        except (OSError, ValueError, TypeError):
+            pass
+
+    def refresh(self, log=None) -> Tuple[int, int, int]:
+        """Bring the index in line with the folders; returns (added, updated, removed)."""
+        try:
+            tags = {k.replace("\\", "/"): norm_emotion(v)
+                    for k, v in json.loads(TAGS_PATH.read_text(encoding="utf-8")).items()}
+        except (OSError, ValueError, AttributeError):
+            tags = {}
+        seen, added, updated = set(), 0, 0
+        have_ffmpeg = shutil.which("ffmpeg") is not None
+        for folder, (kind, _rank) in ASSET_DIRS.items():
+            try:
+                entries = list(os.scandir(ASSETS_DIR / folder))
+            except OSError:
+                continue
+            for de in entries:
+                if not de.is_file() or not de.name.lower().endswith(".png") or de.name.startswith("."):
+                    continue
+                rel = f"{folder}/{de.name}"
+                seen.add(rel)
+                st = de.stat()
+                emotion, variant = parse_name(Path(de.name).stem)
+                tagged = rel in tags
+                if tagged:
+                    emotion, variant = tags[rel], 0          # numbered in _number_tagged()
+                old = self.assets.get(rel)
+                if old and old.size == st.st_size and old.mtime_ns == st.st_mtime_ns:
+                    if (old.emotion, old.tagged) != (emotion, tagged) or (not tagged and old.variant != variant):
+                        old.emotion, old.variant, old.tagged = emotion, variant, tagged
+                        self.dirty = True
+                    if old.center_luma is None and have_ffmpeg:      # indexed while ffmpeg was unavailable
+                        old.center_luma = center_luma(Path(de.path))
+                        self.dirty = self.dirty or old.center_luma is not None
+                    continue
+                info = media_probe.probe(de.path)
+                self.assets[rel] = Asset(rel, kind, emotion, variant, info.width or 0, info.height or 0,
+                                         sha256_file(Path(de.path)), center_luma(Path(de.path)) if have_ffmpeg else None,
+                                         st.st_size, st.st_mtime_ns, tagged)
+                self.dirty = True
+                added, updated = (added + 1, updated) if old is None else (added, updated + 1)
+                if log:
+                    a = self.assets[rel]
+                    log(f"[assets] {'+' if old is None else '~'} {rel} {a.width}x{a.height} luma={a.center_luma}")
+        removed = [rel for rel in self.assets if rel not in seen]
+        for rel in removed:
+            del self.assets[rel]
+        self.dirty = self.dirty or bool(removed)
+        self._number_tagged()
+        return added, updated, len(removed)
+
+    def _number_tagged(self):
+        """Tagged files take the variant numbers after the highest named variant of their emotion
+        (per kind and orientation, like the "fear 2.png" pairs in bg/ and bg_h/)."""
+        groups: Dict[Tuple[str, str, str], List[Asset]] = {}
+        for a in sorted(self.assets.values(), key=lambda a: a.rel):
+            if a.emotion:
+                groups.setdefault((a.kind, a.emotion, a.orientation), []).append(a)
+        for items in groups.values():
+            n = max((a.variant for a in items if not a.tagged), default=0)
+            for a in (a for a in items if a.tagged):
+                n += 1
+                if a.variant != n:
+                    a.variant, self.dirty = n, True
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        data = {"version": INDEX_VERSION, "built": round(time.time(), 3),
+                "assets": {k: asdict(v) for k, v in sorted(self.assets.items())}}
+        tmp.write_text(json.dumps(data, indent=1, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def variants(self, emotion: str, size: str, kind: str = "bg") -> List[Asset]:
+        """Best first: matching orientation (a horizontal job falls back to vertical plates), then
+        variant number, then an exact size match, then folder order."""
+        want, emotion = orientation_of(size), norm_emotion(emotion)
+        hits = [a for a in self.assets.values() if a.kind == kind and a.emotion == emotion and a.width and a.height]
+        return sorted(hits, key=lambda a: (a.orientation != want, a.variant, not a.matches(size),
+                                           ASSET_DIRS[a.rel.split("/", 1)[0]][1], a.rel))
+
+    def untagged(self) -> List[Asset]:
+        return sorted((a for a in self.assets.values() if not a.emotion), key=lambda a: a.rel)
+
+
+_shared: Optional[AssetIndex] = None
+
+def load(refresh: bool = False, log=None) -> AssetIndex:
+    """The process-wide index: refreshed on first use, and again when a new batch asks (refresh=True);
+    saved if that moved it."""
+    global _shared
+    if _shared is None:
+        _shared, refresh = AssetIndex(), True
+    if refresh:
+        _shared.refresh(log)
+        try:
+            _shared.save()
+        except OSError:
+            pass
+    return _shared
+
+def find_background(emotion: str, size: str, index: Optional[AssetIndex] = None,
+                    variant: Optional[int] = None) -> Optional[Asset]:
+    """Best plate for the emotion and size; variant=N picks that variant when the emotion has one."""
+    hits = (index or load()).variants(emotion, size)
+    picked = [a for a in hits if a.variant == variant] if variant else []
+    return (picked or hits or [None])[0]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build/refresh the background asset index and look things up.")
+    ap.add_argument("--find", default="", help="emotion to look up")
+    ap.add_argument("--size", default="1080x1920")
+    ap.add_argument("--kind", default="bg", choices=sorted({k for k, _ in ASSET_DIRS.values()}))
+    ap.add_argument("--variant", type=int, default=0, help="with --find: only this variant number")
+    ap.add_argument("--list", action="store_true", help="print every entry")
+    ap.add_argument("--json", action="store_true")
+    ap.add_argument("--rebuild", action="store_true", help="forget the index and measure everything again")
+    a = ap.parse_args()
+
+    idx = AssetIndex()
+    if a.rebuild:
+        idx.assets, idx.dirty = {}, True
+    t0 = time.perf_counter()
+    added, updated, removed = idx.refresh(log=print)
+    idx.save()
+    print(f"[assets] {len(idx.assets)} indexed (+{added} ~{updated} -{removed}) in {time.perf_counter() - t0:.2f}s → {idx.path}")
+
+    rows = idx.variants(a.find, a.size, a.kind) if a.find else \
+        (sorted(idx.assets.values(), key=lambda x: x.rel) if a.list else [])
+    if a.find and a.variant:
+        rows = [r for r in rows if r.variant == a.variant]
+    if a.json:
+        print(json.dumps([asdict(r) for r in rows], indent=1, ensure_ascii=False))
+    else:
+        for r in rows:
+            fit = "exact" if r.matches(a.size) else "scaled"
+            tag = " (tagged)" if r.tagged else ""
+            print(f"  {r.rel:52s} {r.emotion or '-':20s} #{r.variant:<2d} {r.width}x{r.height} ({fit}) luma={r.center_luma}{tag}")
+    if a.find and not rows:
+        print(f"[assets] no {a.kind} for {a.find} at {a.size}")
+        return 1
+    for u in idx.untagged():
+        print(f"[assets] untagged: {u.rel} (name it <emotion>[ N].png or map it in {TAGS_PATH.name})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,8 +14,13 @@ fi
 IN_WAV="$1"
 IN_SRT="$2"
 OUT_WAV="$3"
+TOOLS_DIR="$(cd "$(dirname "$0")" && pwd)"
 
-command -v ffprobe >/dev/null 2>&1 || die "ffprobe not found in PATH"
+# Media facts via tools/media_probe.py (cached per path + size + mtime; WAV headers read directly)
+PY="${PYTHON:-python}"; command -v "$PY" >/dev/null 2>&1 || PY=python3
+probe(){ "$PY" "$TOOLS_DIR/media_probe.py" --field "$1" "$2"; }
+
+command -v "$PY"   >/dev/null 2>&1 || die "python not found in PATH"
 command -v ffmpeg  >/dev/null 2>&1 || die "ffmpeg not found in PATH"
 
 [ -f "$IN_WAV" ] || die "Input WAV not found: $IN_WAV"
@@ -26,7 +31,7 @@ OUT_DIR="$(dirname "$OUT_WAV")"
 mkdir -p "$OUT_DIR"
 
 # --- Duration (seconds, float) ---
-WAV_DUR="$(ffprobe -v error -show_entries format=duration -of csv=p=0 "$IN_WAV" | sed 's/,/./g')"
+WAV_DUR="$(probe duration "$IN_WAV" || true)"
 [ -n "${WAV_DUR:-}" ] || die "Could not read WAV duration"
 
 # Robust SRT duration parser (handles CRLF/BOM/extra spaces)
@@ -101,6 +106,6 @@ echo "--------------------------------"
 ffmpeg -hide_banner -y -i "$IN_WAV" -filter:a "$CHAIN" -ar 48000 -ac 2 "$OUT_WAV"
 
 # Post-check
-NEW_DUR="$(ffprobe -v error -show_entries format=duration -of csv=p=0 "$OUT_WAV" | sed 's/,/./g' || true)"
+NEW_DUR="$(probe duration "$OUT_WAV" || true)"
 echo "NEW_WAV_DUR_SEC: ${NEW_DUR:-unknown}"
 echo "Done."
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# Caption model shared by the Python tools (hooks runtime, QA, TTS, renderer).
+# SRT and ASS are parsed into the same Cue list; ASS keeps its header lines and the
+# per-event fields so a file can be rewritten without touching styles or PlayRes.
+#
+# Times are integer milliseconds. ASS has centisecond resolution, so ASS writes round down
+# to 10 ms exactly like the awk helpers in render_swp_unified.sh (ms_to_hms).
+
+import copy
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+SRT_TS_RE = re.compile(r"(\d+):(\d{2}):(\d{2})[,.](\d{1,3})")
+ASS_TS_RE = re.compile(r"^(\d+):(\d{2}):(\d{2})\.(\d{2})$")
+ASS_EVENT_FORMAT = "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text"
+
+
+@dataclass
+class Cue:
+    start_ms: int
+    end_ms: int
+    text: str                       # SRT: lines joined by "\n"; ASS: raw Text field (uses \N)
+    layer: str = "0"                # ASS-only fields below (ignored for SRT)
+    style: str = "Default"
+    name: str = ""
+    margin_l: str = "0"
+    margin_r: str = "0"
+    margin_v: str = "0"
+    effect: str = ""
+
+    @property
+    def duration_ms(self) -> int:
+        return self.end_ms - self.start_ms
+
+
+@dataclass
+class Captions:
+    fmt: str                                          # "srt" | "ass"
+    cues: List[Cue] = field(default_factory=list)
+    header: List[str] = field(default_factory=list)   # ASS: every non-Dialogue line, in order
+
+    def copy(self) -> "Captions":
+        return copy.deepcopy(self)
+
+    def make_text(self, lines: List[str]) -> str:
+        """Join display lines in this format's line-break convention."""
+        return ("\\N" if self.fmt == "ass" else "\n").join(lines)
+
+    def plain_lines(self, cue: Cue) -> List[str]:
+        """Cue text as display lines with ASS override blocks removed."""
+        if self.fmt == "ass":
+            return [ln.strip() for ln in re.sub(r"\{[^}]*\}", "", cue.text).replace("\\n", "\\N").split("\\N")]
+        return [ln.strip() for ln in cue.text.split("\n")]
+
+
+# -------- timestamps --------
+def srt_ts(ms: int) -> str:
+    ms = max(0, int(ms))
+    return f"{ms // 3600000:02d}:{(ms // 60000) % 60:02d}:{(ms // 1000) % 60:02d},{ms % 1000:03d}"
+
+def ass_ts(ms: int) -> str:
+    ms = max(0, int(ms))
+    return f"{ms // 3600000:d}:{(ms // 60000) % 60:02d}:{(ms // 1000) % 60:02d}.{(ms % 1000) // 10:02d}"
+
+def parse_srt_ts(s: str) -> int:
+    m = SRT_TS_RE.search(s)
+    if not m:
+        raise ValueError(f"Bad SRT timestamp: {s!r}")
+    h, mi, sec, frac = m.groups()
+    return ((int(h) * 60 + int(mi)) * 60 + int(sec)) * 1000 + int(frac.ljust(3, "0"))
+
+def parse_ass_ts(s: str) -> int:
+    m = ASS_TS_RE.match(s.strip())
+    if not m:
+        raise ValueError(f"Bad ASS timestamp: {s!r}")
+    h, mi, sec, cs = m.groups()
+    return ((int(h) * 60 + int(mi)) * 60 + int(sec)) * 1000 + int(cs) * 10
+
+
+# -------- SRT --------
+def parse_srt(text: str) -> Captions:
+    text = text.replace("\ufeff", "").replace("\r\n", "\n").replace("\r", "\n")
+    cues = []
+    for block in re.split(r"\n\s*\n", text.strip()):
+        lines = block.split("\n")
+        idx = next((i for i, ln in enumerate(lines) if "-->" in ln), None)
+        if idx is None:
+            continue
+        left, right = lines[idx].split("-->", 1)
+        try:
+            start, end = parse_srt_ts(left), parse_srt_ts(right)
+        except ValueError:
+            continue
+        cues.append(Cue(start, end, "\n".join(ln.rstrip() for ln in lines[idx + 1:]).strip("\n")))
+    return Captions("srt", cues)
+
+def format_srt(caps: Captions) -> str:
+    out = []
+    for i, c in enumerate(caps.cues, start=1):
+        out.append(f"{i}\n{srt_ts(c.start_ms)} --> {srt_ts(c.end_ms)}\n{c.text}\n")
+    return "\n".join(out)
+
+
+# -------- ASS --------
+def parse_ass(text: str) -> Captions:
+    text = text.replace("\ufeff", "").replace("\r\n", "\n")
+    caps = Captions("ass")
+    for ln in text.split("\n"):
+        if ln.startswith("Dialogue:"):
+            parts = ln[len("Dialogue:"):].lstrip().split(",", 9)
+            if len(parts) < 10:
+                continue
+            layer, start, end, style, name, ml, mr, mv, effect, body = parts
+            try:
+                s_ms, e_ms = parse_ass_ts(start), parse_ass_ts(end)
+            except ValueError:
+                continue
+            caps.cues.append(Cue(s_ms, e_ms, body, layer.strip(), style, name, ml, mr, mv, effect))
+        else:
+            caps.header.append(ln)
+    while caps.header and not caps.header[-1].strip():
+        caps.header.pop()
+    if not any(h.strip() == "[Events]" for h in caps.header):
+        caps.header += ["", "[Events]", ASS_EVENT_FORMAT]
+    return caps
+
+def format_ass(caps: Captions) -> str:
+    events = [
+        f"Dialogue: {c.layer},{ass_ts(c.start_ms)},{ass_ts(c.end_ms)},{c.style},{c.name},"
+        f"{c.margin_l},{c.margin_r},{c.margin_v},{c.effect},{c.text}"
+        for c in caps.cues
+    ]
+    return "\n".join(caps.header + events) + "\n"
+
+
+# -------- files --------
+def read_captions(path: Path) -> Captions:
+    path = Path(path)
+    text = path.read_text(encoding="utf-8", errors="replace")
+    return parse_ass(text) if path.suffix.lower() == ".ass" else parse_srt(text)
+
+def write_captions(caps: Captions, path: Path) -> None:
+    """Write atomically (temp file + rename) in the format the Captions were read as."""
+    path = Path(path)
+    body = format_ass(caps) if caps.fmt == "ass" else format_srt(caps)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(body, encoding="utf-8", newline="\n")
+    tmp.replace(path)
+
+def shift(caps: Captions, delta_ms: int) -> None:
+    """Shift every cue by delta_ms, clamping at 0 (same semantics as shift_ass_times)."""
+    for c in caps.cues:
+        c.start_ms = max(0, c.start_ms + delta_ms)
+        c.end_ms = max(0, c.end_ms + delta_ms)
+
+def first_start_ms(caps: Captions) -> Optional[int]:
+    return min((c.start_ms for c in caps.cues), default=None)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# Built-in hooks for tools/hooks_runtime.py (enable them in tools/hooks.yaml).
+# Signature: fn(ctx, **args) — ctx.captions is a captions.Captions (or None when the stage has
+# no caption file), ctx.audio an AudioInfo, ctx.log() collects messages for the render log.
+
+import captions as capmod
+
+
+def inject_title(ctx, title: str = "", seconds: float = 1.1, push: bool = False):
+    """Scroll-stop title as the first cue (port of tools/hooks.disabled/srt_rules.sh).
+
+    push=True moves the original cues back by the title length instead of overlapping it.
+    """
+    caps = ctx.captions
+    if caps is None or not title:
+        return
+    dur_ms = int(round(float(seconds) * 1000))
+    if push:
+        capmod.shift(caps, dur_ms)
+    text = caps.make_text([ln.strip() for ln in title.splitlines() if ln.strip()])
+    style = caps.cues[0].style if caps.cues else "Default"
+    caps.cues.insert(0, capmod.Cue(0, dur_ms, text, style=style))
+    ctx.log(f"injected title cue 0–{dur_ms}ms" + (" (cues pushed)" if push else ""))
+
+
+def lint_captions(ctx, max_cps: float = 20.0, min_ms: int = 700):
+    """Warn about overlapping, too-short and too-fast cues (read-only)."""
+    caps = ctx.captions
+    if caps is None:
+        return
+    prev_end = None
+    for i, c in enumerate(caps.cues, start=1):
+        chars = len(" ".join(caps.plain_lines(c)))
+        if c.duration_ms < min_ms:
+            ctx.log(f"cue {i}: {c.duration_ms}ms is shorter than {min_ms}ms")
+        if c.duration_ms > 0 and chars / (c.duration_ms / 1000.0) > max_cps:
+            ctx.log(f"cue {i}: {chars / (c.duration_ms / 1000.0):.1f} chars/s exceeds {max_cps:g}")
+        if prev_end is not None and c.start_ms < prev_end:
+            ctx.log(f"cue {i}: starts {prev_end - c.start_ms}ms before cue {i - 1} ends")
+        prev_end = c.end_ms
+
+
+def audio_covers_captions(ctx, tolerance_ms: int = 250):
+    """Warn when captions run past the end of the voice track (read-only)."""
+    caps, dur = ctx.captions, ctx.audio.duration_s
+    if caps is None or not caps.cues or dur is None:
+        return
+    last_end = max(c.end_ms for c in caps.cues)
+    if last_end > dur * 1000 + tolerance_ms:
+        ctx.log(f"last cue ends at {last_end}ms but audio is {dur * 1000:.0f}ms")
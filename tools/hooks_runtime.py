@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# Hook runtime for the unified renderer — config-driven, in-process Python hooks.
+#
+# tools/hooks.yaml lists hooks per stage (pre_render, pre_autosync, post_autosync,
+# pre_ass_normalize, pre_burn, post_render). Each hook is a plain callable "module:function"
+# (looked up in tools/ and tools/hooks/) called as fn(ctx, **args), where ctx carries the
+# parsed captions (captions.Captions) and audio info instead of file paths to re-parse.
+#
+#   mutates: true   hook may edit ctx.captions; such hooks run one after another in file order,
+#                   each on a private copy that is committed only if it finishes in time.
+#   (default)       read-only hooks run concurrently on the committed captions.
+#   timeout_s       per-hook budget (defaults.timeout_s, else 5 s). A hook that overruns is
+#                   abandoned (daemon thread) and its edits are discarded.
+#
+# Every hook's latency/status and the runtime's own overhead go to TRACE_FILE (JSON lines).
+#
+# CLI (manual runs; tools/render_unified.py calls run_stage_file() in-process instead):
+#   python tools/hooks_runtime.py --stage pre_burn [--config tools/hooks.yaml]
+#          [--captions FILE] [--audio WAV] [--trace FILE]
+# Defaults come from the renderer's env: HOOK_CAPTIONS, HOOK_AUDIO, WORKDIR, TRACE_FILE.
+
+import argparse
+import importlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+import wave
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional
+
+TOOLS_DIR = Path(__file__).resolve().parent
+HOOKS_CONFIG_DEFAULT = TOOLS_DIR / "hooks.yaml"
+HOOK_DIRS = [TOOLS_DIR, TOOLS_DIR / "hooks"]
+DEFAULT_TIMEOUT_S = 5.0
+
+STAGES = ("pre_render", "pre_autosync", "post_autosync", "pre_ass_normalize", "pre_burn", "post_render")
+
+for _d in HOOK_DIRS:
+    if str(_d) not in sys.path:
+        sys.path.insert(0, str(_d))
+
+import captions as capmod  # noqa: E402  (needs tools/ on sys.path)
+
+
+# -------- config --------
+def _strip_comment(line: str) -> str:
+    quote = None
+    for i, ch in enumerate(line):
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+        elif ch == "#" and (i == 0 or line[i - 1].isspace()):
+            return line[:i]
+    return line
+
+def _scalar(s: str):
+    s = s.strip()
+    if s.startswith('"'):
+        return json.loads(s)
+    if s.startswith("'"):
+        return s[1:-1].replace("''", "'")
+    if s.startswith("[") and s.endswith("]"):
+        return [_scalar(x) for x in s[1:-1].split(",") if x.strip()]
+    if s == "{}":
+        return {}
+    low = s.lower()
+    if low in ("true", "yes", "on"):
+        return True
+    if low in ("false", "no", "off"):
+        return False
+    if low in ("null", "~", ""):
+        return None
+    for cast in (int, float):
+        try:
+            return cast(s)
+        except ValueError:
+            pass
+    return s
+
+def parse_simple_yaml(text: str):
+    """Block-style YAML subset (nested maps, lists of maps, scalars) used when PyYAML is absent."""
+    lines = []
+    for raw in text.splitlines():
+        s = _strip_comment(raw).rstrip()
+        if s.strip():
+            lines.append([len(s) - len(s.lstrip()), s.strip()])
+    pos = 0
+    key_re = re.compile(r"^[\w.-]+:(\s|$)")
+
+    def block(indent):
+        return seq(indent) if lines[pos][1].startswith("-") else mapping(indent)
+
+    def mapping(indent):
+        nonlocal pos
+        out = {}
+        while pos < len(lines) and lines[pos][0] == indent and not lines[pos][1].startswith("-"):
+            key, _, rest = lines[pos][1].partition(":")
+            pos += 1
+            if rest.strip():
+                out[key.strip()] = _scalar(rest)
+            elif pos < len(lines) and (lines[pos][0] > indent or (lines[pos][0] == indent and lines[pos][1].startswith("-"))):
+                out[key.strip()] = block(lines[pos][0])
+            else:
+                out[key.strip()] = None
+        return out
+
+    def seq(indent):
+        nonlocal pos
+        out = []
+        while pos < len(lines) and lines[pos][0] == indent and lines[pos][1].startswith("-"):
+            item = lines[pos][1][1:].strip()
+            if not item:
+                pos += 1
+                out.append(block(lines[pos][0]))
+            elif key_re.match(item):
+                lines[pos] = [indent + 2, item]   # "- key: v" opens a mapping at indent+2
+                out.append(mapping(indent + 2))
+            else:
+                pos += 1
+                out.append(_scalar(item))
+        return out
+
+    return block(lines[0][0]) if lines else {}
+
+def load_config(path: Path) -> dict:
+    path = Path(path)
+    if not path.exists():
+        return {}
+    text = path.read_text(encoding="utf-8")
+    try:
+        import yaml  # optional; the subset parser covers tools/hooks.yaml
+    except ImportError:
+        return parse_simple_yaml(text) or {}
+    return yaml.safe_load(text) or {}
+
+
+# -------- context --------
+class AudioInfo:
+    """Lazy audio facts for hooks; WAV headers are read with the wave module (no ffprobe)."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = Path(path) if path else None
+        self._params = None
+
+    def _load(self):
+        if self._params is None:
+            self._params = {}
+            if self.path and self.path.suffix.lower() == ".wav" and self.path.exists():
+                try:
+                    with wave.open(str(self.path), "rb") as wf:
+                        self._params = {"rate": wf.getframerate(), "channels": wf.getnchannels(), "frames": wf.getnframes()}
+                except (wave.Error, EOFError):
+                    pass
+        return self._params
+
+    @property
+    def sample_rate(self) -> Optional[int]:
+        return self._load().get("rate")
+
+    @property
+    def channels(self) -> Optional[int]:
+        return self._load().get("channels")
+
+    @property
+    def duration_s(self) -> Optional[float]:
+        p = self._load()
+        return p["frames"] / float(p["rate"]) if p.get("rate") else None
+
+
+@dataclass
+class HookContext:
+    stage: str
+    captions: Optional[capmod.Captions]
+    audio: AudioInfo
+    env: dict
+    workdir: Optional[Path]
+    messages: List[str] = field(default_factory=list)
+
+    def log(self, msg: str) -> None:
+        self.messages.append(msg)
+
+
+@dataclass
+class HookSpec:
+    name: str
+    call: str
+    mutates: bool = False
+    timeout_s: float = DEFAULT_TIMEOUT_S
+    args: dict = field(default_factory=dict)
+
+
+def stage_hooks(config: dict, stage: str) -> List[HookSpec]:
+    default_timeout = float((config.get("defaults") or {}).get("timeout_s", DEFAULT_TIMEOUT_S))
+    specs = []
+    for i, h in enumerate(((config.get("stages") or {}).get(stage)) or []):
+        if not isinstance(h, dict) or not h.get("call") or h.get("enabled", True) is False:
+            continue
+        specs.append(HookSpec(
+            name=str(h.get("name") or f"{stage}#{i + 1}"),
+            call=str(h["call"]),
+            mutates=bool(h.get("mutates", False)),
+            timeout_s=float(h.get("timeout_s", default_timeout)),
+            args=dict(h.get("args") or {}),
+        ))
+    return specs
+
+def resolve(call: str) -> Callable:
+    mod_name, _, fn_name = call.partition(":")
+    fn = getattr(importlib.import_module(mod_name), fn_name or "run")
+    if not callable(fn):
+        raise TypeError(f"{call} is not callable")
+    return fn
+
+
+# -------- execution --------
+def _start(fn: Callable, ctx: HookContext, args: dict):
+    box = {}
+
+    def target():
+        t0 = time.perf_counter()
+        try:
+            fn(ctx, **args)
+            box["status"] = "ok"
+        except Exception as e:  # hooks must never take the render down
+            box["status"] = "error"; box["error"] = f"{type(e).__name__}: {e}"
+        box["ms"] = (time.perf_counter() - t0) * 1000.0
+
+    th = threading.Thread(target=target, daemon=True)
+    th.start()
+    return th, box
+
+def _finish(th: threading.Thread, box: dict, spec: HookSpec, deadline: float) -> dict:
+    th.join(max(0.0, deadline - time.perf_counter()))
+    if th.is_alive():
+        return {"status": "timeout", "ms": spec.timeout_s * 1000.0, "error": f"exceeded {spec.timeout_s:g}s"}
+    return dict(box)
+
+def run_stage(stage: str, config: dict, captions: Optional[capmod.Captions] = None,
+              audio_path: Optional[str] = None, env: Optional[dict] = None, workdir: Optional[Path] = None,
+              log: Callable[[str], None] = print):
+    """Run one stage's hooks. Returns (captions, records); captions is the committed result."""
+    specs = stage_hooks(config, stage)
+    audio = AudioInfo(audio_path)
+    env = dict(os.environ if env is None else env)
+    records = []
+
+    def record(spec, res, ctx):
+        rec = {"kind": "hook", "stage": stage, "hook": spec.name, "call": spec.call, "mutates": spec.mutates,
+               "status": res["status"], "ms": round(res["ms"], 3)}
+        if res.get("error"):
+            rec["error"] = res["error"]
+        records.append(rec)
+        for m in ctx.messages:
+            log(f"[hooks] {stage}/{spec.name}: {m}")
+        log(f"[hooks] {stage}/{spec.name} {res['status']} {res['ms']:.1f}ms" + (f" ({res['error']})" if res.get("error") else ""))
+
+    def ctx_for(caps):
+        return HookContext(stage, caps, audio, env, workdir)
+
+    # Mutating hooks: sequential, each on a private copy, committed on success.
+    for spec in (s for s in specs if s.mutates):
+        ctx = ctx_for(captions.copy() if captions is not None else None)
+        try:
+            fn = resolve(spec.call)
+        except Exception as e:
+            record(spec, {"status": "error", "ms": 0.0, "error": f"{type(e).__name__}: {e}"}, ctx); continue
+        th, box = _start(fn, ctx, spec.args)
+        res = _finish(th, box, spec, time.perf_counter() + spec.timeout_s)
+        if res["status"] == "ok":
+            captions = ctx.captions
+        record(spec, res, ctx)
+
+    # Read-only hooks: concurrently, sharing one snapshot.
+    snapshot = captions.copy() if captions is not None else None
+    running = []
+    for spec in (s for s in specs if not s.mutates):
+        ctx = ctx_for(snapshot)
+        try:
+            fn = resolve(spec.call)
+        except Exception as e:
+            record(spec, {"status": "error", "ms": 0.0, "error": f"{type(e).__name__}: {e}"}, ctx); continue
+        th, box = _start(fn, ctx, spec.args)
+        running.append((spec, ctx, th, box, time.perf_counter() + spec.timeout_s))
+    for spec, ctx, th, box, deadline in running:
+        record(spec, _finish(th, box, spec, deadline), ctx)
+
+    return captions, records
+
+def append_trace(trace_path: Optional[str], records: List[dict]) -> None:
+    if not trace_path or not records:
+        return
+    with open(trace_path, "a", encoding="utf-8") as f:
+        for r in records:
+            f.write(json.dumps(dict(r, ts=round(time.time(), 3)), ensure_ascii=False) + "\n")
+
+
+def run_stage_file(stage: str, config: dict, caps_path: Optional[Path], audio_path: Optional[str] = None,
+                   trace_path: Optional[str] = None, workdir: Optional[Path] = None, env: Optional[dict] = None,
+                   log: Callable[[str], None] = print) -> int:
+    """Run a stage on a caption file (rewritten only if a hook changed it). Returns the hook count.
+
+    This is what the CLI does per stage; tools/render_unified.py calls it in-process.
+    """
+    t0 = time.perf_counter()
+    caps = capmod.read_captions(caps_path) if caps_path and caps_path.exists() else None
+    before = capmod.format_ass(caps) if caps and caps.fmt == "ass" else (capmod.format_srt(caps) if caps else None)
+
+    t_hooks = time.perf_counter()
+    caps, records = run_stage(stage, config, caps, audio_path, env=env, workdir=workdir, log=log)
+    hooks_ms = (time.perf_counter() - t_hooks) * 1000.0
+
+    if caps is not None and caps_path is not None:
+        after = capmod.format_ass(caps) if caps.fmt == "ass" else capmod.format_srt(caps)
+        if after != before:
+            capmod.write_captions(caps, caps_path)
+            log(f"[hooks] {stage}: captions updated → {caps_path}")
+
+    total_ms = (time.perf_counter() - t0) * 1000.0
+    n = len(records)
+    records.append({"kind": "hook_stage", "stage": stage, "hooks": n,
+                    "wall_ms": round(total_ms, 3), "hooks_ms": round(hooks_ms, 3),
+                    "overhead_ms": round(total_ms - hooks_ms, 3)})
+    append_trace(trace_path, records)
+    log(f"[hooks] {stage}: {n} hook(s) in {hooks_ms:.1f}ms (runtime overhead {total_ms - hooks_ms:.1f}ms)")
+    return n
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run the configured Python hooks for one render stage.")
+    ap.add_argument("--stage", required=True, choices=STAGES)
+    ap.add_argument("--config", default=os.environ.get("HOOKS_CONFIG", str(HOOKS_CONFIG_DEFAULT)))
+    ap.add_argument("--captions", default=os.environ.get("HOOK_CAPTIONS", ""))
+    ap.add_argument("--audio", default=os.environ.get("HOOK_AUDIO", ""))
+    ap.add_argument("--trace", default=os.environ.get("TRACE_FILE", ""))
+    a = ap.parse_args()
+
+    config = load_config(Path(a.config))
+    if not stage_hooks(config, a.stage):
+        return 0
+    workdir = Path(os.environ["WORKDIR"]) if os.environ.get("WORKDIR") else None
+    run_stage_file(a.stage, config, Path(a.captions) if a.captions else None, a.audio or None, a.trace, workdir)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -25,8 +25,13 @@ OUT="${3:?need OUT.srt}"
 GAP_MS="${GAP_MS:-180}"    # pause between sentences
 MIN_MS="${MIN_MS:-900}"    # minimum on-screen time per sentence
 
+TOOLS_DIR="$(cd "$(dirname "$0")" && pwd)"
+# Media facts via tools/media_probe.py (cached per path + size + mtime; WAV headers read directly)
+PY="${PYTHON:-python}"; command -v "$PY" >/dev/null 2>&1 || PY=python3
+probe(){ "$PY" "$TOOLS_DIR/media_probe.py" --field "$1" "$2"; }
+
 # 1) Get WAV duration (ms)
-DUR_MS="$(ffprobe -v error -show_entries format=duration -of default=nk=1:nw=1 "$WAV" | awk '{printf("%.0f",$1*1000)}')"
+DUR_MS="$(probe duration "$WAV" | awk '{printf("%.0f",$1*1000)}')"
 
 # 2) Read non-empty sentences
 mapfile -t LINES < <(awk 'NF{print}' "$TXT")
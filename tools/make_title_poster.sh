@@ -35,7 +35,10 @@ ROOT="$(cd "$(dirname "$0")/.." && pwd)"
 BUILD="$ROOT/voice/build"; mkdir -p "$BUILD" "$(dirname "$OUT")"
 
 # --- build ASS (CenterBox style) ---
-ASS="$BUILD/.poster_title.${PRX}x${PRY}.ass"
+# Per-run temp names so concurrent posters/renders never share the title ASS or a half-written PNG.
+ASS="$(mktemp --suffix=.ass "$BUILD/.poster_title.${PRX}x${PRY}.XXXXXX")"
+OUT_PARTIAL="$(dirname "$OUT")/.$(basename "${OUT%.*}").$$.partial.png"
+trap 'rm -f "$ASS" "$OUT_PARTIAL"' EXIT
 esc="${TOP_BANNER//\\/\\\\}"; esc="${esc//\{/\{}"; esc="${esc//\}/\}}"
 esc="${esc//$'\r'/}"; esc="${esc//$'\n'/\\N}"
 
@@ -92,7 +95,8 @@ else
 fi
 
 # --- render 1 frame ---
-ffmpeg -hide_banner -y "${IN_OPTS[@]}" -vf "$VF" -frames:v 1 "$OUT"
+ffmpeg -hide_banner -y "${IN_OPTS[@]}" -vf "$VF" -frames:v 1 "$OUT_PARTIAL"
+mv -f "$OUT_PARTIAL" "$OUT"
 
 echo "[OK] Poster written:"
 if command -v cygpath >/dev/null 2>&1; then cygpath -w "$OUT"; else echo "$OUT"; fi
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# Media-info cache shared by the Python tools and the shell scripts (instead of ffprobe per call).
+#
+# Facts per file: format, duration, sample rate, channels, width, height. They are kept in a small
+# sqlite database keyed by the absolute path and revalidated by size + mtime_ns, so a batch pays for
+# each file once and an edited file is probed again. WAV headers are read with the wave module and
+# PNG sizes from the IHDR chunk; everything else costs one ffprobe, on a miss only. Unreadable files
+# are cached too (empty facts), so a bad input is not re-probed on every call either.
+#
+# The database is local (voice/build/.cache/media_probe.sqlite, MEDIA_PROBE_DB to move it) rather
+# than under CACHE_ROOT: sqlite locking is not safe on the shared filesystems work_queue may use.
+#
+#   python tools/media_probe.py voice/wavs/x.wav                    # all facts, key=value
+#   python tools/media_probe.py --field duration voice/wavs/x.wav   # one value, as ffprobe prints it
+#   python tools/media_probe.py --json assets/bg/*.png
+#   python tools/media_probe.py --prune                             # forget files that are gone
+#
+# Shell scripts: DUR="$("$PY" "$TOOLS_DIR/media_probe.py" --field duration "$WAV")"
+# (prints nothing and exits 1 when the value is unknown, like an ffprobe that found no such entry).
+
+import argparse
+import json
+import os
+import sqlite3
+import struct
+import subprocess
+import sys
+import time
+import wave
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+APP_ROOT = Path(__file__).resolve().parent.parent
+DB_DEFAULT = APP_ROOT / "voice" / "build" / ".cache" / "media_probe.sqlite"
+FIELDS = ("format", "duration", "sample_rate", "channels", "width", "height")
+
+
+@dataclass
+class MediaInfo:
+    format: str = ""                       # ffprobe format_name (wav, png_pipe, mov,mp4,m4a,3gp,3g2,mj2, ...)
+    duration: Optional[float] = None       # seconds; None for stills
+    sample_rate: Optional[int] = None      # first audio stream
+    channels: Optional[int] = None
+    width: Optional[int] = None            # first video stream / image
+    height: Optional[int] = None
+
+    def value(self, name: str) -> str:
+        v = getattr(self, name)
+        if v is None or v == "":
+            return ""
+        return f"{v:.6f}" if isinstance(v, float) else str(v)
+
+
+def native(p) -> Path:
+    """/c/... (Git Bash) → C:\\... on Windows; unchanged elsewhere."""
+    s = str(p)
+    if os.name == "nt" and s.startswith("/") and len(s) > 2 and s[2] == "/":
+        return Path(f"{s[1].upper()}:\\" + s[3:].replace("/", "\\"))
+    return Path(s)
+
+
+# -------- probing (no cache) --------
+def _probe_wav(path: Path) -> Optional[MediaInfo]:
+    try:
+        with wave.open(str(path), "rb") as w:
+            rate, n = w.getframerate(), w.getnframes()
+            return MediaInfo("wav", n / float(rate), rate, w.getnchannels())
+    except (wave.Error, EOFError, OSError, ZeroDivisionError):
+        return None                        # float/extensible WAVs: ask ffprobe
+
+def _probe_png(path: Path) -> Optional[MediaInfo]:
+    try:
+        with path.open("rb") as f:
+            head = f.read(24)
+    except OSError:
+        return None
+    if len(head) < 24 or head[:8] != b"\x89PNG\r\n\x1a\n" or head[12:16] != b"IHDR":
+        return None
+    w, h = struct.unpack(">II", head[16:24])
+    return MediaInfo("png_pipe", None, None, None, w, h)
+
+def _probe_ffprobe(path: Path) -> Optional[MediaInfo]:
+    """None when ffprobe itself could not run (nothing to cache); empty facts if it ran and found nothing."""
+    try:
+        p = subprocess.run(["ffprobe", "-v", "error", "-show_format", "-show_streams", "-of", "json", str(path)],
+                           capture_output=True, text=True)
+    except OSError:
+        return None
+    try:
+        data = json.loads(p.stdout or "{}")
+    except ValueError:
+        data = {}
+
+    def num(v, kind):
+        try:
+            return kind(v) if v not in (None, "", "N/A") else None
+        except ValueError:
+            return None
+
+    fmt = data.get("format", {})
+    info = MediaInfo(fmt.get("format_name", ""), num(fmt.get("duration"), float))
+    for st in data.get("streams", []):
+        if st.get("codec_type") == "audio" and info.sample_rate is None:
+            info.sample_rate, info.channels = num(st.get("sample_rate"), int), num(st.get("channels"), int)
+        elif st.get("codec_type") == "video" and info.width is None:
+            info.width, info.height = num(st.get("width"), int), num(st.get("height"), int)
+    return info
+
+def probe_uncached(path) -> Optional[MediaInfo]:
+    path = native(path)
+    ext = path.suffix.lower()
+    info = _probe_wav(path) if ext == ".wav" else _probe_png(path) if ext == ".png" else None
+    return info or _probe_ffprobe(path)
+
+
+# -------- cache --------
+class ProbeCache:
+    """sqlite-backed probe results; get() revalidates against the file's size + mtime_ns."""
+
+    def __init__(self, db_path=None):
+        self.db_path = Path(db_path or os.environ.get("MEDIA_PROBE_DB") or DB_DEFAULT)
+        self.hits = self.misses = 0
+        self.db: Optional[sqlite3.Connection] = None
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self.db = sqlite3.connect(str(self.db_path), timeout=10)
+            self.db.execute("CREATE TABLE IF NOT EXISTS probes (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, "
+                            "info TEXT, probed_at REAL)")
+        except (OSError, sqlite3.Error) as e:    # read-only checkout etc.: still answer, just uncached
+            print(f"[probe] cache disabled ({self.db_path}): {e}", file=sys.stderr)
+            self.db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    @staticmethod
+    def _key(path: Path) -> str:
+        return os.path.normcase(os.path.abspath(str(path)))
+
+    def get(self, path) -> MediaInfo:
+        path = native(path)
+        try:
+            st = path.stat()
+        except OSError:
+            return MediaInfo()
+        key = self._key(path)
+        if self.db is not None:
+            try:
+                row = self.db.execute("SELECT size, mtime_ns, info FROM probes WHERE path = ?", (key,)).fetchone()
+            except sqlite3.Error:
+                row = None
+            if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+                self.hits += 1
+                raw = json.loads(row[2])
+                return MediaInfo(**{k: raw.get(k) for k in FIELDS})
+        self.misses += 1
+        info = probe_uncached(path)
+        if info is None:
+            return MediaInfo()
+        if self.db is not None:
+            try:
+                with self.db:
+                    self.db.execute("INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?)",
+                                    (key, st.st_size, st.st_mtime_ns, json.dumps(asdict(info)), time.time()))
+            except sqlite3.Error:
+                pass
+        return info
+
+    def prune(self) -> int:
+        """Drop rows whose file no longer exists; returns how many."""
+        if self.db is None:
+            return 0
+        gone = [p for (p,) in self.db.execute("SELECT path FROM probes") if not os.path.exists(p)]
+        with self.db:
+            self.db.executemany("DELETE FROM probes WHERE path = ?", [(p,) for p in gone])
+        return len(gone)
+
+
+class _NoCache(ProbeCache):
+    """--no-cache: same interface, every get() probes."""
+    def __init__(self):
+        self.db_path, self.db, self.hits, self.misses = Path(os.devnull), None, 0, 0
+
+
+_shared: Optional[ProbeCache] = None
+
+def probe(path) -> MediaInfo:
+    """Cached facts for one file (one ProbeCache per process)."""
+    global _shared
+    if _shared is None:
+        _shared = ProbeCache()
+    return _shared.get(path)
+
+def duration(path) -> Optional[float]:
+    return probe(path).duration
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Cached media facts (duration, sample rate, channels, format, size).")
+    ap.add_argument("paths", nargs="*")
+    ap.add_argument("--field", choices=FIELDS, help="print just this value per file (empty + rc 1 if unknown)")
+    ap.add_argument("--json", action="store_true", help="one JSON object per file")
+    ap.add_argument("--db", default="", help=f"cache database (default: MEDIA_PROBE_DB or {DB_DEFAULT})")
+    ap.add_argument("--prune", action="store_true", help="forget files that no longer exist")
+    ap.add_argument("--no-cache", action="store_true", help="probe directly, leave the database alone")
+    a = ap.parse_args()
+
+    with ProbeCache(a.db or None) if not a.no_cache else _NoCache() as cache:
+        if a.prune:
+            print(f"[probe] pruned {cache.prune()} missing file(s) from {cache.db_path}")
+        rc = 0
+        for p in a.paths:
+            info = cache.get(p)
+            if a.field:
+                v = info.value(a.field)
+                print(v)
+                rc = rc or (0 if v else 1)
+            elif a.json:
+                print(json.dumps(dict(path=p, **asdict(info)), ensure_ascii=False))
+            else:
+                print(" ".join([p] + [f"{k}={info.value(k)}" for k in FIELDS]))
+    return rc
+
+if __name__ == "__main__":
+    sys.exit(main())
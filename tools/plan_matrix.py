@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+# Weekly content-matrix planner: emotions × languages × voices × sizes → ordered render jobs.
+#
+# The matrix comes from templates/emotions_week1.txt, templates/languages_week1.txt, the voice
+# labels (same names as the launcher: AMY, BRYCE, …) and the output sizes. Each cell is one MP4,
+# but most of its inputs are shared with other cells:
+#
+#   script   examples/<emotion>_<lang>.json (or voice/lines/, voice/txt/<emotion>_<lang>.txt) — by line hash
+#   model    Piper .onnx from the voice profile (female-amy and female-default share one)
+#   audio    model + profile scales (length_scale ÷ manifest rate) + script → one WAV + SRT reused
+#            by every size; manifest pitch is applied in the burn, so it does not split audio keys
+#   bg       background PNG + size from tools/asset_index.py (horizontal falls back to the vertical
+#            set, like the launcher; --bg-variant N picks variant N where an emotion has one)
+#
+# Jobs are grouped by model, then audio, then size, so each voice's model is loaded while it is
+# still in the OS page cache, TTS runs once per audio key and the second size of an audio hits the
+# renderer's sync cache (.cache/sync) instead of re-running autosync/tempo/onset.
+#
+# Costs are predicted from per-stage coefficients, scaled by the median actual/predicted ratio of
+# earlier --execute runs (voice/build/logs/plan_actuals.jsonl), so the estimate learns this machine.
+#
+#   python tools/plan_matrix.py                          # print the plan + predicted cost
+#   python tools/plan_matrix.py --voices AMY --sizes 1080x1920 --execute
+#   python tools/plan_matrix.py --json plan.json         # machine-readable plan
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import asset_index
+
+APP_ROOT = Path(__file__).resolve().parent.parent
+TOOLS_DIR = APP_ROOT / "tools"
+TEMPLATES_DIR = APP_ROOT / "templates"
+EXAMPLES_DIR = APP_ROOT / "examples"
+VOICE_LINES_DIR = APP_ROOT / "voice" / "lines"
+VOICE_TXT_DIR = APP_ROOT / "voice" / "txt"
+VOICE_PROFILES_DIR = APP_ROOT / "voice" / "profiles"
+VOICE_MANIFEST = APP_ROOT / "voice" / "manifest.json"
+VOICE_BUILD_DIR = APP_ROOT / "voice" / "build"
+VOICE_WAVS_DIR = APP_ROOT / "voice" / "wavs"
+VOICE_LOGS_DIR = VOICE_BUILD_DIR / "logs"
+OUT_DEFAULT = APP_ROOT / "out"
+PIPER_EXE = APP_ROOT / "piper" / "piper.exe"
+JSON_TO_SRT = APP_ROOT / "scripts" / "json_to_srt.py"
+RENDER_PY = TOOLS_DIR / "render_unified.py"
+ACTUALS_LOG = VOICE_LOGS_DIR / "plan_actuals.jsonl"
+
+SIZES = ("1080x1920", "1920x1080")
+
+# Same labels as ui_launcher.PROFILE_MAP
+PROFILE_MAP = {
+    "AMY":       VOICE_PROFILES_DIR / "female-default.env",
+    "BRYCE":     VOICE_PROFILES_DIR / "male-default.env",
+    "RYAN":      VOICE_PROFILES_DIR / "male-ryan.env",
+    "JOE":       VOICE_PROFILES_DIR / "male-joe.env",
+    "NORMAN":    VOICE_PROFILES_DIR / "male-norman.env",
+    "RYAN_HIGH": VOICE_PROFILES_DIR / "male-ryan-high.env",
+    "LIBRITTS":  VOICE_PROFILES_DIR / "male-libritts.env",
+}
+
+# Cost model (seconds). Audio length is estimated from the script until the WAV exists.
+COST = {
+    "model_load_cold": 4.0,     # Piper start + .onnx read from disk (model not used just before)
+    "model_load_warm": 1.2,     # same model as the previous TTS: file still in page cache
+    "tts_per_char": 0.012,
+    "srt": 0.3,
+    "sync_per_audio_s": 0.35,   # autosync ×2 + tempo match + onset (skipped on a sync-cache hit)
+    "sync_hit": 0.2,
+    "burn_per_audio_s": 0.45,   # 1080p-class x264 burn, per second of output
+    "render_fixed": 1.5,        # interpreter start-up, ASS passes
+}
+CHARS_PER_AUDIO_S = 15.0       # speech rate at LENGTH_SCALE 1.0
+
+
+# -------- inputs --------
+def read_list(path: Path) -> List[str]:
+    """Template list: one item per line, blank lines and # comments ignored."""
+    if not path.exists():
+        return []
+    out = []
+    for ln in path.read_text(encoding="utf-8").splitlines():
+        ln = ln.split("#", 1)[0].strip()
+        if ln:
+            out.append(ln)
+    return out
+
+def slug(s: str) -> str:
+    return s.strip().lower().replace(" ", "_")
+
+def load_profile(path: Path) -> Dict[str, str]:
+    env = {}
+    for ln in path.read_text(encoding="utf-8").splitlines():
+        ln = ln.strip()
+        if not ln or ln.startswith("#") or "=" not in ln:
+            continue
+        k, v = ln.split("=", 1)
+        env[k.strip()] = v.strip().strip('"').strip("'")
+    return env
+
+def manifest_voice_params(manifest: dict, emotion: str):
+    """(rate, pitch_semitones) for an emotion (same rules as ui_launcher.manifest_voice_params)."""
+    e = manifest.get("map", {}).get(emotion, {})
+    rate = float(e.get("rate", manifest.get("default_rate", 1.0)) or 1.0)
+    pitch = float(e.get("pitch_semitones", manifest.get("default_pitch_semitones", 0)) or 0.0)
+    return rate, pitch
+
+def load_manifest() -> dict:
+    try:
+        return json.loads(VOICE_MANIFEST.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+def find_script(emotion: str, lang: str) -> Optional[Path]:
+    for p in (EXAMPLES_DIR / f"{emotion}_{lang}.json", VOICE_LINES_DIR / f"{emotion}_{lang}.txt",
+              VOICE_TXT_DIR / f"{emotion}_{lang}.txt"):
+        if p.exists():
+            return p
+    return None
+
+def script_lines(path: Path) -> List[str]:
+    if path.suffix.lower() == ".json":
+        lines = json.loads(path.read_text(encoding="utf-8")).get("lines", [])
+        if isinstance(lines, str):
+            lines = lines.splitlines()
+    else:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    return [ln.strip() for ln in lines if ln.strip()]
+
+def find_background(emotion: str, size: str, index: Optional[asset_index.AssetIndex] = None,
+                    variant: Optional[int] = None) -> Optional[Path]:
+    """Best background from the asset index (same as Launcher._find_background; H falls back to V plates)."""
+    hit = asset_index.find_background(emotion, size, index, variant)
+    return hit.path if hit else None
+
+def out_name(base: str, size: str) -> str:
+    return f"{base}_VERTICAL_BOXED.mp4" if size == "1080x1920" else f"{base}_HORIZONTAL_1080p.mp4"
+
+def _h(*parts) -> str:
+    return hashlib.sha1("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:12]
+
+
+# -------- plan --------
+@dataclass
+class Job:
+    emotion: str
+    lang: str
+    voice: str
+    size: str
+    base: str
+    script: Optional[str] = None
+    script_key: str = ""
+    model: str = ""
+    audio_key: str = ""
+    bg: Optional[str] = None
+    bg_key: str = ""
+    chars: int = 0
+    length_scale: str = ""                           # profile LENGTH_SCALE ÷ manifest rate
+    pitch: float = 0.0                               # manifest pitch_semitones (burn-time DSP)
+    audio_s: float = 0.0
+    skip: str = ""                                   # reason the cell cannot be rendered
+    predicted: Dict[str, float] = field(default_factory=dict)
+    actual: Dict[str, float] = field(default_factory=dict)
+
+def expand(emotions: List[str], langs: List[str], voices: List[str], sizes: List[str],
+           bg_variant: Optional[int] = None) -> List[Job]:
+    profiles = {}
+    manifest = load_manifest()
+    index = asset_index.load(refresh=True)           # one rescan per expansion, not per cell
+    jobs = []
+    for emo in emotions:
+        rate, pitch = manifest_voice_params(manifest, emo)
+        for lang in langs:
+            script = find_script(emo, lang)
+            lines = script_lines(script) if script else []
+            for voice in voices:
+                if voice not in profiles:
+                    pp = PROFILE_MAP.get(voice)
+                    profiles[voice] = load_profile(pp) if pp and pp.exists() else None
+                prof = profiles[voice]
+                base = f"{emo}_{lang}_{voice.lower()}"
+                for size in sizes:
+                    j = Job(emo, lang, voice, size, base, pitch=pitch)
+                    bg = find_background(emo, size, index, bg_variant)
+                    j.bg = str(bg) if bg else None
+                    j.bg_key = _h(j.bg, size)
+                    if prof is None:
+                        j.skip = f"no voice profile for {voice}"
+                    elif not script:
+                        j.skip = "no script (examples/<emotion>_<lang>.json or voice/{lines,txt}/<emotion>_<lang>.txt)"
+                    elif not bg:
+                        j.skip = f"no background for {size}"
+                    if prof is not None:
+                        j.model = prof.get("MODEL_PATH", "")
+                    if script:
+                        j.script = str(script)
+                        j.script_key = _h(*lines)
+                        j.chars = sum(len(ln) for ln in lines)
+                    if prof is not None and script:
+                        j.length_scale = f"{float(prof.get('LENGTH_SCALE') or 1.0) / max(0.25, rate):.3f}"
+                        scales = (j.length_scale, prof.get("NOISE_SCALE"), prof.get("NOISE_W"))
+                        j.audio_key = _h(j.model, prof.get("CONFIG_PATH"), *scales, j.script_key)
+                        wav = VOICE_WAVS_DIR / f"{base}.wav"
+                        j.audio_s = wav_seconds(wav) or (j.chars / CHARS_PER_AUDIO_S) * float(j.length_scale)
+                    jobs.append(j)
+    return jobs
+
+def wav_seconds(path: Path) -> Optional[float]:
+    try:
+        import wave
+        with wave.open(str(path), "rb") as w:
+            return w.getnframes() / float(w.getframerate())
+    except Exception:
+        return None
+
+def order_jobs(jobs: List[Job]) -> List[Job]:
+    """Model → audio → size → background; the first job of each audio key does the TTS."""
+    first_seen = {}
+    for i, j in enumerate(jobs):
+        first_seen.setdefault(j.model, i)
+    return sorted(jobs, key=lambda j: (bool(j.skip), first_seen.get(j.model, 0), j.model,
+                                        j.voice, j.audio_key, j.size, j.bg_key))
+
+def predict(jobs: List[Job], scale: Dict[str, float], share: bool = True) -> float:
+    """Fill job.predicted for this execution order; share=False prices every cell standalone."""
+    last_model = None
+    audio_done, sync_done = set(), set()
+    total = 0.0
+    for j in jobs:
+        j.predicted = {}
+        if j.skip:
+            continue
+        if not share or j.audio_key not in audio_done:
+            load = COST["model_load_warm"] if j.model == last_model else COST["model_load_cold"]
+            j.predicted["tts"] = (load + COST["tts_per_char"] * j.chars) * scale.get("tts", 1.0)
+            j.predicted["srt"] = COST["srt"] * scale.get("srt", 1.0)
+            last_model = j.model
+            audio_done.add(j.audio_key)
+        sync = COST["sync_hit"] if share and j.audio_key in sync_done else COST["sync_per_audio_s"] * j.audio_s
+        sync_done.add(j.audio_key)
+        j.predicted["render"] = (COST["render_fixed"] + sync + COST["burn_per_audio_s"] * j.audio_s) * scale.get("render", 1.0)
+        total += sum(j.predicted.values())
+    return total
+
+def load_scale(path: Path = ACTUALS_LOG, keep: int = 50) -> Dict[str, float]:
+    """Median actual/predicted per stage over the most recent runs (1.0 when there is no history)."""
+    ratios: Dict[str, List[float]] = {}
+    if path.exists():
+        for ln in path.read_text(encoding="utf-8").splitlines()[-keep * 4:]:
+            try:
+                r = json.loads(ln)
+                if r.get("predicted_raw", 0) > 0 and r.get("actual", 0) > 0:
+                    ratios.setdefault(r["stage"], []).append(r["actual"] / r["predicted_raw"])
+            except (ValueError, KeyError):
+                continue
+    return {k: statistics.median(v[-keep:]) for k, v in ratios.items()}
+
+
+# -------- report --------
+def summarize(jobs: List[Job]) -> Dict[str, int]:
+    live = [j for j in jobs if not j.skip]
+    return {
+        "cells": len(jobs),
+        "renderable": len(live),
+        "skipped": len(jobs) - len(live),
+        "scripts": len({j.script_key for j in live}),
+        "models": len({j.model for j in live}),
+        "tts_runs": len({j.audio_key for j in live}),
+        "bg_size_pairs": len({j.bg_key for j in live}),
+    }
+
+def print_plan(jobs: List[Job], planned_s: float, naive_s: float, scale: Dict[str, float]):
+    s = summarize(jobs)
+    print(f"[plan] {s['cells']} cells: {s['renderable']} renderable, {s['skipped']} skipped")
+    print(f"[plan] shared: {s['scripts']} script(s), {s['models']} model(s), "
+          f"{s['tts_runs']} TTS run(s) for {s['renderable']} render(s), {s['bg_size_pairs']} bg+size pair(s)")
+    if scale:
+        print("[plan] calibration: " + ", ".join(f"{k}×{v:.2f}" for k, v in sorted(scale.items())))
+    model = None
+    for i, j in enumerate((j for j in jobs if not j.skip), start=1):
+        if j.model != model:
+            model = j.model
+            print(f"  -- model {Path(model.replace(chr(92), '/')).name or '?'}")
+        steps = "+".join(k for k in ("tts", "srt", "render") if k in j.predicted)
+        print(f"  {i:3d}. {j.base:32s} {j.size:9s} ~{j.audio_s:5.1f}s audio  {steps:14s} {sum(j.predicted.values()):7.1f}s")
+    skipped = [j for j in jobs if j.skip]
+    if skipped:
+        reasons: Dict[str, List[Job]] = {}
+        for j in skipped:
+            reasons.setdefault(j.skip, []).append(j)
+        for r, js in sorted(reasons.items(), key=lambda kv: -len(kv[1])):
+            cells = sorted({f"{j.emotion}_{j.lang}" for j in js})
+            more = f" +{len(cells) - 6} more" if len(cells) > 6 else ""
+            print(f"  skip ×{len(js)}: {r}: {', '.join(cells[:6])}{more}")
+    saved = naive_s - planned_s
+    print(f"[plan] predicted {planned_s:.1f}s (standalone cells: {naive_s:.1f}s, "
+          f"saves {saved:.1f}s / {100.0 * saved / naive_s if naive_s else 0:.0f}%)")
+
+def print_actuals(jobs: List[Job]):
+    stages = ("tts", "srt", "render")
+    # Only stages that actually completed are compared (failed steps have no actual).
+    pred = {k: sum(j.predicted.get(k, 0.0) for j in jobs if k in j.actual) for k in stages}
+    act = {k: sum(j.actual.get(k, 0.0) for j in jobs) for k in stages}
+    print("[report] stage     predicted    actual    ratio   (completed steps)")
+    for k in stages:
+        ratio = f"{act[k] / pred[k]:.2f}" if pred[k] else "-"
+        print(f"[report] {k:8s} {pred[k]:10.1f}s {act[k]:8.1f}s {ratio:>8s}")
+    tp, ta = sum(pred.values()), sum(act.values())
+    print(f"[report] total    {tp:10.1f}s {ta:8.1f}s {ta / tp if tp else 0:8.2f}")
+
+
+# -------- execute --------
+def _win_path(s: str) -> str:
+    """/c/... → C:\\... for piper.exe (profiles store Git Bash paths)."""
+    if os.name == "nt" and s.startswith("/") and len(s) > 2 and s[2] == "/":
+        return f"{s[1].upper()}:\\" + s[3:].replace("/", "\\")
+    return s
+
+def _run(cmd, log, **kw) -> int:
+    try:
+        p = subprocess.run(cmd, cwd=str(APP_ROOT), capture_output=True, text=True, **kw)
+    except OSError as e:
+        log.write(f"[err] could not launch {cmd[0]}: {e}\n")
+        return 127
+    log.write(p.stdout or "")
+    log.write(p.stderr or "")
+    return p.returncode
+
+def render_cmd(size: str, bg: Path, wav: Path, caps: Path, out: Path) -> List[str]:
+    """The unified renderer, run directly with this interpreter (no bash in between)."""
+    return [sys.executable, "-u", str(RENDER_PY), f"--size={size}", str(bg), str(wav), str(caps), str(out)]
+
+def record_actual(job: Job, stage: str, seconds: float, scale: Dict[str, float]):
+    job.actual[stage] = seconds
+    raw = job.predicted.get(stage, 0.0) / scale.get(stage, 1.0)
+    VOICE_LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    with ACTUALS_LOG.open("a", encoding="utf-8") as f:
+        f.write(json.dumps({"ts": round(time.time(), 3), "job": job.base, "size": job.size, "stage": stage,
+                            "predicted_raw": round(raw, 3), "actual": round(seconds, 3)}) + "\n")
+
+def execute(jobs: List[Job], out_dir: Path, scale: Dict[str, float]) -> int:
+    piper = str(PIPER_EXE) if PIPER_EXE.exists() else (shutil.which("piper") or str(PIPER_EXE))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    VOICE_WAVS_DIR.mkdir(parents=True, exist_ok=True)
+    VOICE_LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    made: Dict[str, tuple] = {}          # audio_key → (wav, srt)
+    failures = 0
+    for j in jobs:
+        if j.skip:
+            continue
+        log_path = VOICE_LOGS_DIR / f"{j.base}.plan.log"
+        with log_path.open("a", encoding="utf-8") as log:
+            if j.audio_key not in made:
+                prof = load_profile(PROFILE_MAP[j.voice])
+                wav = VOICE_WAVS_DIR / f"{j.base}.wav"
+                srt = VOICE_BUILD_DIR / f"{j.base}.srt"
+                lines = script_lines(Path(j.script))
+                print(f"[tts] {j.voice} → {wav}", flush=True)
+                t0 = time.perf_counter()
+                rc = _run([piper, "--model", _win_path(prof["MODEL_PATH"]), "--config", _win_path(prof["CONFIG_PATH"]),
+                           "--length_scale", j.length_scale, "--noise_scale", prof["NOISE_SCALE"],
+                           "--noise_w", prof["NOISE_W"], "--output_file", str(wav)],
+                          log, input=" ".join(lines))
+                if rc == 0:
+                    record_actual(j, "tts", time.perf_counter() - t0, scale)
+                else:
+                    print(f"[err] piper failed for {j.base} (rc={rc}); see {log_path}")
+                    failures += 1
+                    made[j.audio_key] = (None, None)
+                    continue
+                t0 = time.perf_counter()
+                src_json = VOICE_BUILD_DIR / f"{j.base}.plan.json"
+                src_json.write_text(json.dumps({"emotion": j.emotion, "language": j.lang, "lines": lines},
+                                               ensure_ascii=False, indent=2), encoding="utf-8")
+                rc = _run([sys.executable, str(JSON_TO_SRT), "--input", str(src_json), "--out", str(srt)], log)
+                if rc == 0:
+                    raw = srt.read_text(encoding="utf-8")
+                    srt.write_text(raw.replace("\r\n", "\n").replace("\\n", "\n"), encoding="utf-8", newline="\n")
+                    record_actual(j, "srt", time.perf_counter() - t0, scale)
+                made[j.audio_key] = (wav, srt) if rc == 0 else (None, None)
+                j.audio_s = wav_seconds(wav) or j.audio_s
+            wav, srt = made[j.audio_key]
+            if wav is None:
+                continue
+            out = out_dir / out_name(j.base, j.size)
+            env = os.environ.copy()
+            env.update({"FONT_SIZE": env.get("FONT_SIZE", "120"), "CAPTION_SHIFT_MS": env.get("CAPTION_SHIFT_MS", "-500"),
+                        "TOP_BANNER": "", "AUTOSYNC": "1", "TEMPO_MATCH": "1", "AUTO_ONSET_ALIGN": "1",
+                        "APPLY_SHIFT_TO_AUDIO": "1", "SYNC_CACHE": "1", "PITCH_SEMITONES": f"{j.pitch:g}",
+                        "EMOTION": j.emotion})
+            print(f"[render] {out.name}", flush=True)
+            t0 = time.perf_counter()
+            rc = _run(render_cmd(j.size, Path(j.bg), wav, srt, out), log, env=env)
+            if rc == 0:
+                record_actual(j, "render", time.perf_counter() - t0, scale)
+            else:
+                print(f"[err] render failed for {out.name} (rc={rc}); see {log_path}")
+                failures += 1
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Plan (and optionally run) the weekly emotion × language × voice × size matrix.")
+    ap.add_argument("--emotions", default=str(TEMPLATES_DIR / "emotions_week1.txt"))
+    ap.add_argument("--languages", default=str(TEMPLATES_DIR / "languages_week1.txt"))
+    ap.add_argument("--voices", default="AMY,BRYCE", help=f"comma list of {', '.join(PROFILE_MAP)}")
+    ap.add_argument("--sizes", default=",".join(SIZES))
+    ap.add_argument("--out-dir", default=str(OUT_DEFAULT))
+    ap.add_argument("--bg-variant", type=int, default=0, help="background variant (python tools/asset_index.py --list); 0 = best")
+    ap.add_argument("--json", default="", help="also write the ordered plan to this file")
+    ap.add_argument("--execute", action="store_true", help="run the plan and report predicted vs actual")
+    a = ap.parse_args()
+
+    emotions = [slug(e) for e in read_list(Path(a.emotions))]
+    langs = [slug(l) for l in read_list(Path(a.languages))]
+    voices = [v.strip().upper() for v in a.voices.split(",") if v.strip()]
+    sizes = [s.strip() for s in a.sizes.split(",") if s.strip()]
+    bad = [s for s in sizes if s not in SIZES]
+    if bad:
+        ap.error(f"unsupported size(s): {', '.join(bad)}")
+
+    scale = load_scale()
+    jobs = expand(emotions, langs, voices, sizes, a.bg_variant)
+    naive_s = predict(jobs, scale, share=False)
+    jobs = order_jobs(jobs)
+    planned_s = predict(jobs, scale)
+    print_plan(jobs, planned_s, naive_s, scale)
+
+    if a.json:
+        Path(a.json).write_text(json.dumps({"summary": summarize(jobs), "predicted_s": round(planned_s, 1),
+                                            "jobs": [asdict(j) for j in jobs]}, indent=2), encoding="utf-8")
+        print(f"[plan] wrote {a.json}")
+
+    if not a.execute:
+        return 0
+    failures = execute(jobs, Path(a.out_dir), scale)
+    print_actuals(jobs)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# Post-render sync QA: checks rendered MP4s instead of caption files (cf. verify_lock.sh).
+#
+# One ffmpeg decode per MP4 yields both
+#   - the audio energy envelope (8 kHz mono → 10 ms RMS windows → speech onsets), and
+#   - a tiny grayscale crop of the caption band (CenterBox is middle-centred) at a fixed 30 fps,
+#     whose frame-to-frame difference marks when caption text appears/changes/disappears.
+# A short cue ("Amen.") changes the band by only ~1.2 mean |Δ|/px at either size, so the change
+# threshold is relative to the clip's own frame-diff noise (median + k·MAD, with a small floor)
+# unless --diff-thr fixes it. A change is a "clear" when the band then matches a frame that no cue
+# covers (the bare background).
+# Expected cue times come from the final ASS the renderer publishes to
+# voice/build/captions/<out-stem>.ass (same timeline as the video).
+#
+# Per cue:
+#   burn_ms   detected on-screen change − ASS start   (should be within a frame)
+#   end_ms    detected clear − ASS end                 (cues followed directly by the next one are
+#             checked by that cue's start instead)
+#   sync_ms   caption start − nearest voice onset      (negative = captions ahead of the voice)
+# Per file: median / mean / p95 |sync| and outliers (|sync − median| > --tol-ms, or no onset/change
+# near the cue). A deliberate lead (UI CAPTION_SHIFT_MS) shows up as the median; use --expect-ms to
+# also flag files whose median drifts from it.
+#
+# Files are checked in worker processes (--jobs): the envelope and frame-difference passes are
+# pure Python, so threads would serialize on the GIL after each decode.
+#
+#   python tools/qa_sync.py                      # every MP4 in out/, in parallel
+#   python tools/qa_sync.py out/x_VERTICAL_BOXED.mp4 --ass voice/build/captions/x_VERTICAL_BOXED.ass
+#   python tools/qa_sync.py --expect-ms -500 --json qa.json --strict
+
+import argparse
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+import captions as capmod
+
+APP_ROOT = Path(__file__).resolve().parent.parent
+OUT_DEFAULT = APP_ROOT / "out"
+CAPTIONS_DIR = APP_ROOT / "voice" / "build" / "captions"
+
+AUDIO_RATE = 8000
+WIN_MS = 10
+QA_FPS = 30
+CROP_W, CROP_H = 64, 32
+# Caption band: CenterBox (Alignment 5) sits in the middle; margins keep it off the edges.
+CROP_FILTER = f"crop=iw*0.84:ih*0.40:iw*0.08:ih*0.30,scale={CROP_W}:{CROP_H}:flags=area,format=gray"
+DIFF_FLOOR = 0.4            # mean |Δ|/px; x264 noise on a still plate stays well below, "Amen." is ~1.2
+DIFF_K = 6.0                # threshold = median + DIFF_K · 1.4826 · MAD of the clip's frame diffs
+
+
+@dataclass
+class CueResult:
+    index: int
+    start_ms: int
+    text: str
+    end_ms: int = 0
+    burn_ms: Optional[int] = None
+    end_burn_ms: Optional[int] = None      # None when the next cue starts right away (nothing clears)
+    sync_ms: Optional[int] = None
+    outlier: str = ""
+
+@dataclass
+class FileResult:
+    mp4: str
+    ass: Optional[str] = None
+    error: str = ""
+    cues: List[CueResult] = field(default_factory=list)
+    median_ms: Optional[float] = None
+    mean_ms: Optional[float] = None
+    p95_abs_ms: Optional[float] = None
+    max_burn_ms: Optional[int] = None
+    max_end_burn_ms: Optional[int] = None
+    diff_thr: Optional[float] = None
+    outliers: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return not self.error and self.outliers == 0
+
+
+# -------- decode --------
+def decode(mp4: Path):
+    """One ffmpeg run: caption-band frames on stdout, audio PCM to a temp file."""
+    with tempfile.TemporaryDirectory(prefix="qa_sync.") as td:
+        pcm_path = Path(td) / "a.s16"
+        cmd = [
+            "ffmpeg", "-v", "error", "-nostdin", "-i", str(mp4),
+            "-filter_complex", f"[0:v]fps={QA_FPS},{CROP_FILTER}[v];[0:a]aresample={AUDIO_RATE},aformat=channel_layouts=mono:sample_fmts=s16[a]",
+            "-map", "[v]", "-f", "rawvideo", "pipe:1",
+            "-map", "[a]", "-f", "s16le", str(pcm_path),
+        ]
+        p = subprocess.run(cmd, capture_output=True)
+        if p.returncode != 0:
+            raise RuntimeError((p.stderr or b"").decode("utf-8", "replace").strip()[-400:] or f"ffmpeg rc={p.returncode}")
+        pcm = array("h")
+        pcm.frombytes(pcm_path.read_bytes())
+        if sys.byteorder == "big":
+            pcm.byteswap()
+    return p.stdout, pcm
+
+
+# -------- audio --------
+def envelope_db(pcm: array) -> List[float]:
+    n = AUDIO_RATE * WIN_MS // 1000
+    out = []
+    for i in range(0, len(pcm) - n + 1, n):
+        w = pcm[i:i + n]
+        rms = math.sqrt(sum(s * s for s in w) / n) / 32768.0
+        out.append(20.0 * math.log10(rms) if rms > 0 else -120.0)
+    return out
+
+def speech_onsets_ms(env: List[float], thr_db: float, min_gap_ms: int) -> List[int]:
+    """Window starts where the level rises above thr_db after at least min_gap_ms below it."""
+    need = max(1, min_gap_ms // WIN_MS)
+    onsets, quiet = [], need
+    for i, db in enumerate(env):
+        if db >= thr_db:
+            if quiet >= need:
+                onsets.append(i * WIN_MS)
+            quiet = 0
+        else:
+            quiet += 1
+    return onsets
+
+
+# -------- video --------
+def _frame(frames: bytes, i: int) -> bytes:
+    size = CROP_W * CROP_H
+    return frames[i * size:(i + 1) * size]
+
+def _mean_abs_diff(a: bytes, b: bytes) -> float:
+    return sum(abs(x - y) for x, y in zip(a, b)) / float(CROP_W * CROP_H)
+
+def frame_diffs(frames: bytes) -> List[float]:
+    """Mean |Δ| per pixel of each frame against the previous one (frame 0 → 0.0)."""
+    n = len(frames) // (CROP_W * CROP_H)
+    return [0.0] + [_mean_abs_diff(_frame(frames, i), _frame(frames, i - 1)) for i in range(1, n)]
+
+def noise_threshold(diffs: List[float]) -> float:
+    """median + k·MAD of the frame diffs: most frames show no caption change, so this is the noise."""
+    if not diffs:
+        return DIFF_FLOOR
+    med = statistics.median(diffs)
+    mad = statistics.median(abs(d - med) for d in diffs)
+    return max(DIFF_FLOOR, med + DIFF_K * 1.4826 * mad)
+
+def caption_changes(diffs: List[float], thr: float) -> List[int]:
+    """Frame indices where the band changes (diff > thr); one text change can span 2 frames of x264 noise."""
+    changes, last = [], -10
+    for i, d in enumerate(diffs):
+        if i and d > thr:
+            if i - last > 2:
+                changes.append(i)
+            last = i
+    return changes
+
+def frame_ms(i: int) -> int:
+    return int(round(i * 1000.0 / QA_FPS))
+
+def blank_frame(n: int, cues) -> Optional[int]:
+    """A frame no cue covers (±100 ms), i.e. the bare background; None if the captions never clear."""
+    for i in range(n):
+        t = i * 1000.0 / QA_FPS
+        if all(t < c.start_ms - 100 or t > c.end_ms + 100 for c in cues):
+            return i
+    return None
+
+def caption_clears(frames: bytes, changes: List[int], blank: Optional[int], thr: float) -> List[int]:
+    """The changes after which the band matches the bare background (caption went off)."""
+    if blank is None:
+        return list(changes)
+    n = len(frames) // (CROP_W * CROP_H)
+    ref = _frame(frames, blank)
+    return [i for i in changes if _mean_abs_diff(_frame(frames, min(i + 2, n - 1)), ref) <= thr]
+
+def nearest(values: List[int], t: int, window: int) -> Optional[int]:
+    best = min(values, key=lambda v: abs(v - t), default=None)
+    return best if best is not None and abs(best - t) <= window else None
+
+
+# -------- per file --------
+def captions_for(mp4: Path) -> Optional[Path]:
+    p = CAPTIONS_DIR / f"{mp4.stem}.ass"
+    return p if p.exists() else None
+
+def check(mp4: Path, ass: Optional[Path], a: argparse.Namespace) -> FileResult:
+    res = FileResult(str(mp4), str(ass) if ass else None)
+    if ass is None:
+        res.error = f"no captions (expected {CAPTIONS_DIR / (mp4.stem + '.ass')})"
+        return res
+    try:
+        caps = capmod.read_captions(ass)
+        frames, pcm = decode(mp4)
+    except Exception as e:
+        res.error = str(e)
+        return res
+
+    onsets = speech_onsets_ms(envelope_db(pcm), a.thr_db, a.min_gap_ms)
+    diffs = frame_diffs(frames)
+    res.diff_thr = thr = a.diff_thr if a.diff_thr is not None else round(noise_threshold(diffs), 3)
+    cues = sorted(caps.cues, key=lambda c: c.start_ms)
+    idx = caption_changes(diffs, thr)
+    changes = [frame_ms(i) for i in idx]
+    clears = [frame_ms(i) for i in caption_clears(frames, idx, blank_frame(len(diffs), cues), thr)]
+    back_to_back = 2 * 1000 // QA_FPS + 1          # the next cue replaces this one: nothing clears
+    for i, c in enumerate(cues, start=1):
+        r = CueResult(i, c.start_ms, " ".join(caps.plain_lines(c))[:60], end_ms=c.end_ms)
+        seen = nearest(changes, c.start_ms, a.window_ms)
+        r.burn_ms = None if seen is None else seen - c.start_ms
+        followed = i < len(cues) and cues[i].start_ms - c.end_ms < back_to_back
+        if not followed:
+            gone = nearest(clears, c.end_ms, a.window_ms)
+            r.end_burn_ms = None if gone is None else gone - c.end_ms
+        shown = seen if seen is not None else c.start_ms
+        onset = nearest(onsets, shown, a.window_ms)
+        r.sync_ms = None if onset is None else shown - onset
+        res.cues.append(r)
+
+    syncs = [r.sync_ms for r in res.cues if r.sync_ms is not None]
+    burns = [abs(r.burn_ms) for r in res.cues if r.burn_ms is not None]
+    if syncs:
+        res.median_ms = statistics.median(syncs)
+        res.mean_ms = round(statistics.fmean(syncs), 1)
+        abs_sorted = sorted(abs(s) for s in syncs)
+        res.p95_abs_ms = abs_sorted[min(len(abs_sorted) - 1, int(math.ceil(0.95 * len(abs_sorted))) - 1)]
+    res.max_burn_ms = max(burns, default=None)
+    res.max_end_burn_ms = max((abs(r.end_burn_ms) for r in res.cues if r.end_burn_ms is not None), default=None)
+    for i, r in enumerate(res.cues):
+        ends_alone = i + 1 == len(res.cues) or res.cues[i + 1].start_ms - r.end_ms >= back_to_back
+        if r.burn_ms is None:
+            r.outlier = "no on-screen change near cue start"
+        elif abs(r.burn_ms) > a.burn_tol_ms:
+            r.outlier = f"burned {r.burn_ms:+d}ms off the ASS time"
+        elif ends_alone and r.end_burn_ms is None:
+            r.outlier = "no caption clear near cue end"
+        elif ends_alone and abs(r.end_burn_ms) > a.burn_tol_ms:
+            r.outlier = f"cleared {r.end_burn_ms:+d}ms off the ASS end"
+        elif r.sync_ms is None:
+            r.outlier = "no voice onset near cue start"
+        elif abs(r.sync_ms - res.median_ms) > a.tol_ms:
+            r.outlier = f"sync {r.sync_ms:+d}ms vs median {res.median_ms:+.0f}ms"
+    res.outliers = sum(1 for r in res.cues if r.outlier)
+    if a.expect_ms is not None and res.median_ms is not None and abs(res.median_ms - a.expect_ms) > a.tol_ms:
+        res.error = f"median sync {res.median_ms:+.0f}ms, expected {a.expect_ms:+d}ms"
+    return res
+
+
+def print_result(res: FileResult, verbose: bool):
+    name = Path(res.mp4).name
+    if res.error and not res.cues:
+        print(f"[qa] SKIP {name}: {res.error}")
+        return
+    status = "OK  " if res.ok else "FAIL"
+    med = "-" if res.median_ms is None else f"{res.median_ms:+.0f}"
+    p95 = "-" if res.p95_abs_ms is None else f"{res.p95_abs_ms:.0f}"
+    burn = "-" if res.max_burn_ms is None else f"{res.max_burn_ms}"
+    end = "-" if res.max_end_burn_ms is None else f"{res.max_end_burn_ms}"
+    print(f"[qa] {status} {name}: cues={len(res.cues)} sync median={med}ms p95|sync|={p95}ms "
+          f"max|burn|={burn}ms max|end|={end}ms outliers={res.outliers} (diff thr {res.diff_thr})"
+          + (f"  ({res.error})" if res.error else ""))
+    for r in res.cues:
+        if r.outlier or verbose:
+            sync = "-" if r.sync_ms is None else f"{r.sync_ms:+d}"
+            burn = "-" if r.burn_ms is None else f"{r.burn_ms:+d}"
+            end = "-" if r.end_burn_ms is None else f"{r.end_burn_ms:+d}"
+            print(f"       #{r.index:<3d} {capmod.srt_ts(r.start_ms)} sync={sync:>6s} burn={burn:>5s} end={end:>5s}  "
+                  f"{r.outlier or ''}  {r.text}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Measure caption/voice sync in rendered MP4s (one decode per file).")
+    ap.add_argument("paths", nargs="*", help=f"MP4 files or directories (default: {OUT_DEFAULT})")
+    ap.add_argument("--ass", default="", help="captions for a single MP4 (default: voice/build/captions/<stem>.ass)")
+    ap.add_argument("--jobs", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    ap.add_argument("--tol-ms", type=int, default=200, help="outlier distance from the file's median sync")
+    ap.add_argument("--burn-tol-ms", type=int, default=80, help="max on-screen vs ASS start/end difference")
+    ap.add_argument("--window-ms", type=int, default=1200, help="search window for onsets/changes around a cue")
+    ap.add_argument("--expect-ms", type=int, default=None, help="expected median sync (e.g. the UI caption lead)")
+    ap.add_argument("--thr-db", type=float, default=-35.0, help="speech threshold (renderer ONSET_NOISE_DB)")
+    ap.add_argument("--min-gap-ms", type=int, default=120, help="silence needed before a new onset")
+    ap.add_argument("--diff-thr", type=float, default=None,
+                    help=f"mean |Δ| per pixel that counts as a caption change (default: per clip, median + "
+                         f"{DIFF_K:g}·MAD of its frame diffs, at least {DIFF_FLOOR})")
+    ap.add_argument("--json", default="", help="write the full report here")
+    ap.add_argument("--strict", action="store_true", help="exit 1 if any file fails")
+    ap.add_argument("-v", "--verbose", action="store_true", help="list every cue, not only outliers")
+    a = ap.parse_args()
+
+    mp4s: List[Path] = []
+    for p in [Path(x) for x in a.paths] or [OUT_DEFAULT]:
+        if p.is_dir():
+            mp4s += sorted(q for q in p.glob("*.mp4") if not q.name.startswith("."))
+        elif p.exists():
+            mp4s.append(p)
+    if not mp4s:
+        print("[qa] no MP4 files found")
+        return 0
+    if a.ass and len(mp4s) != 1:
+        ap.error("--ass needs exactly one MP4")
+
+    asses = [Path(a.ass) if a.ass else captions_for(mp4) for mp4 in mp4s]
+    if a.jobs <= 1 or len(mp4s) == 1:
+        results = [check(mp4, ass, a) for mp4, ass in zip(mp4s, asses)]
+    else:
+        # decode + analysis per process: the Python loops over samples/frames hold the GIL
+        with ProcessPoolExecutor(max_workers=min(a.jobs, len(mp4s))) as ex:
+            results = list(ex.map(check, mp4s, asses, repeat(a)))
+    for res in results:
+        print_result(res, a.verbose)
+
+    checked = [r for r in results if r.cues]
+    failed = [r for r in checked if not r.ok]
+    print(f"[qa] {len(checked)} checked, {len(failed)} failed, {len(results) - len(checked)} skipped")
+    if a.json:
+        Path(a.json).write_text(json.dumps([asdict(r) for r in results], indent=2), encoding="utf-8")
+        print(f"[qa] wrote {a.json}")
+    return 1 if a.strict and failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1167 @@
+#!/usr/bin/env python3
+# Unified renderer for SWP videos (H & V) with enforced CenterBox style — Python orchestrator.
+# SRT path: autosync (pass1) → optional tempo-match voice → autosync (pass2) → ASS → normalize → repair → CenterBox-enforce → optional gate → burn.
+# ASS path: normalize → repair → CenterBox-enforce → optional gate → burn.
+#
+# Same CLI and env toggles as tools/render_swp_unified.sh (now a shim that execs this file):
+#
+#   python tools/render_unified.py [--size=WxH] BG WAV CAPTIONS(.srt|.ass) OUT.mp4
+#
+# Caption work (autosync scaling, SRT→ASS, normalize/repair/CenterBox, shifts, gates), hashing,
+# cache bookkeeping, WAV facts (wave module) and the hooks (tools/hooks_runtime.py, in-process)
+# all run here. The only child processes are the ffmpeg runs that touch media: silence detection
+# per autosync pass, the tempo stretch, the onset/loudness analysis, the audio and video encodes
+# and the final mux — each skipped on a cache hit. Non-WAV facts come from tools/media_probe.py (cached).
+#
+# Core anti “captions-ahead” strategy:
+# 1) Keep captions aligned to audio analytically (autosync + onset).
+# 2) Apply the *final micro-correction to AUDIO* (trim/delay) instead of shifting captions,
+#    so player AAC priming/edit-lists cannot reintroduce a visible offset.
+#
+# Env toggles (sane defaults):
+#   AUTOSYNC=1             Enable SRT↔WAV autosync passes
+#   TEMPO_MATCH=1          Time-stretches voice to SRT duration before pass-2 autosync
+#   AUTO_ONSET_ALIGN=1     Measure first audio onset and correct residual offset
+#   APPLY_SHIFT_TO_AUDIO=1 Apply the residual correction to audio (preferred). Set 0 to shift captions instead.
+#   CAPTION_SHIFT_MS       Manual caption shift (opt-in); LEAD_MS=0 autosync lead
+#   TOP_BANNER / BANNER_SECONDS=1.50 / TITLE_GAP=0.20 / TOP_FONT_SIZE   Open-title card + first-caption gate
+#   FONT_NAME=Arial FONT_SIZE=96 MARGIN_L/R=140 MARGIN_V=0 BOX_OPA=96   CenterBox style
+#   BG_FIT=cover           cover | contain | none
+#   BG_PROXY=1             Video backgrounds (.mp4/.mov/.mkv/.webm/...) are transcoded once to an all-intra proxy at
+#                          the output size/fps ($CACHE_ROOT/proxy, keyed by source hash + geometry) and looped
+#                          from that; 0 decodes and scales the source on every render.  PROXY_CRF=16
+#   ONSET_NOISE_DB=35 ONSET_MIN_DUR=0.18 MAX_ONSET_SHIFT_MS=2500 AAC_PRIMING_MS=0
+#   EXTRA_ASS_FILTER / FFMPEG_EXTRA_OUT_FLAGS   Appended to the -vf chain / the video encode
+#   FFMPEG_PROGRESS=0      The video-layer encode emits machine-readable key=value progress on stdout
+#                          ("[progress] cached=video" instead on a cache hit; the stream-copy mux is quiet)
+#   SYNC_CACHE=1           Reuse the synced ASS/voice/onset from an earlier run with the same WAV+captions+sync knobs
+#   CACHE_ROOT=voice/build/.cache   Where the sync/loudnorm/audio/video caches live (may be shared)
+#   RENDER_CACHE=1         Keep the encoded audio track and the caption video layer ($CACHE_ROOT/audio,
+#                          /video) and mux them with -c copy. RENDER_CACHE_DAYS=14 prunes old entries.
+#   PITCH_SEMITONES=0      Pitch shift at constant tempo, inside the audio encode's -af
+#   TARGET_LUFS / TRUE_PEAK_DB / LOUDNORM_LRA=11   Two-pass loudnorm (JOB_JSON fills unset targets)
+#   EMOTION / MUSIC        Music bed: MUSIC=<file> (or none); else voice/manifest.json map.<emotion>.music, else
+#                          assets/music/<EMOTION>.*. Mixed inside the audio encode: loudness-matched, ducked under
+#                          the voice (sidechaincompress), looped to length. Decoded bed + loudness cached per track.
+#   MUSIC_LUFS             Bed level; default (TARGET_LUFS or -16) minus music_under_lu (manifest, default 15)
+#   MUSIC_DUCK=8 MUSIC_DUCK_THRESHOLD=0.03 MUSIC_ATTACK_MS=20 MUSIC_RELEASE_MS=400   Ducking (ratio from manifest)
+#   KEEP_WORKDIR=fail      Work dir retention: fail | always | never;  WORK_RETAIN_HOURS=48
+#   PREVIEW=1 PREVIEW_FPS=15 PREVIEW_START/DUR PREVIEW_SHEET=1   Fast iteration (never for delivery)
+#
+# Cache keys are built the way the bash renderer built them (`sha1sum`-style lines, printf '%s\n'
+# blobs, <key>.* under CACHE_ROOT/<kind>/), but most now cover more inputs (WAV content, caption
+# hooks, music bed, video proxies), so entries written by the bash renderer are not expected to hit.
+
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import captions as capmod
+import hooks_runtime
+import media_probe
+
+TOOLS_DIR = Path(__file__).resolve().parent
+ROOT = TOOLS_DIR.parent
+BUILD = ROOT / "voice" / "build"
+JOBS_DIR = BUILD / "jobs"
+VIDEO_EXTS = {".mp4", ".mov", ".m4v", ".mkv", ".webm", ".avi"}
+VOICE_MANIFEST = ROOT / "voice" / "manifest.json"
+MUSIC_DIR = ROOT / "assets" / "music"
+MUSIC_EXTS = (".mp3", ".m4a", ".aac", ".ogg", ".opus", ".flac", ".wav")
+MUSIC_TRIM_DB = "-50"            # leading/trailing silence below this is cut from the bed so loops butt cleanly
+HOOKS_YAML = TOOLS_DIR / "hooks.yaml"
+LEGACY_HOOKS_SH = TOOLS_DIR / "hooks" / "lib" / "hooks.sh"
+
+FFMPEG_ASS_HEADER = [
+    "[Script Info]",
+    "; Script generated by render_unified.py (same shape as ffmpeg -c:s ass)",
+    "ScriptType: v4.00+",
+    "PlayResX: 384",
+    "PlayResY: 288",
+    "ScaledBorderAndShadow: yes",
+    "",
+    "[V4+ Styles]",
+    "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, "
+    "Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, "
+    "MarginV, Encoding",
+    "Style: Default,Arial,16,&Hffffff,&Hffffff,&H0,&H0,0,0,0,0,100,100,0,0,1,1,0,2,10,10,10,0",
+    "",
+    "[Events]",
+    capmod.ASS_EVENT_FORMAT,
+]
+
+
+class RenderError(Exception):
+    def __init__(self, rc: int, msg: str = ""):
+        super().__init__(msg or f"exit {rc}")
+        self.rc = rc
+
+
+def log_i(msg: str):
+    print(f"[i] {msg}", flush=True)
+
+def log_w(msg: str):
+    print(f"[warn] {msg}", flush=True)
+
+def log_e(msg: str):
+    print(f"[err] {msg}", file=sys.stderr, flush=True)
+
+def native(p: str) -> Path:
+    """/c/... (Git Bash) → C:\\... on Windows; unchanged elsewhere."""
+    if os.name == "nt" and p.startswith("/") and len(p) > 2 and p[2] == "/":
+        return Path(f"{p[1].upper()}:\\" + p[3:].replace("/", "\\"))
+    return Path(p)
+
+def env_str(name: str, default: str = "") -> str:
+    v = os.environ.get(name)
+    return default if v is None or v == "" else v
+
+def fmt0(x: float) -> str:
+    """printf '%.0f' (round half to even, like awk)."""
+    return f"{x:.0f}"
+
+
+# -------- processes --------
+def run(cmd: List[str], quiet: bool = False, log: Optional[Path] = None) -> int:
+    """Spawn one ffmpeg. quiet → discard output; log → capture stdout+stderr there."""
+    sys.stdout.flush()
+    if log is not None:
+        with log.open("wb") as f:
+            return subprocess.run(cmd, stdout=f, stderr=subprocess.STDOUT).returncode
+    if quiet:
+        return subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode
+    return subprocess.run(cmd).returncode
+
+def must(cmd: List[str], **kw):
+    rc = run(cmd, **kw)
+    if rc != 0:
+        raise RenderError(rc, f"{Path(cmd[0]).name} failed (rc={rc})")
+
+
+# -------- media facts (no process for WAV / MP4) --------
+def wav_params(path: Path) -> Optional[Tuple[int, float]]:
+    """(sample_rate, duration_s) from the WAV header, or None if not a PCM WAV."""
+    try:
+        with wave.open(str(path), "rb") as w:
+            return w.getframerate(), w.getnframes() / float(w.getframerate())
+    except (wave.Error, EOFError, OSError):
+        return None
+
+def audio_duration(path: Path) -> Optional[float]:
+    wp = wav_params(path)
+    if wp:
+        return wp[1]
+    return media_probe.probe(path).duration
+
+def audio_rate(path: Path) -> Optional[int]:
+    wp = wav_params(path)
+    if wp:
+        return wp[0]
+    return media_probe.probe(path).sample_rate
+
+def mp4_duration(path: Path) -> Optional[float]:
+    """moov/mvhd duration ÷ timescale (what ffprobe reports as format=duration for our MP4/M4A)."""
+    try:
+        with path.open("rb") as f:
+            def boxes(end):
+                while f.tell() + 8 <= end:
+                    start = f.tell()
+                    size, kind = struct.unpack(">I4s", f.read(8))
+                    if size == 1:
+                        size = struct.unpack(">Q", f.read(8))[0]
+                    elif size == 0:
+                        size = end - start
+                    if size < 8:
+                        return
+                    yield kind, start, start + size
+                    f.seek(start + size)
+            end = path.stat().st_size
+            for kind, start, stop in boxes(end):
+                if kind != b"moov":
+                    continue
+                f.seek(start + 8)
+                for k2, s2, _e2 in boxes(stop):
+                    if k2 != b"mvhd":
+                        continue
+                    f.seek(s2 + 8)
+                    version = f.read(4)[0]
+                    if version == 1:
+                        _c, _m, scale, dur = struct.unpack(">QQIQ", f.read(28))
+                    else:
+                        _c, _m, scale, dur = struct.unpack(">IIII", f.read(16))
+                    return dur / float(scale) if scale else None
+    except (OSError, struct.error, IndexError):
+        return None
+    return None
+
+
+# -------- hashing / caches --------
+_sha1_memo: Dict[tuple, bytes] = {}
+
+def sha1sum_line(path: Path) -> bytes:
+    """Exactly what `sha1sum < FILE` prints (part of the cache keys shared with the bash renderer).
+    Memoized per (path, size, mtime_ns): the voice WAV feeds the sync, loudnorm and audio keys."""
+    st = os.stat(path)
+    memo = (os.path.abspath(str(path)), st.st_size, st.st_mtime_ns)
+    if memo not in _sha1_memo:
+        h = hashlib.sha1()
+        with Path(path).open("rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        _sha1_memo[memo] = f"{h.hexdigest()}  -\n".encode()
+    return _sha1_memo[memo]
+
+def key16(*parts: bytes) -> str:
+    return hashlib.sha1(b"".join(parts)).hexdigest()[:16]
+
+def lines_blob(*values) -> bytes:
+    """printf '%s\\n' v1 v2 ..."""
+    return "".join(f"{v}\n" for v in values).encode("utf-8")
+
+def publish_atomic(src: Path, dest: Path):
+    """Replace DEST with SRC via a same-directory temp file + rename (readers never see a half file)."""
+    tmp = dest.parent / f".{dest.name}.{os.getpid()}.tmp"
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
+
+def read_env_file(path: Path) -> Dict[str, str]:
+    out = {}
+    for ln in path.read_text(encoding="utf-8", errors="replace").splitlines():
+        k, sep, v = ln.strip().partition("=")
+        if sep and k:
+            out[k] = v.strip().strip('"').strip("'")
+    return out
+
+def prune(dirs: List[Path], days: int):
+    """find DIR -maxdepth 1 -type f -mtime +DAYS -delete"""
+    now = time.time()
+    for d in dirs:
+        for p in d.iterdir():
+            try:
+                if p.is_file() and (now - p.stat().st_mtime) // 86400 > days:
+                    p.unlink()
+            except OSError:
+                pass
+
+
+# -------- ASS / SRT text --------
+def ass_ms(t: str) -> int:
+    """hms_to_ms: H:MM:SS.cs → ms, -1 if malformed."""
+    m = capmod.ASS_TS_RE.match(t)
+    if not m:
+        return -1
+    h, mi, s, cs = (int(x) for x in m.groups())
+    return h * 3600000 + mi * 60000 + s * 1000 + cs * 10
+
+def read_lf(path: Path) -> List[str]:
+    """Lines without their \\n and a trailing \\r (to_lf_file)."""
+    lines = path.read_text(encoding="utf-8", errors="surrogateescape").split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+    return [ln[:-1] if ln.endswith("\r") else ln for ln in lines]
+
+def write_lines(path: Path, lines: List[str]):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8", errors="surrogateescape", newline="\n")
+
+def normalize_ass(lines: List[str], s: "Settings") -> List[str]:
+    """PlayRes = render size, CenterBox style (inserted or replaced), every Dialogue on CenterBox."""
+    if not any(ln.startswith("PlayResX:") for ln in lines):
+        out, added = [], False
+        for ln in lines:
+            out.append(ln)
+            if not added and ln == "[Script Info]":
+                out += [f"PlayResX: {s.prx}", f"PlayResY: {s.pry}"]
+                added = True
+        lines = out
+    lines = [re.sub(r"^PlayResX: .*", f"PlayResX: {s.prx}", re.sub(r"^PlayResY: .*", f"PlayResY: {s.pry}", ln))
+             for ln in lines]
+    style = (f"Style: CenterBox,{s.font_name},{s.font_size},&H00FFFFFF,&H000000FF,&H00000000,&H{s.box_opa}000000,"
+             f"0,0,0,0,100,100,0,0,3,0,0,5,{s.margin_l},{s.margin_r},{s.margin_v},1")
+    if any(ln.startswith("Style: CenterBox,") for ln in lines):
+        lines = [style if ln.startswith("Style: CenterBox,") else ln for ln in lines]
+    else:
+        out, i = [], 0
+        while i < len(lines):
+            out.append(lines[i])
+            if re.match(r"^\[V4\+ Styles\]", lines[i]):
+                if i + 1 < len(lines):
+                    out.append(lines[i + 1])
+                i += 1
+                out.append(style)
+            i += 1
+        lines = out
+    out = []
+    for ln in lines:
+        if ln.startswith("Dialogue:"):
+            f = ln.split(",")
+            f += [""] * max(0, 4 - len(f))
+            f[3] = "CenterBox"
+            ln = ",".join(f)
+        out.append(ln)
+    return out
+
+def _awk_num(s: str) -> float:
+    m = re.match(r"\s*[-+]?(\d+\.?\d*|\.\d+)", s)
+    return float(m.group(0)) if m else 0.0
+
+def repair_bad_ts(lines: List[str]) -> List[str]:
+    """ass_repair_bad_timestamps.sh: End > Start on every Dialogue (+0.30 s), drop near-empty events."""
+    def to_sec(t):
+        a = t.split(":")
+        h = _awk_num(a[0]) if a else 0.0
+        m = _awk_num(a[1]) if len(a) > 1 else 0.0
+        sec = a[2].split(".") if len(a) > 2 else [""]
+        x = _awk_num(sec[0]) + (_awk_num("0." + sec[1]) if len(sec) > 1 else 0.0)
+        return h * 3600 + m * 60 + x
+
+    def to_ass(x):
+        x = max(0.0, x)
+        h = int(x / 3600); x -= h * 3600
+        m = int(x / 60); x -= m * 60
+        s = int(x)
+        cs = int((x - s) * 100 + 0.5)
+        if cs == 100:
+            s += 1; cs = 0
+        return f"{h}:{m:02d}:{s:02d}.{cs:02d}"
+
+    out = []
+    for ln in lines:
+        if not ln.startswith("Dialogue:"):
+            out.append(ln)
+            continue
+        f = ln.split(",")
+        f += [""] * max(0, 3 - len(f))
+        st, en = to_sec(f[1]), to_sec(f[2])
+        if en <= st:
+            en = st + 0.30
+        f[1], f[2] = to_ass(st), to_ass(en)
+        ln = ",".join(f)
+        if len(ln) >= 15:
+            out.append(ln)
+    return out
+
+def force_centerbox(lines: List[str]) -> List[str]:
+    """ass_force_centerbox.sh: strip {\\anN}/{\\pos()}/{\\move()} and leading/trailing \\N in Dialogue text."""
+    out = []
+    for ln in lines:
+        ln = re.sub(r"\{\\an[0-9]+\}", "", ln)
+        ln = re.sub(r"\{\\pos\([^}]*\)\}", "", ln)
+        ln = re.sub(r"\{\\move\([^}]*\)\}", "", ln)
+        if ln.startswith("Dialogue:"):
+            f = ln.split(",")
+            f += [""] * max(0, 10 - len(f))
+            text = ",".join(f[9:])
+            text = re.sub(r"^\s*\\N+", "", text)
+            while re.search(r"(\\N\s*)+$", text):
+                text = re.sub(r"(\\N\s*)+$", "", text)
+            ln = ",".join(f[:9] + [text])
+        out.append(ln)
+    return out
+
+def shift_ass_times(lines: List[str], shift_ms: int) -> List[str]:
+    out = []
+    for ln in lines:
+        if ln.startswith("Dialogue:"):
+            f = ln.split(",")
+            if len(f) >= 3:
+                s, e = ass_ms(f[1]), ass_ms(f[2])
+                if s >= 0 and e >= 0:
+                    f[1], f[2] = capmod.ass_ts(s + shift_ms), capmod.ass_ts(e + shift_ms)
+                    ln = ",".join(f)
+        out.append(ln)
+    return out
+
+def dialogue_times(lines: List[str]) -> List[Tuple[int, int]]:
+    out = []
+    for ln in lines:
+        if ln.startswith("Dialogue:"):
+            f = ln.split(",")
+            out.append((ass_ms(f[1]) if len(f) > 1 else -1, ass_ms(f[2]) if len(f) > 2 else -1))
+    return out
+
+def min_start_ms(lines: List[str]) -> int:
+    return min((s for s, _e in dialogue_times(lines) if s >= 0), default=999999999)
+
+def count_dialogue(lines: List[str]) -> int:
+    return sum(1 for ln in lines if ln.startswith("Dialogue:"))
+
+def srt_to_ass(srt: Path) -> List[str]:
+    """What `ffmpeg -i x.srt -c:s ass` produced: Default style, centisecond times, SRT markup → ASS tags."""
+    caps = capmod.read_captions(srt)
+    events = []
+    for c in caps.cues:
+        t = c.text.strip("\n")
+        t = re.sub(r"<(/?)([ibus])>", lambda m: "{\\%s%d}" % (m.group(2).lower(), 0 if m.group(1) else 1), t, flags=re.I)
+        t = re.sub(r'<font\s+color="?#([0-9a-fA-F]{2})([0-9a-fA-F]{2})([0-9a-fA-F]{2})"?>',
+                   lambda m: "{\\c&H%s%s%s&}" % (m.group(3), m.group(2), m.group(1)), t, flags=re.I)
+        t = re.sub(r"</font>", lambda m: "{\\c}", t, flags=re.I)
+        t = re.sub(r"</?[a-zA-Z][^>]*>", "", t).replace("\n", "\\N")
+        cs = lambda ms: capmod.ass_ts(((ms + 5) // 10) * 10)
+        events.append(f"Dialogue: 0,{cs(c.start_ms)},{cs(c.end_ms)},Default,,0,0,0,,{t}")
+    return list(FFMPEG_ASS_HEADER) + events
+
+
+# -------- autosync / tempo (ports of srt_autosync.sh, auto_voice_tempo.sh) --------
+def _srt_ms(ts: str) -> int:
+    a = re.split(r"[:,]", ts)
+    return ((int(_awk_num(a[0])) * 60 + int(_awk_num(a[1]))) * 60 + int(_awk_num(a[2]))) * 1000 + int(_awk_num(a[3]))
+
+def _srt_from_ms(t: int) -> str:
+    t = max(0, t)
+    return f"{t // 3600000:02d}:{(t // 60000) % 60:02d}:{(t // 1000) % 60:02d},{t % 1000:03d}"
+
+def leading_silence_end(wav: Path) -> float:
+    """First silence_end of a silence that starts at 0 (audio start, s); 0 if none."""
+    p = subprocess.run(["ffmpeg", "-hide_banner", "-nostats", "-i", str(wav), "-af", "silencedetect=noise=-35dB:d=0.1",
+                        "-f", "null", "-"], capture_output=True, text=True, errors="replace")
+    start0 = False
+    for ln in (p.stderr or "").splitlines():
+        if re.search(r"silence_start: 0(\.0+)?(\s|$)", ln):
+            start0 = True
+        m = re.search(r"silence_end: ([0-9.]+)", ln)
+        if m and start0:
+            return float(m.group(1))
+    return 0.0
+
+def srt_autosync(srt_in: Path, wav: Path, srt_out: Path, lead_ms: str, log: Path):
+    """Stretch the SRT to the WAV length and move the first cue to the audio start + lead."""
+    lines = srt_in.read_text(encoding="utf-8", errors="surrogateescape").split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+    arrows = [ln.split() for ln in lines if "-->" in ln]
+    d_wav = audio_duration(wav) or 0.0
+    d_srt = _srt_ms(arrows[-1][2]) / 1000.0 if arrows and len(arrows[-1]) > 2 else 0.0
+    if not d_srt > 0:
+        raise RenderError(1, "SRT appears empty or has no timing lines.")
+    first = _srt_ms(arrows[0][0]) / 1000.0
+    audio_start = leading_silence_end(wav)
+    scale = float(f"{d_wav / d_srt:.8f}")
+    first_scaled = float(f"{first * scale:.3f}")
+    shift = int(fmt0((audio_start + float(lead_ms) / 1000.0 - first_scaled) * 1000.0))
+
+    out, n = [], 0
+    for ln in lines:
+        if not ln.strip():
+            out.append(ln)
+        elif re.fullmatch(r"[0-9]+", ln):
+            continue
+        elif "-->" in ln:
+            f = ln.split()
+            s = int(_srt_ms(f[0]) * scale) + shift
+            e = int(_srt_ms(f[2]) * scale) + shift
+            n += 1
+            out += [str(n), f"{_srt_from_ms(s)} --> {_srt_from_ms(e)}"]
+        else:
+            out.append(ln)
+    srt_out.write_text("\n".join(out) + "\n", encoding="utf-8", errors="surrogateescape", newline="\n")
+    report = (f"[autosync] WAV:  {d_wav:.6f} s\n[autosync] SRT:  {d_srt:g} s\n[autosync] FstAudioStart: {audio_start:g} s\n"
+              f"[autosync] Scale: {scale:.8f}  Shift(ms): {shift}\n[autosync] Wrote: {srt_out}\n")
+    print(report, end="", flush=True)
+    log.write_text(report, encoding="utf-8")
+
+def atempo_chain(tempo: float) -> str:
+    chain = []
+    while tempo > 2.0:
+        chain.append("atempo=2.0"); tempo = float(f"{tempo / 2.0:.8f}")
+    while tempo < 0.5:
+        chain.append("atempo=0.5"); tempo = float(f"{tempo / 0.5:.8f}")
+    if abs(tempo - 1.0) >= 0.001:
+        chain.append(f"atempo={tempo:.6f}")
+    return ",".join(chain) or "atempo=1.0"
+
+def voice_tempo_match(wav_in: Path, srt: Path, wav_out: Path):
+    """Stretch the voice so it lasts as long as the captions (first start → last end)."""
+    wav_dur = audio_duration(wav_in)
+    if not wav_dur:
+        raise RenderError(1, "Could not read WAV duration")
+    first = last = None
+    for ln in srt.read_text(encoding="utf-8", errors="replace").replace("\ufeff", "").replace("\r", "").split("\n"):
+        m = re.search(r"([0-9]{2}:[0-9]{2}:[0-9]{2},[0-9]{3}).*-->. *([0-9]{2}:[0-9]{2}:[0-9]{2},[0-9]{3})", ln)
+        if m:
+            first = first or m.group(1)
+            last = m.group(2)
+    if first is None:
+        raise RenderError(1, "Could not compute SRT duration")
+    sd, ed = capmod.parse_srt_ts(first) / 1000.0, capmod.parse_srt_ts(last) / 1000.0
+    srt_dur = float(f"{(ed - sd if ed - sd > 0 else ed):.6f}")
+    factor = float(f"{srt_dur / wav_dur:.6f}")
+    if factor <= 0:
+        raise RenderError(1, f"Invalid factor computed (<=0). WAV_DUR='{wav_dur}' SRT_DUR='{srt_dur}'")
+    chain = atempo_chain(float(f"{1.0 / factor:.8f}"))
+    must(["ffmpeg", "-hide_banner", "-y", "-i", str(wav_in), "-filter:a", chain, "-ar", "48000", "-ac", "2", str(wav_out)],
+         quiet=True)
+
+
+# -------- settings --------
+class Settings:
+    """Every env toggle, read once (same names and defaults as the bash renderer)."""
+
+    def __init__(self, size: str):
+        e = env_str
+        self.font_name = e("FONT_NAME", "Arial")
+        self.font_size = e("FONT_SIZE", "96")
+        self.caption_shift_ms = e("CAPTION_SHIFT_MS", "")
+        self.margin_l, self.margin_r, self.margin_v = e("MARGIN_L", "140"), e("MARGIN_R", "140"), e("MARGIN_V", "0")
+        self.box_opa = e("BOX_OPA", "96")
+        self.lead_ms = e("LEAD_MS", "0")
+        self.autosync = e("AUTOSYNC", "1")
+        self.bg_fit = e("BG_FIT", "cover")
+        self.bg_proxy = e("BG_PROXY", "1")
+        self.proxy_crf = e("PROXY_CRF", "16")
+        self.tempo_match = e("TEMPO_MATCH", "1")
+        self.top_banner = os.environ.get("TOP_BANNER", "")
+        self.banner_seconds = e("BANNER_SECONDS", "1.50")
+        self.title_gap = e("TITLE_GAP", "0.20")
+        self.top_font_size = e("TOP_FONT_SIZE", str(int(self.font_size) + 8))
+        self.auto_onset_align = e("AUTO_ONSET_ALIGN", "1")
+        self.apply_shift_to_audio = e("APPLY_SHIFT_TO_AUDIO", "1")
+        self.onset_noise_db = e("ONSET_NOISE_DB", "35")
+        self.onset_min_dur = e("ONSET_MIN_DUR", "0.18")
+        self.max_onset_shift_ms = int(e("MAX_ONSET_SHIFT_MS", "2500"))
+        self.aac_priming_ms = int(e("AAC_PRIMING_MS", "0"))
+        self.ffmpeg_progress = e("FFMPEG_PROGRESS", "0")
+        self.sync_cache = e("SYNC_CACHE", "1")
+        self.pitch_semitones = e("PITCH_SEMITONES", "0")
+        self.target_lufs = e("TARGET_LUFS", "")
+        self.true_peak_db = e("TRUE_PEAK_DB", "")
+        self.loudnorm_lra = e("LOUDNORM_LRA", "11")
+        job_json = os.environ.get("JOB_JSON", "")
+        if job_json and native(job_json).is_file():
+            flat = native(job_json).read_text(encoding="utf-8", errors="replace").replace("\r", "").replace("\n", "")
+            def job_num(key):
+                hits = re.findall(rf'"{key}"\s*:\s*(-?[0-9.]+)', flat)
+                return hits[-1] if hits else ""
+            self.target_lufs = self.target_lufs or job_num("target_lufs")
+            self.true_peak_db = self.true_peak_db or job_num("true_peak_db")
+        if self.target_lufs and not self.true_peak_db:
+            self.true_peak_db = "-1.0"
+        self.emotion = e("EMOTION", "")
+        md = music_defaults(self.emotion)
+        music = os.environ.get("MUSIC", "")
+        if music.lower() in ("0", "none", "off"):
+            self.music = None
+        else:
+            self.music = native(music) if music else md.get("music")
+        ref_lufs = float(self.target_lufs) if self.target_lufs else -16.0
+        self.music_lufs = e("MUSIC_LUFS", f"{ref_lufs - float(md.get('music_under_lu', 15)):g}")
+        self.music_duck = e("MUSIC_DUCK", str(md.get("music_duck", 8)))
+        self.music_duck_threshold = e("MUSIC_DUCK_THRESHOLD", "0.03")
+        self.music_attack_ms = e("MUSIC_ATTACK_MS", "20")
+        self.music_release_ms = e("MUSIC_RELEASE_MS", "400")
+        self.preview = e("PREVIEW", "0")
+        self.preview_fps = e("PREVIEW_FPS", "15")
+        self.preview_start = e("PREVIEW_START", "0")
+        self.preview_dur = e("PREVIEW_DUR", "")
+        self.preview_sheet = e("PREVIEW_SHEET", "0")
+        if self.preview_sheet == "1":
+            self.preview = "1"
+        self.render_cache = e("RENDER_CACHE", "1")
+        self.render_cache_days = int(e("RENDER_CACHE_DAYS", "14"))
+        self.keep_workdir = e("KEEP_WORKDIR", "fail")
+        self.work_retain_hours = int(e("WORK_RETAIN_HOURS", "48"))
+        self.extra_ass_filter = os.environ.get("EXTRA_ASS_FILTER", "")
+        self.extra_out_flags = os.environ.get("FFMPEG_EXTRA_OUT_FLAGS", "")
+        self.cache_root = native(os.environ["CACHE_ROOT"]) if os.environ.get("CACHE_ROOT") else BUILD / ".cache"
+
+        # PlayRes; preview keeps it at full size so libass scales the CenterBox style to the smaller frame.
+        self.prx, self.pry = (1080, 1920) if size == "1080x1920" else (1920, 1080)
+        self.size = size or f"{self.prx}x{self.pry}"
+        self.ow, self.oh, self.fps = self.prx, self.pry, "30"
+        if self.preview == "1":
+            self.ow, self.oh, self.fps = self.prx // 2, self.pry // 2, self.preview_fps
+
+
+# -------- hooks --------
+class Hooks:
+    """Legacy bash hooks (tools/hooks/lib/hooks.sh) win if present; else tools/hooks.yaml, in-process."""
+
+    def __init__(self, env: Dict[str, str]):
+        self.env = env
+        self.config = hooks_runtime.load_config(HOOKS_YAML) if HOOKS_YAML.exists() else {}
+
+    def run(self, stage: str, captions: Optional[Path] = None, audio: Optional[Path] = None):
+        env = dict(self.env, HOOK_CAPTIONS=str(captions or ""), HOOK_AUDIO=str(audio or self.env.get("HOOK_AUDIO", "")))
+        self.env.update(HOOK_CAPTIONS=env["HOOK_CAPTIONS"], HOOK_AUDIO=env["HOOK_AUDIO"])
+        try:
+            if LEGACY_HOOKS_SH.exists():
+                sys.stdout.flush()
+                subprocess.run(["bash", "-c", '. "$1"; run_hooks "$2"', "hooks", str(LEGACY_HOOKS_SH), stage], env=env)
+            elif hooks_runtime.stage_hooks(self.config, stage):
+                hooks_runtime.run_stage_file(stage, self.config, captions, str(audio) if audio else env["HOOK_AUDIO"] or None,
+                                             env.get("TRACE_FILE"), Path(env["WORKDIR"]), env=env,
+                                             log=lambda m: print(m, flush=True))
+        except Exception as e:                 # hooks must never take the render down
+            log_w(f"hooks {stage}: {type(e).__name__}: {e}")
+
+    def cache_key(self, *stages: str) -> Optional[bytes]:
+        """The caption-mutating hooks of these stages (name, call, args) as cache-key bytes; b"" when
+        there are none, so keys without hooks are unchanged. None for legacy bash hooks: what they
+        do cannot be read from a config, so nothing they feed may be cached."""
+        if LEGACY_HOOKS_SH.exists():
+            return None
+        specs = [[stage, h.name, h.call, h.args] for stage in stages
+                 for h in hooks_runtime.stage_hooks(self.config, stage) if h.mutates]
+        return json.dumps(specs, sort_keys=True, default=str).encode("utf-8") if specs else b""
+
+
+# -------- video backgrounds --------
+def fit_filter(fit: str, ow: int, oh: int) -> str:
+    if fit == "contain":
+        return f"scale={ow}:{oh}:force_original_aspect_ratio=decrease,pad={ow}:{oh}:(ow-iw)/2:(oh-ih)/2"
+    if fit == "none":
+        return f"scale={ow}:{oh}:flags=fast_bilinear"
+    return f"scale={ow}:{oh}:force_original_aspect_ratio=increase,crop={ow}:{oh}"
+
+def is_video(p: Path) -> bool:
+    return p.suffix.lower() in VIDEO_EXTS
+
+def proxy_key(src_line: bytes, s: "Settings") -> str:
+    return key16(src_line, lines_blob("proxy", s.bg_fit, s.ow, s.oh, s.fps, s.proxy_crf))
+
+def ensure_proxy(bg: Path, key: str, s: "Settings", work: Path) -> Tuple[Path, int]:
+    """(proxy.mp4, frame count) for a video background, transcoding it on a miss.
+
+    The proxy is already fitted to the output size at the output fps, every frame is a keyframe
+    and it holds a whole number of frames, so the burn decodes it cheaply and -stream_loop
+    restarts at frame 0 without seeking back to a GOP start. The frame count (the loop length)
+    lives in the <key>.env sidecar, written last: no sidecar, no proxy.
+    """
+    pdir = s.cache_root / "proxy"
+    pdir.mkdir(parents=True, exist_ok=True)
+    proxy, side = pdir / f"{key}.mp4", pdir / f"{key}.env"
+    if side.is_file() and proxy.is_file():
+        frames = int(read_env_file(side).get("PROXY_FRAMES") or 0)
+        if frames > 0:
+            os.utime(proxy); os.utime(side)
+            log_i(f"Proxy cache hit: {proxy} ({frames} frames)")
+            return proxy, frames
+
+    part = pdir / f".{key}.{os.getpid()}.partial.mp4"
+    progress = work / ".proxy.progress"
+    log_i(f"Transcoding video background → proxy {s.ow}x{s.oh}@{s.fps} (once per source/geometry)…")
+    must(["ffmpeg", "-hide_banner", "-y", "-nostats", "-progress", str(progress), "-i", str(bg), "-an", "-sn", "-dn",
+          "-vf", f"{fit_filter(s.bg_fit, s.ow, s.oh)},fps={s.fps},format=yuv420p,setsar=1",
+          "-c:v", "libx264", "-preset", "veryfast", "-tune", "fastdecode", "-g", "1", "-crf", s.proxy_crf,
+          "-movflags", "+faststart", str(part)])
+    hits = re.findall(r"^frame=(\d+)", progress.read_text(encoding="utf-8", errors="replace"), re.M) \
+        if progress.is_file() else []
+    frames = int(hits[-1]) if hits else 0
+    if frames <= 0:
+        frames = int(round((mp4_duration(part) or 0) * float(s.fps)))
+    if frames <= 0:
+        part.unlink(missing_ok=True)
+        log_e(f"Video background produced no frames: {bg}")
+        raise RenderError(9)
+    os.replace(part, proxy)
+    env_path = work / "proxy.env"
+    env_path.write_text(f"PROXY_FRAMES={frames}\nPROXY_FPS={s.fps}\nPROXY_SRC={bg.name}\n", encoding="utf-8")
+    publish_atomic(env_path, side)
+    log_i(f"Proxy ready: {proxy} ({frames} frames)")
+    return proxy, frames
+
+
+# -------- music bed --------
+def music_defaults(emotion: str) -> Dict:
+    """Music settings for an emotion: voice/manifest.json map.<emotion>.music* over default_music*;
+    with no "music" path there, assets/music/<EMOTION>.* (same naming as the backgrounds)."""
+    try:
+        m = json.loads(VOICE_MANIFEST.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        m = {}
+    key = (emotion or "").strip().lower().replace(" ", "_")
+    ent = m.get("map", {}).get(key, {}) if key else {}
+    out = {}
+    for k in ("music", "music_under_lu", "music_duck"):
+        v = ent.get(k, m.get(f"default_{k}"))
+        if v not in (None, ""):
+            out[k] = v
+    if out.get("music"):
+        out["music"] = ROOT / out["music"]
+    elif key:
+        names = [f"{key.upper()}{x}" for x in MUSIC_EXTS] + [f"{key}{x}" for x in MUSIC_EXTS]
+        out["music"] = next((MUSIC_DIR / n for n in names if (MUSIC_DIR / n).is_file()), None)
+    return out
+
+def ensure_music_bed(track: Path, s: "Settings", work: Path) -> Optional[Tuple[Path, str, Dict[str, str]]]:
+    """(bed.wav, key, facts) for a music track, decoding + measuring it on a miss; None if unusable.
+
+    The bed is the track as 48 kHz stereo PCM with leading/trailing silence cut and 20 ms edge
+    fades, so -stream_loop repeats it without a gap or click; its integrated loudness is measured
+    in the same ffmpeg pass. Both live in $CACHE_ROOT/music keyed by the track's content, so a
+    render with music pays one WAV read, not a decode + analysis.
+    """
+    key = key16(sha1sum_line(track), lines_blob("bed", 48000, "stereo", MUSIC_TRIM_DB))
+    mdir = s.cache_root / "music"
+    mdir.mkdir(parents=True, exist_ok=True)
+    bed, side = mdir / f"{key}.wav", mdir / f"{key}.env"
+    if side.is_file() and bed.is_file():
+        facts = read_env_file(side)
+        if facts.get("MUSIC_I"):
+            os.utime(bed); os.utime(side)
+            log_i(f"Music bed cache hit: {bed} (I={facts['MUSIC_I']} LUFS)")
+            return bed, key, facts
+
+    part = mdir / f".{key}.{os.getpid()}.partial.wav"
+    # loudnorm only takes 192 kHz: resample its branch itself, or format negotiation drags the bed
+    # through asplit to 192 kHz WAVE_FORMAT_EXTENSIBLE, which wave (wav_params) cannot read.
+    trim = f"silenceremove=start_periods=1:start_threshold={MUSIC_TRIM_DB}dB,afade=t=in:d=0.02"
+    graph = (f"[0:a]aresample=48000,aformat=sample_fmts=s16:channel_layouts=stereo,{trim},areverse,{trim},areverse,"
+             "asplit=2[bed][m];[m]aresample=192000,loudnorm=print_format=json[mm]")
+    analysis_log = work / ".music_analysis.log"
+    log_i(f"Preparing music bed from {track} (once per track)…")
+    rc = run(["ffmpeg", "-hide_banner", "-y", "-nostats", "-i", str(track), "-filter_complex", graph,
+              "-map", "[bed]", "-ar", "48000", "-c:a", "pcm_s16le", str(part), "-map", "[mm]", "-f", "null", "-"], log=analysis_log)
+    vals = dict(re.findall(r'"(input_i|input_tp)"\s*:\s*"([^"]*)"', analysis_log.read_text(encoding="utf-8", errors="replace")))
+    wp = wav_params(part) if rc == 0 and part.is_file() else None
+    if not wp or not wp[1] or vals.get("input_i") in (None, "", "-inf"):
+        part.unlink(missing_ok=True)
+        log_w(f"Music track unusable (rc={rc}, silent or undecodable?) — rendering without music: {track}")
+        return None
+    os.replace(part, bed)
+    facts = {"MUSIC_I": vals["input_i"], "MUSIC_TP": vals.get("input_tp", ""), "MUSIC_DUR": f"{wp[1]:.3f}",
+             "MUSIC_SRC": track.name}
+    env_path = work / "music.env"
+    env_path.write_text("".join(f"{k}={v}\n" for k, v in facts.items()), encoding="utf-8")
+    publish_atomic(env_path, side)
+    log_i(f"Music bed ready: {bed} ({facts['MUSIC_DUR']}s, I={facts['MUSIC_I']} LUFS)")
+    return bed, key, facts
+
+def music_graph(af: str, gain_db: float, s: "Settings") -> str:
+    """Voice chain + looped bed → one graph: the voice (after its own DSP) keys the bed's compressor."""
+    return (f"[0:a]{af},aresample=48000,aformat=channel_layouts=stereo,asplit=2[v][sc];"
+            f"[1:a]volume={gain_db:.2f}dB[m];"
+            f"[m][sc]sidechaincompress=threshold={s.music_duck_threshold}:ratio={s.music_duck}:"
+            f"attack={s.music_attack_ms}:release={s.music_release_ms}[d];"
+            "[v][d]amix=inputs=2:duration=first:dropout_transition=0:normalize=0[a]")
+
+
+# -------- render --------
+def ass_filter_path(p: Path) -> str:
+    """cygpath -m + escape the drive colon for the ass= filter."""
+    return str(p).replace("\\", "/").replace(":", "\\:", 1)
+
+def render(size: str, bg: Path, wav_in: Path, cap_in: Path, out: Path, work: Path, out_partial: Path, s: Settings):
+    stem = out.stem
+    trace = work / "trace.jsonl"
+    (work / "render.log").touch()
+    env = dict(os.environ, LOG_FILE=str(work / "render.log"), TRACE_FILE=str(trace), WORKDIR=str(work),
+               OUT_MP4=str(out), HOOK_OUT_MP4=str(out), HOOK_CAPTIONS="", HOOK_AUDIO=str(wav_in),
+               SIZE=size, BG=str(bg), WAV_IN=str(wav_in), OUT=str(out))
+    env.setdefault("TMPDIR", str(work))
+    hooks = Hooks(env)
+    hooks.run("pre_render")
+
+    # --- Get ASS (convert from SRT if needed) ---
+    ext = cap_in.suffix.lstrip(".").lower()
+    wav = wav_in
+    ass_base = cap_in.stem if ext == "ass" else f"{cap_in.stem}.autosync"
+    srt_in = None
+    # pre/post_autosync hooks that edit captions run inside the cached step, so they are part of its key.
+    hooks_key = hooks.cache_key("pre_autosync", "post_autosync")
+    sync_cache = s.sync_cache == "1" and hooks_key is not None
+    if s.sync_cache == "1" and not sync_cache:
+        log_i("Legacy bash hooks present: sync cache off")
+    sync_dir = s.cache_root / "sync" / key16(
+        lines_blob(s.autosync, s.tempo_match, s.lead_ms, s.onset_noise_db, s.onset_min_dur, ext),
+        sha1sum_line(wav_in), cap_in.read_bytes(), hooks_key or b"")
+    cached_onset = ""
+    if sync_cache and (sync_dir / "sync.env").is_file():
+        cached = read_env_file(sync_dir / "sync.env")
+        cached_onset = cached.get("CACHED_ONSET_MS", "")
+        ass_raw = sync_dir / "captions.ass"
+        if cached.get("CACHED_TEMPO", "0") == "1":
+            wav = sync_dir / "voice.wav"
+        if ext != "ass":
+            srt_in = cap_in
+        log_i(f"Sync cache hit: reusing synced captions/voice from {sync_dir}")
+    elif ext == "ass":
+        ass_raw = cap_in
+        log_i(f"Input captions detected as ASS: {ass_raw}")
+    else:
+        srt_in = cap_in
+        log_i(f"Input captions detected as SRT: {srt_in}")
+        tmp_srt = work / f".{srt_in.name}.lf.srt"
+        write_lines(tmp_srt, read_lf(srt_in))
+
+        srt_sync = work / f"{srt_in.stem}.autosync.srt"
+        hooks.run("pre_autosync", tmp_srt)
+        if s.autosync == "0":
+            shutil.copyfile(tmp_srt, srt_sync)
+            log_i(f"Autosync disabled — copied SRT to {srt_sync}")
+        else:
+            log_i(f"Autosync (pass 1) → {srt_sync} (lead={s.lead_ms}ms)")
+            srt_autosync(tmp_srt, wav, srt_sync, s.lead_ms, work / ".autosync_pass1.log")
+        hooks.run("post_autosync", srt_sync)
+
+        use_srt = srt_sync
+        if s.tempo_match == "1":
+            wav_match = work / ".tmp.voice.match.wav"
+            log_i("Matching voice tempo to (pass 1) SRT duration…")
+            voice_tempo_match(wav, srt_sync, wav_match)
+            wav = wav_match
+            log_i(f"Matched voice tempo: {wav}")
+            srt_sync2 = work / f"{srt_in.stem}.autosync.pass2.srt"
+            log_i(f"Autosync (pass 2) → {srt_sync2} (lead={s.lead_ms}ms)")
+            srt_autosync(srt_sync, wav, srt_sync2, s.lead_ms, work / ".autosync_pass2.log")
+            use_srt = srt_sync2
+
+        ass_raw = work / f"{srt_in.stem}.autosync.ass"
+        write_lines(ass_raw, srt_to_ass(use_srt))
+        log_i(f"Converted SRT→ASS: {ass_raw}")
+
+    # Publish the sync result (staged next to its final name: rename is atomic within one filesystem).
+    if sync_cache and not sync_dir.is_dir():
+        sync_dir.parent.mkdir(parents=True, exist_ok=True)
+        sync_tmp = Path(tempfile.mkdtemp(prefix=".pub.", dir=str(sync_dir.parent)))
+        shutil.copyfile(ass_raw, sync_tmp / "captions.ass")
+        if wav != wav_in:
+            shutil.copyfile(wav, sync_tmp / "voice.wav")
+        (sync_tmp / "sync.env").write_text(f"CACHED_TEMPO={1 if wav != wav_in else 0}\n", encoding="utf-8")
+        try:
+            os.rename(sync_tmp, sync_dir)
+        except OSError:
+            shutil.rmtree(sync_tmp, ignore_errors=True)
+
+    # --- Normalize + repair + CenterBox (always) ---
+    ass_norm = work / f"{ass_base}.norm.ass"
+    write_lines(ass_norm, read_lf(ass_raw))
+    hooks.run("pre_ass_normalize", ass_norm, wav)
+    ass = normalize_ass(read_lf(ass_norm), s)
+    write_lines(ass_norm, ass)
+    ass = force_centerbox(repair_bad_ts(ass))
+    ass_path = work / f"{ass_base}.centerbox.ass"
+    write_lines(ass_path, ass)
+    log_i(f"Enforced CenterBox ASS: {ass_path}")
+
+    if s.caption_shift_ms and s.caption_shift_ms != "0":
+        ass = shift_ass_times(ass, int(s.caption_shift_ms))
+        log_i(f"Applied CAPTION_SHIFT_MS={s.caption_shift_ms}ms to ASS")
+
+    dcount = count_dialogue(ass)
+    if dcount <= 0:
+        log_e(f"After repair/CenterBox, no Dialogue events remain in: {ass_path}")
+        raise RenderError(7)
+
+    # --- Optional gate to keep title visible before first caption ---
+    if s.top_banner:
+        need_ms = int(fmt0((float(s.banner_seconds) + float(s.title_gap)) * 1000))
+        first_ms = min_start_ms(ass)
+        if first_ms < need_ms:
+            ass = shift_ass_times(ass, need_ms - first_ms)
+            log_i(f"Gated first caption: +{need_ms - first_ms}ms (first={first_ms}ms < need={need_ms}ms)")
+
+    # --- Voice DSP: pitch + loudness (folded into the audio encode's -af) ---
+    pitch_af = ""
+    if float(s.pitch_semitones or 0) != 0:
+        sr = audio_rate(wav) or 22050
+        f = 2 ** (float(s.pitch_semitones) / 12)
+        pitch_af = f"asetrate={int(sr * f + 0.5)},aresample={sr},atempo={1 / f:.6f}"
+        log_i(f"Pitch shift {s.pitch_semitones} semitones: {pitch_af}")
+
+    ln: Dict[str, str] = {}
+    ln_file = None
+    if s.target_lufs:
+        ln_key = key16(lines_blob(s.target_lufs, s.true_peak_db, s.loudnorm_lra, pitch_af), sha1sum_line(wav))
+        ln_file = s.cache_root / "loudnorm" / f"{ln_key}.env"
+        if ln_file.is_file():
+            ln = read_env_file(ln_file)
+            log_i(f"Loudnorm cache hit: measured I={ln.get('LN_I')} LUFS TP={ln.get('LN_TP')} dBTP")
+
+    need_onset = s.auto_onset_align == "1" and not cached_onset
+    need_loud = bool(s.target_lufs) and not ln.get("LN_I")
+    measured_onset = ""
+    if need_onset or need_loud:
+        chain = []
+        if need_onset:
+            chain.append(f"silencedetect=noise=-{s.onset_noise_db}dB:d={s.onset_min_dur}")
+        if need_loud:
+            chain += ([pitch_af] if pitch_af else []) + \
+                     [f"loudnorm=I={s.target_lufs}:TP={s.true_peak_db}:LRA={s.loudnorm_lra}:print_format=json"]
+        analysis_log = work / ".audio_analysis.log"
+        run(["ffmpeg", "-hide_banner", "-nostats", "-i", str(wav), "-af", ",".join(chain), "-f", "null", "-"], log=analysis_log)
+        text = analysis_log.read_text(encoding="utf-8", errors="replace")
+        if need_onset:
+            m = re.search(r"silence_end:\s*([0-9.]+)", text)
+            measured_onset = str(int(float(m.group(1)) * 1000 + 0.5)) if m else "0"
+            if (sync_dir / "sync.env").is_file():
+                merged = work / "sync.env"
+                merged.write_text((sync_dir / "sync.env").read_text(encoding="utf-8") + f"CACHED_ONSET_MS={measured_onset}\n",
+                                  encoding="utf-8")
+                publish_atomic(merged, sync_dir / "sync.env")
+        if need_loud:
+            vals = dict(re.findall(r'"(input_i|input_tp|input_lra|input_thresh|target_offset)"\s*:\s*"([^"]*)"', text))
+            if vals.get("input_i") not in (None, "", "-inf") and vals.get("input_tp") != "-inf":
+                ln = {"LN_I": vals["input_i"], "LN_TP": vals.get("input_tp", ""), "LN_LRA": vals.get("input_lra", ""),
+                      "LN_THRESH": vals.get("input_thresh", ""), "LN_OFFSET": vals.get("target_offset", "")}
+                env_path = work / "loudnorm.env"
+                env_path.write_text("".join(f"{k}={v}\n" for k, v in ln.items()), encoding="utf-8")
+                ln_file.parent.mkdir(parents=True, exist_ok=True)
+                publish_atomic(env_path, ln_file)
+                log_i(f"Loudnorm measured: I={ln['LN_I']} LUFS TP={ln['LN_TP']} dBTP LRA={ln['LN_LRA']} "
+                      f"(target {s.target_lufs} LUFS / {s.true_peak_db} dBTP)")
+            else:
+                log_w("Loudnorm measurement failed (silent or unreadable voice?) — loudness left as is")
+    loud_af = ""
+    if ln.get("LN_I"):
+        loud_af = (f"loudnorm=I={s.target_lufs}:TP={s.true_peak_db}:LRA={s.loudnorm_lra}:measured_I={ln['LN_I']}:"
+                   f"measured_TP={ln['LN_TP']}:measured_LRA={ln['LN_LRA']}:measured_thresh={ln['LN_THRESH']}:"
+                   f"offset={ln['LN_OFFSET']}:linear=true")
+
+    # --- Final micro-alignment (onset); by default the residual goes to AUDIO ---
+    af = "anull"
+    if s.auto_onset_align == "1":
+        onset_ms = int(cached_onset or measured_onset or 0)
+        cap0_ms = min_start_ms(ass)
+        # Positive delta: audio starts later than captions → advance audio (trim head).
+        delta = max(-s.max_onset_shift_ms, min(s.max_onset_shift_ms, onset_ms - cap0_ms + s.aac_priming_ms))
+        if delta == 0:
+            log_i(f"Final onset align: no correction needed (onset={onset_ms}ms, cap0={cap0_ms}ms)")
+        elif s.apply_shift_to_audio == "1":
+            if delta > 0:
+                af = f"atrim=start={delta / 1000.0:.6f},asetpts=PTS-STARTPTS"
+                log_i(f"Final onset align (AUDIO advance): onset={onset_ms}ms cap0={cap0_ms}ms → advance audio {delta}ms")
+            else:
+                # Real leading silence (all channels): the encoded track is cached and muxed with -c copy.
+                af = f"adelay=delays={-delta}:all=1"
+                log_i(f"Final onset align (AUDIO delay): onset={onset_ms}ms cap0={cap0_ms}ms → delay audio {-delta}ms")
+        else:
+            ass = shift_ass_times(ass, delta)
+            log_i(f"Final onset align (CAPTIONS shift): onset={onset_ms}ms cap0={cap0_ms}ms → shift captions {delta}ms")
+    for dsp in (pitch_af, loud_af):
+        if dsp:
+            af = f"{af},{dsp}"
+
+    print(f"[i] SIZE={s.size}  PlayRes={s.prx}x{s.pry}  FONT={s.font_name}/{s.font_size}  "
+          f"MARGINS L/R/V={s.margin_l}/{s.margin_r}/{s.margin_v}  BOX_OPA={s.box_opa}")
+    print(f"[i] BG={bg}\n[i] WAV={wav}\n[i] ASS={ass_path}  (events={dcount})", flush=True)
+
+    # --- Optional Open-Title (0–BANNER_SECONDS) ---
+    bass_lines: List[str] = []
+    bass = work / f".open_title.{s.prx}x{s.pry}.ass"
+    if s.top_banner:
+        title = s.top_banner.replace("\\", "\\\\").replace("{", "\\{").replace("}", "\\}").replace("\r", "").replace("\n", "\\N")
+        bass_lines = [
+            "[Script Info]", "ScriptType: v4.00+", f"PlayResX: {s.prx}", f"PlayResY: {s.pry}", "[V4+ Styles]",
+            "Format: Name,Fontname,Fontsize,PrimaryColour,SecondaryColour,OutlineColour,BackColour,Bold,Italic,Underline,"
+            "StrikeOut,ScaleX,ScaleY,Spacing,Angle,BorderStyle,Outline,Shadow,Alignment,MarginL,MarginR,MarginV,Encoding",
+            f"Style: OpenTitle,{s.font_name},{s.top_font_size},&H00FFFFFF,&H000000FF,&H00000000,&H{s.box_opa}000000,"
+            f"0,0,0,0,100,100,0,0,3,0,0,5,{s.margin_l},{s.margin_r},{s.margin_v},1",
+            "[Events]", capmod.ASS_EVENT_FORMAT,
+            f"Dialogue: 0,0:00:00.00,0:00:{s.banner_seconds},OpenTitle,,0,0,0,,{title}",
+        ]
+        print(f"[i] Open-Title enabled (0–{s.banner_seconds}s): {s.top_banner}", flush=True)
+
+    # --- Preview window: captions re-timed to start at 0, audio cut after its filtergraph ---
+    in_v_opts: List[str] = []
+    if s.preview == "1" and s.preview_sheet != "1" and s.preview_dur:
+        win_ms = int(fmt0(float(s.preview_start) * 1000))
+        ass = shift_ass_times(ass, -win_ms)
+        ass_path = work / f"{ass_base}.preview.ass"
+        if bass_lines:
+            bass_lines = shift_ass_times(bass_lines, -win_ms)
+        in_v_opts = ["-t", s.preview_dur]
+        af = f"{af},atrim=start={s.preview_start}:duration={s.preview_dur},asetpts=PTS-STARTPTS"
+        log_i(f"Preview window: {s.preview_start}s +{s.preview_dur}s")
+
+    write_lines(ass_path, ass)
+    if bass_lines:
+        write_lines(bass, bass_lines)
+
+    # --- Background fit + VF chain ---
+    # A video background through the proxy arrives fitted and at the output fps; the source hash
+    # is taken once here and feeds both the proxy key and the video-layer key. A still that is
+    # already the output size (PNG header via media_probe, as in the asset index) skips the scaler.
+    ow, oh = s.ow, s.oh
+    bg_video = is_video(bg)
+    use_proxy = bg_video and s.bg_proxy == "1"
+    pkey = proxy_key(sha1sum_line(bg), s) if use_proxy else ""
+    bg_info = None if bg_video else media_probe.probe(bg)
+    exact = bg_info is not None and (bg_info.width, bg_info.height) == (ow, oh)
+    bg_vf = "null" if use_proxy or exact else fit_filter(s.bg_fit, ow, oh)
+    if exact:
+        log_i(f"Background is already {ow}x{oh}: no scale/crop")
+    ass_vf = ""
+    if bass_lines:
+        ass_vf += f",ass=filename='{ass_filter_path(bass)}':original_size={s.prx}x{s.pry}"
+    ass_vf += f",ass=filename='{ass_filter_path(ass_path)}':original_size={s.prx}x{s.pry}"
+    ass_vf += s.extra_ass_filter
+
+    def bg_input(rate: str, frames_needed: int) -> Tuple[List[str], str]:
+        """Input args for the background plus the chain in front of the captions."""
+        if not bg_video:
+            return ["-loop", "1", "-framerate", rate, *in_v_opts, "-i", str(bg)], bg_vf
+        if not use_proxy:
+            return ["-stream_loop", "-1", *in_v_opts, "-i", str(bg)], f"{bg_vf},fps={rate}"
+        proxy, frames = ensure_proxy(bg, pkey, s, work)
+        loops = max(0, (frames_needed - 1) // frames)          # extra passes over the proxy; exact, no probing
+        return ["-stream_loop", str(loops), *in_v_opts, "-i", str(proxy)], (bg_vf if rate == s.fps else f"fps={rate}")
+
+    env.update(INPUT_WAV=str(wav), INPUT_SRT=str(srt_in or ""), INPUT_ASS=str(ass_path))
+    hooks.run("pre_burn", ass_path, wav)
+    ass = read_lf(ass_path)                    # a pre_burn hook may have edited it
+
+    # --- Preview contact sheet (one frame per cue, no audio) ---
+    if s.preview_sheet == "1":
+        sheet_fps = 10
+        frames = sorted({int((a + b) / 2 * sheet_fps / 1000) for a, b in dialogue_times(ass) if a >= 0 and b > a}) or [0]
+        cols = max(1, math.isqrt(len(frames)) + (1 if math.isqrt(len(frames)) ** 2 < len(frames) else 0))
+        rows = (len(frames) + cols - 1) // cols
+        sel = "+".join(f"eq(n,{n})" for n in frames)
+        sheet_s = (frames[-1] + 1) / sheet_fps
+        in_args, pre_vf = bg_input(str(sheet_fps), int(sheet_s * float(s.fps)) + 1)
+        must(["ffmpeg", "-hide_banner", "-y", "-t", f"{sheet_s:.3f}", *in_args,
+              "-vf", f"{pre_vf}{ass_vf},select='{sel}',tile={cols}x{rows}:padding=8:margin=8",
+              "-frames:v", "1", "-update", "1", str(out_partial)])
+        os.replace(out_partial, out)
+        hooks.run("post_render")
+        print(f"\n[OK] Contact sheet ({len(frames)} cues):\n{out}", flush=True)
+        return
+
+    # --- Encoders ---
+    venc = ["-c:v", "libx264", "-pix_fmt", "yuv420p"]
+    aenc = ["-c:a", "aac", "-ar", "48000"]
+    if s.preview == "1":
+        venc = ["-c:v", "libx264", "-preset", "ultrafast", "-tune", "zerolatency", "-crf", "30", "-pix_fmt", "yuv420p"]
+        aenc = ["-c:a", "aac", "-b:a", "96k", "-ar", "48000"]
+
+    # --- Render: cached audio track + cached caption video layer → -c copy mux ---
+    if s.render_cache == "1":
+        a_cache, v_cache = s.cache_root / "audio", s.cache_root / "video"
+        a_cache.mkdir(parents=True, exist_ok=True); v_cache.mkdir(parents=True, exist_ok=True)
+        prune([a_cache, v_cache] + [d for d in (s.cache_root / "proxy", s.cache_root / "music") if d.is_dir()],
+              s.render_cache_days)
+    else:
+        a_cache = v_cache = work
+
+    # Music bed (optional): mixed in this same encode; voice-only renders keep their old keys.
+    bed = None
+    if s.music is not None:
+        if s.music.is_file():
+            bed = ensure_music_bed(s.music, s, work)
+        else:
+            log_w(f"Music track not found — rendering without music: {s.music}")
+    if bed:
+        bed_wav, bed_key, facts = bed
+        gain = float(s.music_lufs) - float(facts["MUSIC_I"])
+        graph = music_graph(af, gain, s)
+        log_i(f"Music bed: {s.music.name} at {s.music_lufs} LUFS ({gain:+.2f} dB), ducked {s.music_duck}:1 under the voice")
+        a_key = key16(sha1sum_line(wav), lines_blob(af, " ".join(aenc)), lines_blob("music", bed_key, graph))
+        a_in = ["-i", str(wav), "-stream_loop", "-1", "-i", str(bed_wav), "-filter_complex", graph, "-map", "[a]"]
+    else:
+        a_key = key16(sha1sum_line(wav), lines_blob(af, " ".join(aenc)))
+        a_in = ["-i", str(wav), "-af", af]
+    a_track = a_cache / f"{a_key}.m4a"
+    if a_track.is_file() and a_track.stat().st_size > 0:
+        os.utime(a_track); log_i(f"Audio cache hit: {a_track}")
+    else:
+        a_part = a_cache / f".{a_key}.{os.getpid()}.partial.m4a"
+        must(["ffmpeg", "-hide_banner", "-y", "-nostats", *a_in, "-vn", *aenc, "-use_editlist", "0", str(a_part)])
+        os.replace(a_part, a_track)
+        log_i(f"Encoded audio track: {a_track}")
+
+    # Video length follows the encoded audio, in whole frames.
+    a_dur = mp4_duration(a_track)
+    if a_dur is None:
+        a_dur = media_probe.probe(a_track).duration
+    if not a_dur:
+        log_e(f"Could not read the duration of the encoded audio: {a_track}")
+        raise RenderError(8)
+    v_frames = max(1, math.ceil(a_dur * float(s.fps)))
+
+    v_key = key16(lines_blob("proxy", pkey) if use_proxy else sha1sum_line(bg),
+                  lines_blob(s.bg_fit, s.prx, s.pry, ow, oh, s.fps, v_frames, " ".join(in_v_opts), " ".join(venc),
+                             s.extra_ass_filter, s.extra_out_flags),
+                  sha1sum_line(ass_path), sha1sum_line(bass) if bass_lines else b"")
+    v_layer = v_cache / f"{v_key}.mp4"
+
+    # Only the encode reports progress: a second block stream from the mux would restart the UI bar.
+    progress = ["-progress", "pipe:1", "-nostats"] if s.ffmpeg_progress == "1" else []
+
+    if v_layer.is_file() and v_layer.stat().st_size > 0:
+        os.utime(v_layer); log_i(f"Video layer cache hit: {v_layer}")
+        if progress:
+            print("[progress] cached=video", flush=True)
+    else:
+        if progress:
+            print(f"[progress] duration_s={a_dur:.6f}", flush=True)
+        v_part = v_cache / f".{v_key}.{os.getpid()}.partial.mp4"
+        in_args, pre_vf = bg_input(s.fps, v_frames)
+        must(["ffmpeg", "-hide_banner", "-y", *progress, *in_args,
+              "-vf", pre_vf + ass_vf, "-frames:v", str(v_frames), "-an", "-force_key_frames", "0", *venc, *s.extra_out_flags.split(),
+              str(v_part)])
+        os.replace(v_part, v_layer)
+        log_i(f"Encoded video layer: {v_layer}")
+
+    must(["ffmpeg", "-hide_banner", "-y", *(["-nostats"] if progress else []), "-i", str(v_layer), "-i", str(a_track),
+          "-map", "0:v:0", "-map", "1:a:0", "-c", "copy", "-shortest", "-movflags", "+faststart", "-use_editlist", "0",
+          str(out_partial)])
+    os.replace(out_partial, out)
+
+    # Final captions next to the other builds (verify_lock.sh) and per output (tools/qa_sync.py).
+    if s.preview != "1":
+        publish_atomic(ass_path, BUILD / f"{ass_base}.repaired.ass")
+        (BUILD / "captions").mkdir(parents=True, exist_ok=True)
+        publish_atomic(ass_path, BUILD / "captions" / f"{stem}.ass")
+
+    hooks.run("post_render")
+    if trace.is_file() and trace.stat().st_size > 0:
+        (BUILD / "logs").mkdir(parents=True, exist_ok=True)
+        publish_atomic(trace, BUILD / "logs" / f"{stem}.trace.jsonl")
+    print(f"\n[OK] Rendered:\n{out}", flush=True)
+
+
+def main(argv: List[str]) -> int:
+    args = list(argv)
+    size = ""
+    if args and args[0].startswith("--size="):
+        size = args.pop(0)[len("--size="):]
+    names = ("BG image", "WAV file", "SRT or ASS captions", "output MP4")
+    if len(args) < 4:
+        print(f"render_unified.py: need {names[len(args)]}", file=sys.stderr)
+        return 1
+    bg, wav_in, cap_in, out = (native(a) for a in args[:4])
+
+    s = Settings(size)
+    for d in (BUILD, JOBS_DIR, out.parent):
+        d.mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    for d in JOBS_DIR.iterdir():               # prune leftover job dirs
+        try:
+            if d.is_dir() and now - d.stat().st_mtime > s.work_retain_hours * 3600:
+                shutil.rmtree(d, ignore_errors=True)
+        except OSError:
+            pass
+    work = Path(tempfile.mkdtemp(prefix=f"{out.stem}.", dir=str(JOBS_DIR)))
+    out_partial = out.parent / f".{out.stem}.{os.getpid()}.partial{out.suffix}"
+
+    rc = 1
+    try:
+        render(s.size, bg, wav_in, cap_in, out, work, out_partial, s)
+        rc = 0
+    except RenderError as e:
+        rc = e.rc
+        if str(e) != f"exit {e.rc}":
+            log_e(str(e))
+    except Exception as e:
+        log_e(f"{type(e).__name__}: {e}")
+    finally:
+        out_partial.unlink(missing_ok=True)
+        if s.keep_workdir == "never" or (s.keep_workdir not in ("always", "never") and rc == 0):
+            shutil.rmtree(work, ignore_errors=True)
+        elif s.keep_workdir != "always":
+            print(f"[warn] Render failed (rc={rc}); work dir kept: {work}", file=sys.stderr, flush=True)
+    return rc
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
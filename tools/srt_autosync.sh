@@ -8,6 +8,11 @@ WAV_IN="${2:?need WAV input}"
 SRT_OUT="${3:?need SRT output}"
 LEAD_MS="${4:-150}"
 EXTRA_SHIFT_MS="${5:-0}"
+TOOLS_DIR="$(cd "$(dirname "$0")" && pwd)"
+
+# Media facts via tools/media_probe.py (cached per path + size + mtime; WAV headers read directly)
+PY="${PYTHON:-python}"; command -v "$PY" >/dev/null 2>&1 || PY=python3
+probe(){ "$PY" "$TOOLS_DIR/media_probe.py" --field "$1" "$2"; }
 
 # --- functions ---
 to_ms(){ awk -v t="$1" 'BEGIN{printf "%.0f", t*1000}' ; }
@@ -22,7 +27,7 @@ from_ms(){ # ms->SRT ts
 }
 
 # --- durations ---
-D_WAV="$(ffprobe -v error -show_entries format=duration -of default=nw=1:nk=1 "$WAV_IN")"
+D_WAV="$(probe duration "$WAV_IN")"
 D_SRT="$(awk '/-->/{t=$3} END{split(t,a,":|,"); print (((a[1]*60+a[2])*60+a[3])*1000+a[4])/1000 }' "$SRT_IN")"
 
 # Avoid div by zero
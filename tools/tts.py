@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# Piper TTS layer: one Piper session for a whole script, exact per-line boundaries.
+#
+# All lines go to a single piper.exe process with --json-input, one {"text", "output_file"}
+# object per line, so the model loads once and every input line becomes its own WAV. The
+# clips are then joined with the wave module (no ffmpeg concat / ffprobe per clip), and the
+# sample offset where each line starts and ends in the joined WAV is recorded exactly.
+# From those offsets we write the sentence-locked SRT (and optionally ASS) plus a timing JSON
+# in the "segments" shape tools/make_sentence_locked_srt.sh already understands.
+#
+#   python tools/tts.py --profile voice/profiles/female-default.env --lines voice/script/x.txt \
+#          --wav voice/wavs/x.wav --srt voice/build/x.sentences.srt [--ass ...] [--rate 0.95]
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import captions as capmod
+
+APP_ROOT = Path(__file__).resolve().parent.parent
+PIPER_EXE = APP_ROOT / "piper" / "piper.exe"
+
+# Minimal ASS shell; the renderer's normalize_ass sets PlayRes and the CenterBox style.
+ASS_HEADER = [
+    "[Script Info]",
+    "ScriptType: v4.00+",
+    "",
+    "[V4+ Styles]",
+    "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, "
+    "Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, "
+    "MarginV, Encoding",
+    "Style: Default,Arial,96,&H00FFFFFF,&H000000FF,&H00000000,&H96000000,0,0,0,0,100,100,0,0,3,0,0,5,140,140,0,1",
+    "",
+    "[Events]",
+    capmod.ASS_EVENT_FORMAT,
+]
+
+
+@dataclass
+class LineSpan:
+    text: str
+    start_sample: int
+    end_sample: int
+
+@dataclass
+class Synthesis:
+    wav: Path
+    sample_rate: int
+    spans: List[LineSpan]
+    fresh: int = 0                                   # lines Piper actually spoke (rest from clip_cache)
+
+    def ms(self, sample: int) -> int:
+        return int(round(sample * 1000.0 / self.sample_rate))
+
+    @property
+    def duration_s(self) -> float:
+        return (self.spans[-1].end_sample / self.sample_rate) if self.spans else 0.0
+
+
+def msys_to_win(path_str: str) -> str:
+    """/c/... → C:\\... on Windows (profiles store Git Bash paths); unchanged elsewhere."""
+    s = (path_str or "").strip()
+    if os.name == "nt" and s.startswith("/") and len(s) > 2 and s[2] == "/":
+        return f"{s[1].upper()}:\\" + s[3:].replace("/", "\\")
+    return s
+
+def load_profile(path: Path) -> Dict[str, str]:
+    needed = {"MODEL_PATH", "CONFIG_PATH", "LENGTH_SCALE", "NOISE_SCALE", "NOISE_W"}
+    env = {}
+    for ln in Path(path).read_text(encoding="utf-8").splitlines():
+        ln = ln.strip()
+        if not ln or ln.startswith("#") or "=" not in ln:
+            continue
+        k, v = ln.split("=", 1)
+        env[k.strip()] = v.strip().strip('"').strip("'")
+    missing = sorted(needed - env.keys())
+    if missing:
+        raise RuntimeError(f"Profile {path} missing keys: {', '.join(missing)}")
+    env["MODEL_PATH"] = msys_to_win(env["MODEL_PATH"])
+    env["CONFIG_PATH"] = msys_to_win(env["CONFIG_PATH"])
+    return env
+
+def piper_exe() -> str:
+    return str(PIPER_EXE) if PIPER_EXE.exists() else (shutil.which("piper") or str(PIPER_EXE))
+
+
+def clip_key(text: str, prof: Dict[str, str], length_scale: str) -> str:
+    """Cache key for one line's clip: everything Piper's output depends on."""
+    parts = (prof["MODEL_PATH"], prof["CONFIG_PATH"], length_scale, prof["NOISE_SCALE"], prof["NOISE_W"], text)
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()[:16]
+
+def _run_piper(items: List[tuple], prof: Dict[str, str], length_scale: str, log=None) -> None:
+    """One Piper session; items are (text, clip_path) pairs."""
+    stdin = "".join(json.dumps({"text": t, "output_file": str(c)}, ensure_ascii=False) + "\n" for t, c in items)
+    create_flags = subprocess.CREATE_NO_WINDOW if os.name == "nt" and hasattr(subprocess, "CREATE_NO_WINDOW") else 0
+    p = subprocess.run(
+        [
+            piper_exe(),
+            "--model", prof["MODEL_PATH"],
+            "--config", prof["CONFIG_PATH"],
+            "--length_scale", length_scale,
+            "--noise_scale", prof["NOISE_SCALE"],
+            "--noise_w", prof["NOISE_W"],
+            "--json-input",
+        ],
+        input=stdin.encode("utf-8"),
+        cwd=str(APP_ROOT),
+        capture_output=True,
+        creationflags=create_flags,
+    )
+    if log:
+        log(p.stderr.decode("utf-8", "replace"))
+    if p.returncode != 0:
+        raise RuntimeError(f"Piper failed (rc={p.returncode}): {p.stderr.decode('utf-8', 'replace').strip()[-400:]}")
+
+def synthesize_lines(lines: List[str], prof: Dict[str, str], out_wav: Path, length_scale: Optional[str] = None,
+                     gap_ms: int = 0, log=None, clip_cache: Optional[Path] = None) -> Synthesis:
+    """Speak every line in one Piper session and join the clips into out_wav.
+
+    length_scale overrides the profile's (e.g. profile LENGTH_SCALE ÷ manifest rate).
+    gap_ms inserts extra silence between lines (Piper already ends each one with
+    --sentence_silence). With clip_cache, each line's clip is kept there under clip_key()
+    and only lines without a cached clip go to Piper (an edit re-speaks just that line).
+    Raises RuntimeError if Piper fails or a line produced no audio.
+    """
+    lines = [ln.strip() for ln in lines if ln.strip()]
+    if not lines:
+        raise ValueError("No lines to synthesize.")
+    out_wav = Path(out_wav)
+    out_wav.parent.mkdir(parents=True, exist_ok=True)
+    ls = length_scale or prof["LENGTH_SCALE"]
+
+    with tempfile.TemporaryDirectory(prefix=f".{out_wav.stem}.tts.", dir=str(out_wav.parent)) as td:
+        if clip_cache is not None:
+            clip_cache = Path(clip_cache)
+            clip_cache.mkdir(parents=True, exist_ok=True)
+            clips = [clip_cache / f"{clip_key(t, prof, ls)}.wav" for t in lines]
+        else:
+            clips = [Path(td) / f"line_{i:03d}.wav" for i in range(1, len(lines) + 1)]
+        todo = [(t, c, Path(td) / f"new_{i:03d}.wav") for i, (t, c) in enumerate(zip(lines, clips)) if not c.exists()]
+        if todo:
+            _run_piper([(t, tmp) for t, _c, tmp in todo], prof, ls, log)
+            for t, c, tmp in todo:
+                if not tmp.exists():
+                    raise RuntimeError(f"Piper produced no audio for line {lines.index(t) + 1}: {t!r}")
+                tmp.replace(c)                      # cache clips appear whole or not at all
+
+        spans, params, pos = [], None, 0
+        tmp_out = out_wav.with_name(f".{out_wav.name}.tmp")
+        with wave.open(str(tmp_out), "wb") as w:
+            for i, (text, clip) in enumerate(zip(lines, clips)):
+                with wave.open(str(clip), "rb") as r:
+                    if params is None:
+                        params = r.getparams()
+                        w.setnchannels(params.nchannels); w.setsampwidth(params.sampwidth); w.setframerate(params.framerate)
+                    elif (r.getnchannels(), r.getsampwidth(), r.getframerate()) != (params.nchannels, params.sampwidth, params.framerate):
+                        raise RuntimeError(f"Line {i + 1}: clip format differs from line 1")
+                    if i and gap_ms > 0:
+                        gap = int(params.framerate * gap_ms / 1000)
+                        w.writeframes(b"\x00" * gap * params.nchannels * params.sampwidth)
+                        pos += gap
+                    frames = r.readframes(r.getnframes())
+                    n = len(frames) // (params.nchannels * params.sampwidth)
+                    w.writeframes(frames)
+                    spans.append(LineSpan(text, pos, pos + n))
+                    pos += n
+        tmp_out.replace(out_wav)
+    return Synthesis(out_wav, params.framerate, spans, fresh=len(todo))
+
+
+def to_captions(syn: Synthesis, fmt: str = "srt") -> capmod.Captions:
+    """Back-to-back cues on the audio clock: each line from its first to its last sample."""
+    caps = capmod.Captions(fmt, header=list(ASS_HEADER) if fmt == "ass" else [])
+    for sp in syn.spans:
+        text = caps.make_text([sp.text])
+        caps.cues.append(capmod.Cue(syn.ms(sp.start_sample), syn.ms(sp.end_sample), text))
+    return caps
+
+def write_timing(syn: Synthesis, path: Path) -> None:
+    data = {
+        "sample_rate": syn.sample_rate,
+        "segments": [
+            {"start": sp.start_sample / syn.sample_rate, "end": sp.end_sample / syn.sample_rate,
+             "start_sample": sp.start_sample, "end_sample": sp.end_sample, "text": sp.text}
+            for sp in syn.spans
+        ],
+    }
+    Path(path).write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Synthesize a script in one Piper session with exact per-line timing.")
+    ap.add_argument("--profile", required=True, help="voice/profiles/*.env")
+    ap.add_argument("--lines", required=True, help="text file, one caption line per line")
+    ap.add_argument("--wav", required=True)
+    ap.add_argument("--srt", default="")
+    ap.add_argument("--ass", default="")
+    ap.add_argument("--timing", default="", help="segments JSON (make_sentence_locked_srt.sh format)")
+    ap.add_argument("--rate", type=float, default=1.0, help="manifest rate; length_scale = profile ÷ rate")
+    ap.add_argument("--gap-ms", type=int, default=0)
+    ap.add_argument("--clip-cache", default="", help="keep per-line clips here; only new/edited lines are spoken")
+    a = ap.parse_args()
+
+    prof = load_profile(Path(a.profile))
+    lines = Path(a.lines).read_text(encoding="utf-8").splitlines()
+    ls = f"{float(prof['LENGTH_SCALE']) / max(0.25, a.rate):.3f}" if a.rate != 1.0 else None
+    syn = synthesize_lines(lines, prof, Path(a.wav), length_scale=ls, gap_ms=a.gap_ms,
+                           clip_cache=Path(a.clip_cache) if a.clip_cache else None)
+    print(f"[tts] {len(syn.spans)} line(s) ({syn.fresh} spoken), {syn.duration_s:.2f}s @ {syn.sample_rate} Hz → {syn.wav}")
+    if a.srt:
+        capmod.write_captions(to_captions(syn, "srt"), Path(a.srt)); print(f"[tts] SRT → {a.srt}")
+    if a.ass:
+        capmod.write_captions(to_captions(syn, "ass"), Path(a.ass)); print(f"[tts] ASS → {a.ass}")
+    if a.timing:
+        write_timing(syn, Path(a.timing)); print(f"[tts] timing → {a.timing}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
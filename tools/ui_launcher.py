@@ -2,20 +2,22 @@
 # TVOCA — Text → Voice → Captions → Video (Single-Screen Launcher)
 # Flow:
 #   UI text/JSON → WAV (piper profile) → SRT →
-#   render_swp_unified.sh (ASS normalize/repair + CenterBox → burn)
+#   render_unified.py (ASS normalize/repair + CenterBox → burn)
 #
 # Modes:
 #  A) Autosync mode (default): json_to_srt → unified renderer with AUTOSYNC/TEMPO_MATCH/ONSET on.
-#  B) Sentence-locked mode (audio-driven): one TTS clip per input line, SRT built from real clip
-#     durations, then clips concatenated into final WAV; AUTOSYNC=0 TEMPO_MATCH=0 AUTO_ONSET_ALIGN=0
+#  B) Sentence-locked mode (audio-driven): one Piper session, one clip per input line, joined into
+#     the final WAV with SRT cues at the exact line offsets; AUTOSYNC=0 TEMPO_MATCH=0 AUTO_ONSET_ALIGN=0
 #     APPLY_SHIFT_TO_AUDIO=0. Each line = one sentence/frame.
 #
 # Poster button uses Open-Title + Font size + Output Size + Emotion BG.
 # IMPORTANT: For video renders we FORCE TOP_BANNER='' (no title over captions).
 
+import collections
 import json
 import os
 import queue
+import re
 import shutil
 import subprocess
 import sys
@@ -24,6 +26,10 @@ from pathlib import Path
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
+import asset_index
+import captions as capmod
+import tts
+
 APP_ROOT = Path(__file__).resolve().parent.parent
 TOOLS_DIR = APP_ROOT / "tools"
 ASSETS_BG_DIR = APP_ROOT / "assets" / "bg"        # 1080x1920 (vertical)
@@ -34,10 +40,12 @@ VOICE_BUILD_DIR = APP_ROOT / "voice" / "build"
 VOICE_WAVS_DIR = APP_ROOT / "voice" / "wavs"
 VOICE_PROFILES_DIR = APP_ROOT / "voice" / "profiles"
 VOICE_SCRIPT_DIR = APP_ROOT / "voice" / "script"   # for sentence-locked input lines
+VOICE_LOGS_DIR = VOICE_BUILD_DIR / "logs"          # full render logs (the UI pane keeps only a tail)
+VOICE_MANIFEST = APP_ROOT / "voice" / "manifest.json"  # per-emotion rate / pitch_semitones
 
 PIPER_EXE = APP_ROOT / "piper" / "piper.exe"
 MAKE_POSTER = TOOLS_DIR / "make_title_poster.sh"
-RENDER_UNIFIED = TOOLS_DIR / "render_swp_unified.sh"
+RENDER_PY = TOOLS_DIR / "render_unified.py"
 
 def _resolve_json_to_srt() -> Path:
     candidates = [
@@ -57,6 +65,13 @@ JF_GOLD   = "#e6b800"
 JF_BG     = "#f8f7fb"
 JF_TEXT   = "#1a1a1a"
 
+# Log pane: bounded ring buffer + batched inserts (full log goes to VOICE_LOGS_DIR)
+LOG_PANE_MAX_LINES = 2000
+LOG_DRAIN_MS = 80
+
+# ffmpeg "-progress pipe:1" emits blocks of key=value lines ending with progress=continue|end
+FFMPEG_PROGRESS_RE = re.compile(r"^(frame|fps|bitrate|total_size|out_time_us|out_time_ms|out_time|dup_frames|drop_frames|speed|progress|stream_\d+_\d+_q)=(.*)$")
+
 # Emotions (ensure PNGs exist in assets/bg/*.png and assets/bg_h/*.png)
 EMOTIONS = [
     "ANGER", "ANXIETY", "DESPAIR", "FEAR", "FINANCIAL_TRIALS",
@@ -100,17 +115,6 @@ def _detect_git_bash_path() -> str:
         pass
     return "bash"
 
-def norm_path_for_bash(p: Path) -> str:
-    s = str(p)
-    if os.name == "nt":
-        drive, tail = os.path.splitdrive(s)
-        if drive:
-            drive_letter = drive[0].lower()
-            tail = tail.replace("\\", "/").lstrip("\\/")
-            return f"/{drive_letter}/{tail}"
-        return s.replace("\\", "/")
-    return s
-
 def msys_to_win(path_str: str) -> str:
     """Convert /c/... to C:\\...; leave Win paths unchanged."""
     if not path_str:
@@ -131,6 +135,7 @@ def ensure_dirs():
     VOICE_BUILD_DIR.mkdir(parents=True, exist_ok=True)
     VOICE_WAVS_DIR.mkdir(parents=True, exist_ok=True)
     VOICE_SCRIPT_DIR.mkdir(parents=True, exist_ok=True)
+    VOICE_LOGS_DIR.mkdir(parents=True, exist_ok=True)
 
 def load_profile_env(path: Path) -> dict:
     needed = {"MODEL_PATH", "CONFIG_PATH", "LENGTH_SCALE", "NOISE_SCALE", "NOISE_W"}
@@ -151,6 +156,42 @@ def load_profile_env(path: Path) -> dict:
     env["CONFIG_PATH"] = msys_to_win(env["CONFIG_PATH"])
     return env
 
+def manifest_voice_params(emotion: str) -> tuple:
+    """(rate, pitch_semitones) for an emotion from voice/manifest.json; defaults when unlisted."""
+    try:
+        m = json.loads(VOICE_MANIFEST.read_text(encoding="utf-8"))
+    except Exception:
+        return 1.0, 0.0
+    e = m.get("map", {}).get((emotion or "").strip().lower().replace(" ", "_"), {})
+    rate = float(e.get("rate", m.get("default_rate", 1.0)) or 1.0)
+    pitch = float(e.get("pitch_semitones", m.get("default_pitch_semitones", 0)) or 0.0)
+    return rate, pitch
+
+def effective_length_scale(prof: dict, rate: float) -> str:
+    """Manifest rate → Piper --length_scale (rate 0.9 = 10% slower = longer phonemes), so no
+    time-stretch pass is needed after synthesis."""
+    return f"{float(prof['LENGTH_SCALE']) / max(0.25, rate):.3f}"
+
+def parse_ffmpeg_progress(block: dict, total_s: float) -> dict:
+    """Turn one ffmpeg -progress block into {pct, fps, speed, eta_s, done} (values may be None)."""
+    def _f(key):
+        try:
+            return float(str(block.get(key, "")).strip().rstrip("x"))
+        except ValueError:
+            return None
+    out_us = _f("out_time_us")
+    if out_us is None:
+        out_us = _f("out_time_ms")  # ffmpeg reports microseconds here too
+    t = (out_us / 1_000_000.0) if out_us is not None and out_us >= 0 else None
+    speed = _f("speed")
+    pct = eta = None
+    if t is not None and total_s > 0:
+        pct = max(0.0, min(100.0, 100.0 * t / total_s))
+        if speed and speed > 0:
+            eta = max(0.0, (total_s - t) / speed)
+    return {"pct": pct, "fps": _f("fps"), "speed": speed, "eta_s": eta,
+            "done": block.get("progress") == "end"}
+
 def build_text_from_json(json_path: Path) -> str:
     d = json.loads(json_path.read_text(encoding="utf-8"))
     lines = d.get("lines", [])
@@ -189,6 +230,7 @@ class Launcher(tk.Tk):
         self.var_emotion = tk.StringVar(value=EMOTIONS[0])
         self.var_lang = tk.StringVar(value=LANGS[0])
         self.var_size = tk.StringVar(value="1080x1920")   # Default = Shorts (vertical)
+        self.var_bg_variant = tk.StringVar(value="auto")  # "auto" or "<variant>: <assets path>" from the asset index
         self.var_font_size = tk.IntVar(value=120)         # caption/poster font size
         self.var_caption_shift = tk.IntVar(value=-500)    # captions lead audio (ms); negative = earlier
         self.var_verse = tk.StringVar(value="")
@@ -201,9 +243,14 @@ class Launcher(tk.Tk):
         self.var_sentence_locked = tk.BooleanVar(value=False)
         self.var_gap_ms = tk.IntVar(value=180)            # kept for UI; not used in audio-driven mode
         self.var_min_ms = tk.IntVar(value=1000)           # kept for UI; not used in audio-driven mode
+        # Preview (quarter-res, reuses the synced captions/voice of the last Start)
+        self.var_preview_start = tk.DoubleVar(value=0.0)  # seconds
+        self.var_preview_dur = tk.DoubleVar(value=4.0)    # seconds; 0 = whole video
 
         for v in (self.var_voice, self.var_emotion, self.var_lang):
             v.trace_add("write", lambda *_: self._maybe_auto_title())
+        for v in (self.var_emotion, self.var_size):
+            v.trace_add("write", lambda *_: self.var_bg_variant.set("auto"))
 
         self._build_ui()
 
@@ -211,6 +258,8 @@ class Launcher(tk.Tk):
         self.log_queue = queue.Queue()
         self.log_thread = None
         self._stop_reader = threading.Event()
+        self.progress_queue = queue.Queue()
+        self.log_file_path = None
 
         self._maybe_auto_title(force=True)
 
@@ -287,6 +336,12 @@ class Launcher(tk.Tk):
         self._lbl(row3, "Output base name:").pack(side="left")
         self._entry(row3, self.var_title, 40).pack(side="left", padx=(6, 20))
 
+        # Background variant (numbered files like "Fear 2.png" and tagged exports; list filled on open)
+        self._lbl(row3, "Background:").pack(side="left")
+        bg_combo = self._combo(row3, self.var_bg_variant, ["auto"], 40)
+        bg_combo.configure(postcommand=lambda: bg_combo.configure(values=self._bg_variant_choices()))
+        bg_combo.pack(side="left", padx=(6, 20))
+
         # Row 4 — Open-Title (POSTER ONLY) + Poster button
         row4 = tk.Frame(frm, bg="white"); row4.pack(fill="x", pady=(2, 6))
         self._lbl(row4, "Open-title (for Poster only):").pack(side="left")
@@ -331,6 +386,13 @@ class Launcher(tk.Tk):
         self._btn(bot, "Open Output Folder", self.open_out_dir).pack(side="left", padx=6)
         self._btn(bot, "Stop", self.on_stop, danger=True).pack(side="left", padx=6)
 
+        self._lbl(bot, "Preview from(s):").pack(side="left", padx=(24,0))
+        self._entry(bot, self.var_preview_start, 5).pack(side="left", padx=(4,0))
+        self._lbl(bot, "for(s):").pack(side="left", padx=(8,0))
+        self._entry(bot, self.var_preview_dur, 5).pack(side="left", padx=(4,0))
+        self._btn(bot, "Preview", self.on_preview).pack(side="left", padx=(8,0))
+        self._btn(bot, "Contact Sheet", self.on_contact_sheet).pack(side="left", padx=(6,0))
+
         # Logs
         log_frame = tk.LabelFrame(card, text="Build logs (streamed)", bg="white", fg=JF_TEXT, labelanchor="nw")
         log_frame.configure(highlightbackground="#efeaf7", highlightthickness=1)
@@ -340,6 +402,11 @@ class Launcher(tk.Tk):
         self._btn(tools_line, "Copy Logs", self.copy_logs).pack(side="left")
         self._btn(tools_line, "Clear Logs", self.clear_logs).pack(side="left", padx=(6,0))
 
+        self.var_progress = tk.DoubleVar(value=0.0)
+        self.var_progress_text = tk.StringVar(value="")
+        ttk.Progressbar(tools_line, variable=self.var_progress, maximum=100.0, length=260, mode="determinate").pack(side="left", padx=(18,0))
+        tk.Label(tools_line, textvariable=self.var_progress_text, bg="white", fg=JF_TEXT, font=("Segoe UI", 9)).pack(side="left", padx=(8,0))
+
         self.log = tk.Text(log_frame, height=14, wrap="none", state="disabled", bg="#0f0f12", fg="#e6e6e6", insertbackground="#e6e6e6")
         self.log.pack(fill="both", expand=True, padx=6, pady=6)
         self.after(100, self._drain_log_queue)
@@ -452,7 +519,7 @@ class Launcher(tk.Tk):
 
         # Preflight (local binaries/scripts)
         missing = []
-        for p in [PIPER_EXE, JSON_TO_SRT, RENDER_UNIFIED]:
+        for p in [PIPER_EXE, JSON_TO_SRT, RENDER_PY]:
             if not p.exists():
                 missing.append(str(p))
         if missing:
@@ -495,26 +562,7 @@ class Launcher(tk.Tk):
         out_mp4 = out_dir / (f"{base}_VERTICAL_BOXED.mp4" if size_sel == "1080x1920" else f"{base}_HORIZONTAL_1080p.mp4")
 
         # Background selection (format-aware, with fallback)
-        emotion_key = (self.var_emotion.get() or "").strip()
-        emotion_up = emotion_key.upper().replace(" ", "_")
-        emotion_lc = emotion_key.lower().replace(" ", "_")
-
-        bg_dir = ASSETS_BG_DIR if size_sel == "1080x1920" else ASSETS_BG_H_DIR
-        candidates = [
-            bg_dir / f"{emotion_up}.png",
-            bg_dir / f"{emotion_lc}.png",
-        ]
-        if size_sel != "1080x1920":  # horizontal: fallback to vertical if missing
-            candidates += [
-                ASSETS_BG_DIR / f"{emotion_up}.png",
-                ASSETS_BG_DIR / f"{emotion_lc}.png",
-            ]
-        bg_png = next((p for p in candidates if p.exists()), candidates[0])
-        if not bg_png.exists():
-            self._log(f"[warn] Background image not found: tried {', '.join(str(p) for p in candidates)}\n"
-                      "Continuing anyway (ffmpeg will fail if truly missing)…\n")
-        else:
-            self._log(f"[bg] Using background: {bg_png}\n")
+        bg_png = self._background_for_render(size_sel)
 
         # Voice profile
         voice_label = self.var_voice.get().strip().upper()
@@ -526,17 +574,19 @@ class Launcher(tk.Tk):
             prof = load_profile_env(profile_path)
         except Exception as e:
             messagebox.showerror("Profile error", str(e)); return
+        rate, _pitch = manifest_voice_params(self.var_emotion.get())
+        length_scale = effective_length_scale(prof, rate)
+        if rate != 1.0:
+            self._log(f"[voice] manifest rate {rate:g} → length_scale {prof['LENGTH_SCALE']} → {length_scale}\n")
 
         sentence_locked = self.var_sentence_locked.get()
         bash_path = _detect_git_bash_path()
 
         if sentence_locked:
-            # Sentence-locked mode (audio-driven, one clip per line):
+            # Sentence-locked mode (audio-driven, one Piper session, see tools/tts.py):
             # 1) Save textarea lines to voice/script/<base>.txt
-            # 2) For each line: TTS → clip WAV (selected profile)
-            # 3) Use ffprobe to measure each clip duration
-            # 4) Build SRT from cumulative durations
-            # 5) Concatenate clips → final wav_path
+            # 2) TTS all lines at once → one clip per line, joined into wav_path
+            # 3) Build SRT from the exact sample offsets of each line (audio is the clock)
             lines_text = self.txt.get("1.0", "end").strip()
             if not lines_text:
                 messagebox.showerror("No lines", "Sentence-locked mode requires lines in the Script text box.")
@@ -551,143 +601,25 @@ class Launcher(tk.Tk):
                 messagebox.showerror("No lines", "Sentence-locked mode found no non-empty lines.")
                 return
 
-            # Output SRT path and clips dir
+            # One Piper session for all lines; SRT from exact per-line sample offsets
             srt_path = VOICE_BUILD_DIR / f"{base}.sentences.srt"
-            clips_dir = VOICE_WAVS_DIR / f"{base}_clips"
+            timing_path = VOICE_BUILD_DIR / f"{base}.sentences.timing.json"
+            self._log(f"[tts-sentence] {voice_label}: {len(lines)} line(s) in one Piper session → {wav_path}\n")
             try:
-                clips_dir.mkdir(parents=True, exist_ok=True)
+                syn = tts.synthesize_lines(lines, prof, wav_path, length_scale=length_scale, log=self._log)
             except Exception as e:
-                messagebox.showerror("Path error", f"Could not create clips directory:\n{clips_dir}\n{e}")
+                messagebox.showerror("Piper error", f"Sentence-locked TTS failed:\n{e}")
                 return
+            self._log(f"[tts-sentence] Built {len(syn.spans)} lines, total audio {syn.duration_s:.2f}s\n")
 
-            durations = []   # seconds per clip
-            clip_paths = []
-            total_sec = 0.0
-
-            for idx, line in enumerate(lines, start=1):
-                clip_path = clips_dir / f"{base}_clip_{idx:03d}.wav"
-                self._log(f"[tts-sentence] {voice_label} line {idx}: {clip_path}\n")
-                try:
-                    create_flags = 0
-                    if os.name == "nt" and hasattr(subprocess, "CREATE_NO_WINDOW"):
-                        create_flags = subprocess.CREATE_NO_WINDOW
-                    p_clip = subprocess.run(
-                        [
-                            str(PIPER_EXE),
-                            "--model", prof["MODEL_PATH"],
-                            "--config", prof["CONFIG_PATH"],
-                            "--length_scale", prof["LENGTH_SCALE"],
-                            "--noise_scale", prof["NOISE_SCALE"],
-                            "--noise_w", prof["NOISE_W"],
-                            "--output_file", str(clip_path),
-                        ],
-                        input=line,
-                        text=True,
-                        cwd=str(APP_ROOT),
-                        capture_output=True,
-                        creationflags=create_flags,
-                    )
-                    self._log(p_clip.stdout or "")
-                    if p_clip.returncode != 0:
-                        self._log(p_clip.stderr or "")
-                        messagebox.showerror("Piper error", f"Piper failed on line {idx} (rc={p_clip.returncode}). See logs.")
-                        return
-                except Exception as e:
-                    messagebox.showerror("Piper launch error", f"Line {idx}: {e}")
-                    return
-
-                # Measure duration of this clip via ffprobe
-                try:
-                    p_probe = subprocess.run(
-                        [
-                            "ffprobe",
-                            "-v", "error",
-                            "-select_streams", "a:0",
-                            "-show_entries", "stream=duration",
-                            "-of", "default=nw=1:nk=1",
-                            str(clip_path),
-                        ],
-                        cwd=str(APP_ROOT),
-                        capture_output=True,
-                        text=True,
-                    )
-                    if p_probe.returncode != 0 or not (p_probe.stdout or "").strip():
-                        self._log(p_probe.stderr or "")
-                        messagebox.showerror("ffprobe error", f"Could not read duration for {clip_path}.")
-                        return
-                    dur_sec = float((p_probe.stdout or "").strip())
-                except Exception as e:
-                    messagebox.showerror("ffprobe error", f"Line {idx}: {e}")
-                    return
-
-                durations.append(dur_sec)
-                clip_paths.append(clip_path)
-                total_sec += dur_sec
-
-            self._log(f"[tts-sentence] Built {len(lines)} clips, total audio ~{total_sec:.2f}s\n")
-
-            # Helper to format seconds as SRT timestamp
-            def _sec_to_srt_time(sec: float) -> str:
-                if sec < 0.0:
-                    sec = 0.0
-                ms = int(round(sec * 1000.0))
-                cs = ms % 1000
-                s = (ms // 1000) % 60
-                m = (ms // 60000) % 60
-                h = ms // 3600000
-                return f"{h:02d}:{m:02d}:{s:02d},{cs:03d}"
-
-            # Build SRT using cumulative durations (audio is the clock)
             try:
-                cur = 0.0
-                with srt_path.open("w", encoding="utf-8", newline="\n") as f:
-                    for idx, (line, dur) in enumerate(zip(lines, durations), start=1):
-                        start = cur
-                        end = cur + max(0.0, dur)
-                        f.write(f"{idx}\n")
-                        f.write(f"{_sec_to_srt_time(start)} --> {_sec_to_srt_time(end)}\n")
-                        f.write(line.strip() + "\n\n")
-                        cur = end
+                capmod.write_captions(tts.to_captions(syn, "srt"), srt_path)
+                tts.write_timing(syn, timing_path)
                 self._log(f"[srt-sentences] Wrote SRT: {srt_path}\n")
             except Exception as e:
                 messagebox.showerror("SRT error", f"Could not write SRT:\n{e}")
                 return
 
-            # Concatenate all clips into final wav_path
-            concat_list = clips_dir / "concat.txt"
-            try:
-                with concat_list.open("w", encoding="utf-8") as f:
-                    for cp in clip_paths:
-                        f.write(f"file '{str(cp)}'\n")
-
-                create_flags = 0
-                if os.name == "nt" and hasattr(subprocess, "CREATE_NO_WINDOW"):
-                    create_flags = subprocess.CREATE_NO_WINDOW
-                p_cat = subprocess.run(
-                    [
-                        "ffmpeg",
-                        "-y",
-                        "-f", "concat",
-                        "-safe", "0",
-                        "-i", str(concat_list),
-                        "-c", "copy",
-                        str(wav_path),
-                    ],
-                    cwd=str(APP_ROOT),
-                    capture_output=True,
-                    text=True,
-                    creationflags=create_flags,
-                )
-                self._log(p_cat.stdout or "")
-                if p_cat.returncode != 0:
-                    self._log(p_cat.stderr or "")
-                    messagebox.showerror("Concat error", f"ffmpeg concat failed (rc={p_cat.returncode}). See logs.")
-                    return
-                self._log(f"[wav-sentences] Concatenated WAV: {wav_path}\n")
-            except Exception as e:
-                messagebox.showerror("Concat error", str(e))
-                return
-
         else:
             # Autosync mode: 1) full WAV via Piper (from JSON), 2) json_to_srt
             try:
@@ -706,7 +638,7 @@ class Launcher(tk.Tk):
                         str(PIPER_EXE),
                         "--model", prof["MODEL_PATH"],
                         "--config", prof["CONFIG_PATH"],
-                        "--length_scale", prof["LENGTH_SCALE"],
+                        "--length_scale", length_scale,
                         "--noise_scale", prof["NOISE_SCALE"],
                         "--noise_w", prof["NOISE_W"],
                         "--output_file", str(wav_path),
@@ -754,12 +686,75 @@ class Launcher(tk.Tk):
                 self._log(f"[warn] normalize failed: {e}\n")
 
         # 3) Render MP4 with unified renderer
-        # Paths → bash form
-        b_bg   = norm_path_for_bash(bg_png)
-        b_wav  = norm_path_for_bash(wav_path)
-        b_srt  = norm_path_for_bash(srt_path)
-        b_out  = norm_path_for_bash(out_mp4)
+        env = self._render_env(sentence_locked)
+        self._launch_render(size_sel, bg_png, wav_path, srt_path, out_mp4, env, base)
 
+    # --- Preview (quarter-res, reuses last Start's WAV/SRT and the renderer's sync cache) ---
+    def on_preview(self):
+        self._start_preview(sheet=False)
+
+    def on_contact_sheet(self):
+        self._start_preview(sheet=True)
+
+    def _start_preview(self, sheet: bool):
+        if self.proc and self.proc.poll() is None:
+            messagebox.showwarning("Busy", "A build is already running. Stop it first or wait for it to finish.")
+            return
+        size_sel = (self.var_size.get() or "1080x1920").strip()
+        base = self.var_title.get().strip()
+        sentence_locked = self.var_sentence_locked.get()
+        wav_path = VOICE_WAVS_DIR / f"{base}.wav"
+        srt_path = VOICE_BUILD_DIR / (f"{base}.sentences.srt" if sentence_locked else f"{base}.srt")
+        if not wav_path.exists() or not srt_path.exists():
+            messagebox.showinfo("Nothing to preview", f"Click Start once for “{base}” first; preview reuses its voice and captions.\n\n{wav_path}\n{srt_path}")
+            return
+
+        out_dir = Path(self.var_out_dir.get().strip() or OUT_DEFAULT); out_dir.mkdir(parents=True, exist_ok=True)
+        env = self._render_env(sentence_locked)
+        env["PREVIEW"] = "1"
+        if sheet:
+            env["PREVIEW_SHEET"] = "1"
+            out_path = out_dir / f"{base}_PREVIEW_SHEET.png"
+        else:
+            try:
+                start = max(0.0, float(self.var_preview_start.get()))
+                dur = max(0.0, float(self.var_preview_dur.get()))
+            except Exception:
+                start, dur = 0.0, 4.0
+            env["PREVIEW_START"] = f"{start:.3f}"
+            if dur > 0:
+                env["PREVIEW_DUR"] = f"{dur:.3f}"
+            out_path = out_dir / f"{base}_PREVIEW.mp4"
+        self._launch_render(size_sel, self._background_for_render(size_sel), wav_path, srt_path, out_path, env, base, open_when_done=True)
+
+    def _bg_variant_choices(self) -> list:
+        emotion_lc = (self.var_emotion.get() or "").strip().lower().replace(" ", "_")
+        hits = asset_index.load(refresh=True).variants(emotion_lc, self.var_size.get())
+        return ["auto"] + [f"{a.variant}: {a.rel}" for a in hits]
+
+    def _find_background(self, size_sel: str):
+        """Emotion background for the size from the asset index: the Background variant if one is picked,
+        else the best plate (horizontal falls back to the vertical set). Returns (asset | None, fallback path)."""
+        emotion_lc = (self.var_emotion.get() or "").strip().lower().replace(" ", "_")
+        index = asset_index.load(refresh=True)                  # once per render/poster
+        pick = self.var_bg_variant.get().split(": ", 1)
+        hit = index.assets.get(pick[1]) if len(pick) == 2 else None
+        hit = hit or asset_index.find_background(emotion_lc, size_sel, index)
+        bg_dir = ASSETS_BG_DIR if size_sel == "1080x1920" else ASSETS_BG_H_DIR
+        return hit, bg_dir / f"{emotion_lc}.png"
+
+    def _background_for_render(self, size_sel: str) -> Path:
+        hit, fallback = self._find_background(size_sel)
+        if hit is None:
+            self._log(f"[warn] No background indexed for {self.var_emotion.get()} at {size_sel} (assets/bg*, "
+                      f"assets/bg_tags.json); trying {fallback} (ffmpeg will fail if truly missing)…\n")
+            return fallback
+        fit = "exact size, no scaling" if hit.matches(size_sel) else f"{hit.width}x{hit.height}, scaled"
+        luma = f", CenterBox luma {hit.center_luma:.2f}" if hit.center_luma is not None else ""
+        self._log(f"[bg] Using background: {hit.path} ({fit}{luma})\n")
+        return hit.path
+
+    def _render_env(self, sentence_locked: bool) -> dict:
         # Font size
         try:
             fs = int(self.var_font_size.get() or 120)
@@ -776,6 +771,10 @@ class Launcher(tk.Tk):
         env["FONT_SIZE"] = str(fs)
         env["CAPTION_SHIFT_MS"] = str(lead)
         env["TOP_BANNER"] = ""  # ensure no in-video title
+        env["FFMPEG_PROGRESS"] = "1"  # key=value progress → progress bar (see _reader_thread_with_done)
+        _rate, pitch = manifest_voice_params(self.var_emotion.get())
+        env["PITCH_SEMITONES"] = f"{pitch:g}"  # applied inside the burn's audio filtergraph
+        env["EMOTION"] = self.var_emotion.get()  # per-emotion music bed (voice/manifest.json, assets/music)
 
         if sentence_locked:
             # Hard-off all autosync/tempo/onset adjustments
@@ -789,27 +788,41 @@ class Launcher(tk.Tk):
             env["TEMPO_MATCH"] = "1"
             env["AUTO_ONSET_ALIGN"] = "1"
             env["APPLY_SHIFT_TO_AUDIO"] = "1"
+        return env
 
-        size_arg = f"--size={size_sel}"
-        cmd = f'"{norm_path_for_bash(RENDER_UNIFIED)}" {size_arg} "{b_bg}" "{b_wav}" "{b_srt}" "{b_out}"'
-        self._log(f"[render] {cmd}\n")
+    def _launch_render(self, size_sel: str, bg_png: Path, wav_path: Path, srt_path: Path, out_path: Path,
+                       env: dict, base: str, open_when_done: bool = False):
+        # Python orchestrator, native paths (no bash hop; it only spawns ffmpeg itself)
+        py = sys.executable.replace("pythonw.exe", "python.exe")
+        cmd = [py, "-u", str(RENDER_PY), f"--size={size_sel}", str(bg_png), str(wav_path), str(srt_path), str(out_path)]
+        self._log(f"[render] {subprocess.list2cmdline(cmd)}\n")
+        env = dict(env, PYTHONIOENCODING="utf-8")
 
         try:
             self._stop_reader.clear()
+            create_flags = 0
+            if os.name == "nt" and hasattr(subprocess, "CREATE_NO_WINDOW"):
+                create_flags = subprocess.CREATE_NO_WINDOW
             self.proc = subprocess.Popen(
-                [_detect_git_bash_path(), "-lc", cmd],
+                cmd,
                 cwd=str(APP_ROOT),
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
                 universal_newlines=True,
+                encoding="utf-8",
+                errors="replace",
                 bufsize=1,
-                env=env
+                env=env,
+                creationflags=create_flags,
             )
         except Exception as e:
             messagebox.showerror("Render launch error", str(e))
             return
 
-        self.log_thread = threading.Thread(target=self._reader_thread_with_done, args=(out_mp4,), daemon=True)
+        self.log_file_path = VOICE_LOGS_DIR / f"{base}.render.log"
+        self._log(f"[log] Full render log: {self.log_file_path}\n")
+        self.var_progress.set(0.0); self.var_progress_text.set("")
+        self.log_thread = threading.Thread(target=self._reader_thread_with_done, args=(out_path, self.log_file_path, open_when_done), daemon=True)
         self.log_thread.start()
 
     # --- Poster generator (Open-Title + Font size + Output Size + Emotion BG) ---
@@ -826,27 +839,13 @@ class Launcher(tk.Tk):
         if size_sel == "1080x1920":
             w, h = 1080, 1920
             poster_path = out_dir / f"{base}_VERTICAL_POSTER.png"
-            bg_dir = ASSETS_BG_DIR
         else:
             w, h = 1920, 1080
             poster_path = out_dir / f"{base}_HORIZONTAL_POSTER.png"
-            bg_dir = ASSETS_BG_H_DIR
 
         # Resolve emotion background (with fallback across cases and, for H, fallback to V set)
-        emotion_key = (self.var_emotion.get() or "").strip()
-        emotion_up = emotion_key.upper().replace(" ", "_")
-        emotion_lc = emotion_key.lower().replace(" ", "_")
-
-        candidates = [
-            bg_dir / f"{emotion_up}.png",
-            bg_dir / f"{emotion_lc}.png",
-        ]
-        if size_sel != "1080x1920":
-            candidates += [
-                ASSETS_BG_DIR / f"{emotion_up}.png",
-                ASSETS_BG_DIR / f"{emotion_lc}.png",
-            ]
-        bg_png = next((p for p in candidates if p.exists()), None)
+        hit, _ = self._find_background(size_sel)
+        bg_png = hit.path if hit else None
         if bg_png and bg_png.exists():
             self._log(f"[poster-bg] Using background: {bg_png}\n")
         else:
@@ -907,31 +906,88 @@ class Launcher(tk.Tk):
         else:
             self._log("[info] No running process to stop.\n")
 
-    def _reader_thread_with_done(self, out_mp4: Path):
+    def _reader_thread_with_done(self, out_mp4: Path, log_path: Path, open_when_done: bool = False):
+        # Every line goes to the on-disk log; ffmpeg progress blocks are parsed here and only
+        # the summary reaches the UI, so the Tk thread never sees per-frame chatter.
         if not self.proc or not self.proc.stdout: return
-        for line in self.proc.stdout:
-            self.log_queue.put(line)
-            if self._stop_reader.is_set(): break
-        rc = self.proc.wait()
+        total_s = 0.0
+        block = {}
+        with open(log_path, "w", encoding="utf-8", errors="replace") as log_fh:
+            for line in self.proc.stdout:
+                log_fh.write(line)
+                m = FFMPEG_PROGRESS_RE.match(line.strip())
+                if m:
+                    block[m.group(1)] = m.group(2)
+                    if m.group(1) == "progress":
+                        self.progress_queue.put(parse_ffmpeg_progress(block, total_s)); block = {}
+                elif line.startswith("[progress] cached="):
+                    self.progress_queue.put({"pct": 100.0, "fps": None, "speed": None, "eta_s": None,
+                                             "done": True, "cached": True})
+                elif line.startswith("[progress] duration_s="):
+                    try:
+                        total_s = float(line.split("=", 1)[1].strip() or 0)
+                    except ValueError:
+                        total_s = 0.0
+                else:
+                    self.log_queue.put(line)
+                if self._stop_reader.is_set(): break
+            rc = self.proc.wait()
+            log_fh.write(f"\n[done] Render exited with code {rc}\n")
         self.log_queue.put(f"\n[done] Render exited with code {rc}\n")
         if rc == 0:
             self.log_queue.put(f"[OK] Rendered: {out_mp4}\n")
+            if open_when_done and os.name == "nt":
+                try:
+                    os.startfile(str(out_mp4))  # type: ignore[attr-defined]
+                except Exception:
+                    pass
 
     def _drain_log_queue(self):
+        # Batch everything queued since the last tick into one insert, keeping only the
+        # newest LOG_PANE_MAX_LINES lines (older ones are on disk).
+        pending = collections.deque(maxlen=LOG_PANE_MAX_LINES)
         try:
             while True:
-                line = self.log_queue.get_nowait(); self._log(line)
+                pending.append(self.log_queue.get_nowait())
         except queue.Empty:
             pass
-        self.after(80, self._drain_log_queue)
+        if pending:
+            self._log("".join(pending))
+        prog = None
+        try:
+            while True:
+                prog = self.progress_queue.get_nowait()
+        except queue.Empty:
+            pass
+        if prog:
+            self._show_progress(prog)
+        self.after(LOG_DRAIN_MS, self._drain_log_queue)
+
+    def _show_progress(self, prog: dict):
+        if prog["done"]:
+            self.var_progress.set(100.0)
+            self.var_progress_text.set("video layer cached" if prog.get("cached") else "encode done"); return
+        parts = []
+        if prog["pct"] is not None:
+            self.var_progress.set(prog["pct"]); parts.append(f"{prog['pct']:.0f}%")
+        if prog["fps"] is not None:
+            parts.append(f"{prog['fps']:.0f} fps")
+        if prog["eta_s"] is not None:
+            parts.append(f"ETA {int(prog['eta_s']) // 60}:{int(prog['eta_s']) % 60:02d}")
+        self.var_progress_text.set("  ·  ".join(parts))
 
     def _log(self, text: str):
-        self.log.configure(state="normal"); self.log.insert("end", text); self.log.see("end"); self.log.configure(state="disabled")
+        self.log.configure(state="normal")
+        self.log.insert("end", text)
+        excess = int(self.log.index("end-1c").split(".")[0]) - LOG_PANE_MAX_LINES
+        if excess > 0:
+            self.log.delete("1.0", f"{excess + 1}.0")
+        self.log.see("end"); self.log.configure(state="disabled")
 
 def main():
     # Minimal preflight for local binaries/scripts
     missing = []
-    for p in [PIPER_EXE, JSON_TO_SRT, RENDER_UNIFIED]:
+    for p in [PIPER_EXE, JSON_TO_SRT, RENDER_PY]:
         if not p.exists():
             missing.append(str(p))
     if missing:
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# Watch mode: re-render only what an edit invalidates.
+#
+# Watches the script and background folders (inotify through ctypes on Linux; mtime polling
+# elsewhere or with --poll), debounces bursts of saves, maps each changed file to the matrix
+# jobs that use it (same expansion as tools/plan_matrix.py) and re-runs only their stale stages:
+#
+#   script edited   examples/*.json, voice/lines/*.txt, voice/txt/*.txt
+#                   → TTS through tts.synthesize_lines with a per-line clip cache, so only the
+#                     edited/new lines go to Piper; sentence-locked SRT from the exact spans;
+#                     re-render every size of that audio. The WAV is voice/wavs/<base>.sentences.wav,
+#                     next to (not over) the autosync <base>.wav that plan_matrix --execute writes,
+#                     so a bg-only re-render never pairs one mode's audio with the other's captions
+#   bg edited       assets/bg*/*.png (every folder in asset_index.ASSET_DIRS)
+#                   → re-render just the jobs using it; the renderer's audio cache makes that
+#                     a video-layer re-burn plus a stream-copy mux
+#
+# A file that appears or disappears can change which script/background a job resolves to, so
+# jobs whose inputs resolve differently after the batch are treated as edited too.
+# Every reaction is logged with its latency (first event → done) to stdout and
+# voice/build/logs/watch.jsonl.
+#
+#   python tools/watch.py                                  # AMY, both sizes, week-1 templates
+#   python tools/watch.py --voices AMY,BRYCE --sizes 1080x1920 --debounce-ms 800
+#   python tools/watch.py --poll --interval 2 --dry-run    # log the plan for each change only
+
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import asset_index
+import captions as capmod
+import plan_matrix as pm
+import tts
+
+# Background folders come from the index's table, so every folder a job can resolve a plate from is watched.
+WATCH_DIRS = [pm.EXAMPLES_DIR, pm.VOICE_LINES_DIR, pm.VOICE_TXT_DIR] + [asset_index.ASSETS_DIR / d for d in asset_index.ASSET_DIRS]
+WATCH_EXTS = {".json", ".txt", ".png"}
+CLIP_CACHE = pm.VOICE_BUILD_DIR / ".cache" / "tts"
+WATCH_LOG = pm.VOICE_LOGS_DIR / "watch.jsonl"
+
+
+def _log(msg: str):
+    print(f"[watch] {msg}", flush=True)
+
+def interesting(p: Path) -> bool:
+    n = p.name
+    return p.suffix.lower() in WATCH_EXTS and not (n.startswith(".") or n.startswith("~") or n.endswith("~"))
+
+
+# -------- watchers --------
+class InotifyWatcher:
+    """Linux inotify via libc (no third-party package). Reports paths written, moved or deleted."""
+    IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO, IN_DELETE = 0x08, 0x40, 0x80, 0x200
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, dirs: List[Path]):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | getattr(os, "O_CLOEXEC", 0))
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs: Dict[int, Path] = {}
+        for d in dirs:
+            if d.is_dir():
+                wd = libc.inotify_add_watch(self.fd, os.fsencode(str(d)), self.MASK)
+                if wd < 0:
+                    raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {d}")
+                self.dirs[wd] = d
+
+    def wait(self, timeout: float) -> List[Path]:
+        ready, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        if not ready:
+            return []
+        buf = os.read(self.fd, 64 * 1024)
+        out, i = [], 0
+        while i + self.EVENT.size <= len(buf):
+            wd, _mask, _cookie, n = self.EVENT.unpack_from(buf, i)
+            name = buf[i + self.EVENT.size:i + self.EVENT.size + n].rstrip(b"\0")
+            i += self.EVENT.size + n
+            if wd in self.dirs and name:
+                p = self.dirs[wd] / os.fsdecode(name)
+                if interesting(p):
+                    out.append(p)
+        return out
+
+class PollWatcher:
+    """Fallback: compare (mtime_ns, size) of every watched file each interval."""
+
+    def __init__(self, dirs: List[Path], interval: float):
+        self.dirs, self.interval = dirs, interval
+        self.state = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snap = {}
+        for d in self.dirs:
+            if not d.is_dir():
+                continue
+            for p in d.iterdir():
+                if interesting(p):
+                    try:
+                        st = p.stat()
+                    except FileNotFoundError:
+                        continue
+                    snap[p] = (st.st_mtime_ns, st.st_size)
+        return snap
+
+    def wait(self, timeout: float) -> List[Path]:
+        time.sleep(max(0.0, min(timeout, self.interval)))
+        new = self._scan()
+        changed = [p for p in new.keys() | self.state.keys() if new.get(p) != self.state.get(p)]
+        self.state = new
+        return changed
+
+def make_watcher(force_poll: bool, interval: float):
+    if not force_poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(WATCH_DIRS), "inotify"
+        except (OSError, AttributeError) as e:
+            _log(f"inotify unavailable ({e}); polling every {interval:g}s")
+    return PollWatcher(WATCH_DIRS, interval), "poll"
+
+
+# -------- mapping --------
+def affected(changed: List[Path], before: List[pm.Job], after: List[pm.Job]) -> Dict[Tuple[str, str], str]:
+    """(base, size) → "tts" (script changed: re-speak + re-render) or "render" (bg only)."""
+    names = {str(p.resolve()) for p in changed}
+    prev = {(j.base, j.size): j for j in before}
+    todo: Dict[Tuple[str, str], str] = {}
+    for j in after:
+        if j.skip:
+            continue
+        old = prev.get((j.base, j.size))
+        script_hit = (j.script and str(Path(j.script).resolve()) in names) or old is None or old.script != j.script
+        bg_hit = (j.bg and str(Path(j.bg).resolve()) in names) or (old is not None and old.bg != j.bg)
+        if script_hit:
+            todo[(j.base, j.size)] = "tts"
+        elif bg_hit:
+            todo[(j.base, j.size)] = "render"
+    return todo
+
+
+# -------- stages --------
+def _render(j: pm.Job, wav: Path, srt: Path, out_dir: Path, log) -> int:
+    out = out_dir / pm.out_name(j.base, j.size)
+    env = os.environ.copy()
+    env.update({"FONT_SIZE": env.get("FONT_SIZE", "120"), "CAPTION_SHIFT_MS": env.get("CAPTION_SHIFT_MS", "-500"),
+                "TOP_BANNER": "", "AUTOSYNC": "0", "TEMPO_MATCH": "0", "AUTO_ONSET_ALIGN": "0",
+                "APPLY_SHIFT_TO_AUDIO": "0", "PITCH_SEMITONES": f"{j.pitch:g}", "EMOTION": j.emotion})
+    return pm._run(pm.render_cmd(j.size, Path(j.bg), wav, srt, out), log, env=env)
+
+def react(todo: Dict[Tuple[str, str], str], jobs: List[pm.Job], out_dir: Path, t_first: float) -> None:
+    by_key = {(j.base, j.size): j for j in jobs}
+    spoken: Dict[str, Optional[Tuple[Path, Path]]] = {}      # base → (wav, srt) made in this batch
+    for key in sorted(todo, key=lambda k: (todo[k] != "tts", k)):
+        j, stage = by_key[key], todo[key]
+        wav = pm.VOICE_WAVS_DIR / f"{j.base}.sentences.wav"      # sentence-locked pair, rendered with AUTOSYNC=0
+        srt = pm.VOICE_BUILD_DIR / f"{j.base}.sentences.srt"
+        if stage == "render" and not (wav.exists() and srt.exists()):
+            stage = "tts"                                    # nothing to reuse yet
+        rec = {"ts": round(time.time(), 3), "job": j.base, "size": j.size, "stage": stage}
+        log_path = pm.VOICE_LOGS_DIR / f"{j.base}.watch.log"
+        with log_path.open("a", encoding="utf-8") as log:
+            t0 = time.perf_counter()
+            if stage == "tts" and j.base not in spoken:
+                try:
+                    syn = tts.synthesize_lines(pm.script_lines(Path(j.script)), tts.load_profile(pm.PROFILE_MAP[j.voice]),
+                                               wav, length_scale=j.length_scale, log=log.write, clip_cache=CLIP_CACHE)
+                    capmod.write_captions(tts.to_captions(syn, "srt"), srt)
+                    spoken[j.base] = (wav, srt)
+                    rec.update({"lines": len(syn.spans), "spoken": syn.fresh, "tts_s": round(time.perf_counter() - t0, 3)})
+                    _log(f"{j.base}: TTS {syn.fresh}/{len(syn.spans)} line(s) spoken, rest from clip cache")
+                except Exception as e:
+                    log.write(f"[err] {e}\n")
+                    spoken[j.base] = None
+            if stage == "tts" and spoken.get(j.base) is None:
+                rec.update({"ok": False, "error": "tts failed"})
+            else:
+                t1 = time.perf_counter()
+                rc = _render(j, wav, srt, out_dir, log)
+                rec.update({"ok": rc == 0, "render_s": round(time.perf_counter() - t1, 3)})
+                if rc != 0:
+                    rec["error"] = f"render rc={rc}"
+        rec["latency_s"] = round(time.perf_counter() - t_first, 3)
+        status = "ok" if rec["ok"] else f"FAILED ({rec['error']}; see {log_path})"
+        _log(f"{j.base} [{j.size}] {stage}: {status}, {rec['latency_s']:.1f}s after the first change")
+        with WATCH_LOG.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(rec) + "\n")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Re-render matrix jobs incrementally when scripts or backgrounds change.")
+    ap.add_argument("--emotions", default=str(pm.TEMPLATES_DIR / "emotions_week1.txt"))
+    ap.add_argument("--languages", default=str(pm.TEMPLATES_DIR / "languages_week1.txt"))
+    ap.add_argument("--voices", default="AMY", help=f"comma list of {', '.join(pm.PROFILE_MAP)}")
+    ap.add_argument("--sizes", default=",".join(pm.SIZES))
+    ap.add_argument("--out-dir", default=str(pm.OUT_DEFAULT))
+    ap.add_argument("--bg-variant", type=int, default=0, help="background variant, as in plan_matrix; 0 = best")
+    ap.add_argument("--debounce-ms", type=int, default=500, help="quiet time that ends a burst of changes")
+    ap.add_argument("--max-wait-ms", type=int, default=5000, help="react anyway after this long in a burst")
+    ap.add_argument("--poll", action="store_true", help="use mtime polling instead of inotify")
+    ap.add_argument("--interval", type=float, default=1.0, help="polling interval (s)")
+    ap.add_argument("--dry-run", action="store_true", help="log what would re-run, do nothing")
+    a = ap.parse_args()
+
+    emotions = [pm.slug(e) for e in pm.read_list(Path(a.emotions))]
+    langs = [pm.slug(l) for l in pm.read_list(Path(a.languages))]
+    voices = [v.strip().upper() for v in a.voices.split(",") if v.strip()]
+    sizes = [s.strip() for s in a.sizes.split(",") if s.strip()]
+    bad = [s for s in sizes if s not in pm.SIZES]
+    if bad:
+        ap.error(f"unsupported size(s): {', '.join(bad)}")
+    expand = lambda: pm.expand(emotions, langs, voices, sizes, a.bg_variant)
+
+    out_dir = Path(a.out_dir)
+    for d in (out_dir, pm.VOICE_WAVS_DIR, pm.VOICE_LOGS_DIR):
+        d.mkdir(parents=True, exist_ok=True)
+    watcher, kind = make_watcher(a.poll, a.interval)
+    jobs = expand()
+    live = sum(1 for j in jobs if not j.skip)
+    _log(f"watching {len(WATCH_DIRS)} dirs ({kind}) for {live} job(s); Ctrl+C to stop")
+
+    batch: Dict[Path, float] = {}
+    last = 0.0
+    debounce, max_wait = a.debounce_ms / 1000.0, a.max_wait_ms / 1000.0
+    try:
+        while True:
+            now = time.perf_counter()
+            timeout = debounce - (now - last) if batch else 3600.0
+            for p in watcher.wait(timeout):
+                now = time.perf_counter()
+                batch.setdefault(p, now)
+                last = now
+            if not batch:
+                continue
+            now = time.perf_counter()
+            t_first = min(batch.values())
+            if now - last < debounce and now - t_first < max_wait:
+                continue
+            changed = sorted(batch)
+            batch = {}
+            new_jobs = expand()
+            todo = affected(changed, jobs, new_jobs)
+            jobs = new_jobs
+            names = ", ".join(p.name for p in changed[:5]) + (" …" if len(changed) > 5 else "")
+            _log(f"{len(changed)} change(s) [{names}] after {now - t_first:.2f}s debounce → {len(todo)} job(s)")
+            if not todo:
+                continue
+            if a.dry_run:
+                for (base, size), stage in sorted(todo.items()):
+                    _log(f"  would run {stage:6s} {base} [{size}]")
+                continue
+            react(todo, jobs, out_dir, t_first)
+    except KeyboardInterrupt:
+        _log("stopped")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
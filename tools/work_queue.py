@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+# Shared-filesystem work queue: several machines render incoming/-format jobs from one directory.
+#
+# Queue layout (any directory every worker can reach: NFS/SMB mount, or a local dir for testing):
+#   pending/<job_id>/          job.json, input.srt, [input.wav], [bg.png], [sha256sum.txt] (incoming/ format)
+#   leases/<job_id>.lease      claim; created with O_CREAT|O_EXCL so exactly one worker wins it
+#   done/<job_id>/             MP4, captions ASS, worker log, result.json (published by one rename)
+#   failed/<job_id>/           jobs that failed MAX attempts (job files + last log)
+#   cache/                     CACHE_ROOT for the renderer (sync / loudnorm / audio / video caches)
+#
+# A worker claims a job, copies it to local scratch, runs TTS (only when input.wav is missing) and the
+# renderer locally, and publishes the outputs back. While it works, a heartbeat thread extends the lease.
+# Any worker that finds a lease past its expiry reaps it (rename to a unique name, so one reaper wins),
+# which puts the job back up for grabs; the dead worker's half-written output never reaches done/.
+# The renderer's caches are keyed by content and published by rename, so sharing cache/ is safe.
+#
+#   python tools/work_queue.py --queue /mnt/swp enqueue incoming/20251103_171011_protection_en
+#   python tools/work_queue.py --queue /mnt/swp work                 # until pending/ is empty
+#   python tools/work_queue.py --queue /mnt/swp status
+#   python tools/work_queue.py simulate --workers 3 --jobs 8 --crash 1   # local test, no ffmpeg/Piper
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+APP_ROOT = Path(__file__).resolve().parent.parent
+CAPTIONS_DIR = APP_ROOT / "voice" / "build" / "captions"
+
+LEASE_TTL_S = 60.0          # a lease not refreshed for this long is considered dead
+HEARTBEAT_S = LEASE_TTL_S / 4
+POLL_S = 2.0                # idle wait while other workers still hold leases
+MAX_ATTEMPTS = 3
+
+
+@dataclass
+class Lease:
+    job_id: str
+    worker: str
+    host: str
+    pid: int
+    acquired: float
+    expires: float
+
+@dataclass
+class JobResult:
+    job_id: str
+    worker: str
+    host: str
+    attempt: int
+    ok: bool = False
+    error: str = ""
+    outputs: List[str] = field(default_factory=list)
+    stages: Dict[str, float] = field(default_factory=dict)   # stage → seconds
+
+
+def _log(msg: str):
+    print(f"[queue] {msg}", flush=True)
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def verify_checksums(job_dir: Path) -> List[str]:
+    """Check sha256sum.txt ('<hex> *name' lines). Returns problems; files listed but absent only warn."""
+    sums = job_dir / "sha256sum.txt"
+    problems = []
+    if not sums.exists():
+        return problems
+    for ln in sums.read_text(encoding="utf-8").splitlines():
+        parts = ln.strip().split(None, 1)
+        if len(parts) != 2:
+            continue
+        digest, name = parts[0].lower(), parts[1].lstrip("*").strip()
+        p = job_dir / name
+        if not p.exists():
+            _log(f"warn: {job_dir.name}: {name} listed in sha256sum.txt but not shipped")
+        elif name != "job.json" and sha256_file(p) != digest:      # job.json is often hand-edited after packing
+            problems.append(f"{name}: checksum mismatch")
+    return problems
+
+
+# -------- queue --------
+class Queue:
+    def __init__(self, root: Path, ttl: float = LEASE_TTL_S, max_attempts: int = MAX_ATTEMPTS):
+        self.root = Path(root)
+        self.pending = self.root / "pending"
+        self.leases = self.root / "leases"
+        self.done = self.root / "done"
+        self.failed = self.root / "failed"
+        self.cache = self.root / "cache"
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        for d in (self.pending, self.leases, self.done, self.failed, self.cache):
+            d.mkdir(parents=True, exist_ok=True)
+
+    def _lease_path(self, job_id: str) -> Path:
+        return self.leases / f"{job_id}.lease"
+
+    def pending_ids(self) -> List[str]:
+        return sorted(p.name for p in self.pending.iterdir() if p.is_dir() and not p.name.startswith("."))
+
+    def enqueue(self, src: Path) -> Optional[str]:
+        """Copy an incoming/ job dir into pending/ (staged, then one rename). None if already queued/done."""
+        src = Path(src)
+        job = json.loads((src / "job.json").read_text(encoding="utf-8"))
+        job_id = str(job.get("job_id") or src.name)
+        if (self.pending / job_id).exists() or (self.done / job_id).exists():
+            return None
+        stage = self.pending / f".{job_id}.{uuid.uuid4().hex[:8]}"
+        shutil.copytree(src, stage)
+        try:
+            os.rename(stage, self.pending / job_id)
+        except OSError:
+            shutil.rmtree(stage, ignore_errors=True)
+            return None
+        return job_id
+
+    # -- leases --
+    def read_lease(self, job_id: str) -> Optional[Lease]:
+        try:
+            return Lease(**json.loads(self._lease_path(job_id).read_text(encoding="utf-8")))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def _write_lease(self, lease: Lease):
+        tmp = self.leases / f".{lease.job_id}.{lease.worker}.{uuid.uuid4().hex[:8]}.tmp"
+        tmp.write_text(json.dumps(asdict(lease)), encoding="utf-8")
+        os.replace(tmp, self._lease_path(lease.job_id))
+
+    def try_claim(self, job_id: str, worker: str) -> Optional[Lease]:
+        path = self._lease_path(job_id)
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return None
+        now = time.time()
+        lease = Lease(job_id, worker, socket.gethostname(), os.getpid(), now, now + self.ttl)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(json.dumps(asdict(lease)))
+        return lease
+
+    def renew(self, lease: Lease) -> bool:
+        """Extend our lease; False if it was reaped or taken over in the meantime.
+
+        A lease already past its own expiry is lost, never rewritten: a reaper may have removed it and
+        another worker claimed the job since we read it. Reading and replacing are still two steps, so
+        the file is read back after the rename; if a new owner's claim landed in between, one of the two
+        renames wins and the other worker sees a foreign lease (here or on its next beat) and gives up.
+        """
+        cur = self.read_lease(lease.job_id)
+        if cur is None or cur.worker != lease.worker or cur.expires <= time.time():
+            return False
+        lease.expires = time.time() + self.ttl
+        self._write_lease(lease)
+        cur = self.read_lease(lease.job_id)
+        return cur is not None and cur.worker == lease.worker and cur.expires == lease.expires
+
+    def release(self, lease: Lease):
+        cur = self.read_lease(lease.job_id)
+        if cur is not None and cur.worker == lease.worker:
+            self._lease_path(lease.job_id).unlink(missing_ok=True)
+
+    def reap(self) -> List[str]:
+        """Drop expired leases so their jobs can be claimed again. Returns the requeued job ids."""
+        requeued, now = [], time.time()
+        for path in self.leases.glob("*.lease"):
+            job_id = path.name[:-len(".lease")]
+            lease = self.read_lease(job_id)
+            try:
+                # Unreadable = claimed a moment ago and not written yet, or torn; fall back to mtime.
+                expires = lease.expires if lease else path.stat().st_mtime + self.ttl
+            except FileNotFoundError:
+                continue
+            if expires > now:
+                continue
+            grave = self.leases / f".reaped.{job_id}.{uuid.uuid4().hex[:8]}"
+            try:
+                os.rename(path, grave)              # only one reaper gets to rename it
+            except OSError:
+                continue
+            grave.unlink(missing_ok=True)
+            who = f"{lease.worker}@{lease.host}" if lease else "unknown worker"
+            _log(f"reaped expired lease on {job_id} (held by {who})")
+            requeued.append(job_id)
+        return requeued
+
+    # -- claim / finish --
+    def claim(self, worker: str) -> Optional[Lease]:
+        for job_id in self.pending_ids():
+            if (self.done / job_id).exists():         # published, but the owner died before cleaning up
+                shutil.rmtree(self.pending / job_id, ignore_errors=True)
+                continue
+            lease = self.try_claim(job_id, worker)
+            if lease is None:
+                continue
+            if not (self.pending / job_id).is_dir():  # finished by someone else between listing and claiming
+                self.release(lease)
+                continue
+            return lease
+        return None
+
+    def bump_attempts(self, job_id: str) -> int:
+        path = self.pending / job_id / ".attempts"
+        try:
+            n = int(path.read_text(encoding="utf-8").strip() or 0) + 1
+        except (OSError, ValueError):
+            n = 1
+        path.write_text(str(n), encoding="utf-8")
+        return n
+
+    def publish(self, lease: Lease, src: Path, dest_root: Path) -> bool:
+        """Move a finished output dir into dest_root/<job_id> with one rename; False if it already exists."""
+        stage = dest_root / f".{lease.job_id}.{lease.worker}"
+        shutil.rmtree(stage, ignore_errors=True)
+        shutil.copytree(src, stage)
+        try:
+            os.rename(stage, dest_root / lease.job_id)
+        except OSError:
+            shutil.rmtree(stage, ignore_errors=True)
+            return False
+        shutil.rmtree(self.pending / lease.job_id, ignore_errors=True)
+        return True
+
+    def status(self) -> Dict[str, list]:
+        leased = []
+        for p in sorted(self.leases.glob("*.lease")):
+            lease = self.read_lease(p.name[:-len(".lease")])
+            if lease:
+                leased.append(f"{lease.job_id} ({lease.worker}@{lease.host}, {lease.expires - time.time():+.0f}s)")
+        names = lambda d: sorted(p.name for p in d.iterdir() if p.is_dir() and not p.name.startswith("."))
+        return {"pending": self.pending_ids(), "leased": leased, "done": names(self.done), "failed": names(self.failed)}
+
+
+class Heartbeat(threading.Thread):
+    """Renews a lease until stopped; sets .lost if the lease was reaped (the job must then be abandoned)."""
+
+    def __init__(self, q: Queue, lease: Lease, every: float):
+        super().__init__(daemon=True)
+        self.q, self.lease, self.every = q, lease, every
+        self.stop = threading.Event()
+        self.lost = threading.Event()
+
+    def run(self):
+        while not self.stop.wait(self.every):
+            try:
+                ok = self.q.renew(self.lease)
+            except OSError as e:                    # shared mount hiccup: try again next beat
+                _log(f"warn: heartbeat for {self.lease.job_id} failed: {e}")
+                continue
+            if not ok:
+                self.lost.set()
+                return
+
+
+# -------- stages --------
+Stage = Callable[..., Dict[str, float]]    # (job_dir, out_dir, queue, log) → stage timings
+
+def render_stage(job_dir: Path, out_dir: Path, q: Queue, log) -> Dict[str, float]:
+    """TTS (if input.wav is missing) + renderer, all local; outputs land in out_dir."""
+    import captions as capmod
+    import plan_matrix
+    import tts
+
+    job = json.loads((job_dir / "job.json").read_text(encoding="utf-8"))
+    job_id = str(job.get("job_id") or job_dir.name)
+    emotion = str(job.get("emotion", "")).lower()
+    size = str(job.get("render", {}).get("resolution") or "1080x1920")
+    if size not in plan_matrix.SIZES:
+        raise RuntimeError(f"unsupported resolution {size}")
+    rate, pitch = plan_matrix.manifest_voice_params(plan_matrix.load_manifest(), emotion)
+    times: Dict[str, float] = {}
+
+    srt, wav = job_dir / "input.srt", job_dir / "input.wav"
+    sentence_locked = not wav.exists()
+    if sentence_locked:
+        voice = str(job.get("voice", "AMY")).upper()
+        if voice not in plan_matrix.PROFILE_MAP:
+            raise RuntimeError(f"unknown voice {voice}")
+        prof = tts.load_profile(plan_matrix.PROFILE_MAP[voice])
+        caps = capmod.read_captions(srt)
+        lines = [" ".join(caps.plain_lines(c)) for c in caps.cues]
+        ls = f"{float(prof['LENGTH_SCALE']) / max(0.25, rate):.3f}" if rate != 1.0 else None
+        t0 = time.perf_counter()
+        syn = tts.synthesize_lines(lines, prof, wav, length_scale=ls, log=log.write)
+        srt = job_dir / "input.sentences.srt"
+        capmod.write_captions(tts.to_captions(syn, "srt"), srt)
+        times["tts"] = time.perf_counter() - t0
+
+    bg = job_dir / "bg.png"
+    if not bg.exists():
+        bg = plan_matrix.find_background(emotion, size)
+        if bg is None:
+            raise RuntimeError(f"no bg.png in the job and no {emotion} background for {size}")
+
+    out = out_dir / plan_matrix.out_name(job_id, size)
+    env = os.environ.copy()
+    auto = "0" if sentence_locked else "1"
+    env.update({"FONT_SIZE": env.get("FONT_SIZE", "120"), "CAPTION_SHIFT_MS": env.get("CAPTION_SHIFT_MS", "-500"),
+                "TOP_BANNER": "", "AUTOSYNC": auto, "TEMPO_MATCH": auto, "AUTO_ONSET_ALIGN": auto,
+                "APPLY_SHIFT_TO_AUDIO": auto, "PITCH_SEMITONES": f"{pitch:g}", "EMOTION": emotion,
+                "JOB_JSON": str(job_dir / "job.json"), "CACHE_ROOT": str(q.cache)})
+    t0 = time.perf_counter()
+    p = subprocess.run(plan_matrix.render_cmd(size, bg, wav, srt, out),
+                       cwd=str(APP_ROOT), env=env, stdout=log, stderr=subprocess.STDOUT)
+    if p.returncode != 0 or not out.exists():
+        raise RuntimeError(f"renderer failed (rc={p.returncode})")
+    times["render"] = time.perf_counter() - t0
+
+    ass = CAPTIONS_DIR / f"{out.stem}.ass"
+    if ass.exists():
+        shutil.copy2(ass, out_dir / ass.name)
+    return times
+
+
+# -------- worker --------
+def run_one(q: Queue, lease: Lease, stage: Stage, scratch: Path) -> Optional[JobResult]:
+    """Run one claimed job. Returns None if the lease was lost (someone else will redo the job)."""
+    attempt = q.bump_attempts(lease.job_id)
+    res = JobResult(lease.job_id, lease.worker, lease.host, attempt)
+    hb = Heartbeat(q, lease, min(HEARTBEAT_S, q.ttl / 4))
+    hb.start()
+    work = Path(tempfile.mkdtemp(prefix=f"{lease.job_id}.", dir=str(scratch)))
+    try:
+        job_dir, out_dir = work / "job", work / "out"
+        out_dir.mkdir()
+        t0 = time.perf_counter()
+        shutil.copytree(q.pending / lease.job_id, job_dir)
+        problems = verify_checksums(job_dir)
+        res.stages["fetch"] = time.perf_counter() - t0
+        with (out_dir / "worker.log").open("w", encoding="utf-8") as log:
+            try:
+                if problems:
+                    raise RuntimeError("; ".join(problems))
+                res.stages.update(stage(job_dir, out_dir, q, log))
+                res.ok = True
+            except Exception as e:
+                res.error = str(e)
+                log.write(f"[err] {e}\n")
+        hb.stop.set()
+        hb.join()
+        if hb.lost.is_set() or not q.renew(lease):
+            _log(f"{lease.worker}: lost the lease on {lease.job_id}; discarding local result")
+            return None
+
+        res.outputs = sorted(p.name for p in out_dir.iterdir())
+        (out_dir / "result.json").write_text(json.dumps(asdict(res), indent=2), encoding="utf-8")
+        if res.ok:
+            if not q.publish(lease, out_dir, q.done):
+                _log(f"{lease.worker}: {lease.job_id} already published by another worker")
+        elif attempt >= q.max_attempts:
+            shutil.copytree(q.pending / lease.job_id, out_dir / "job", dirs_exist_ok=True)
+            q.publish(lease, out_dir, q.failed)
+        return res
+    finally:
+        hb.stop.set()
+        shutil.rmtree(work, ignore_errors=True)
+        q.release(lease)
+
+def work(q: Queue, worker: str, stage: Stage, scratch: Path, once: bool = False) -> int:
+    """Claim and run jobs until pending/ is empty (waiting out other workers' leases). Returns failures."""
+    scratch.mkdir(parents=True, exist_ok=True)
+    failures = 0
+    while True:
+        q.reap()
+        lease = q.claim(worker)
+        if lease is None:
+            if not q.pending_ids():
+                return failures
+            time.sleep(POLL_S)           # everything left is leased; take over if a holder dies
+            continue
+        _log(f"{worker}: claimed {lease.job_id}")
+        res = run_one(q, lease, stage, scratch)
+        if res is not None:
+            took = sum(res.stages.values())
+            _log(f"{worker}: {lease.job_id} {'done' if res.ok else 'FAILED: ' + res.error} "
+                 f"(attempt {res.attempt}, {took:.1f}s)")
+            failures += 0 if res.ok else 1
+        if once:
+            return failures
+
+
+# -------- local simulation --------
+def fake_stage(crash_ids: List[str], seconds: float) -> Stage:
+    """Stand-in for TTS + render: sleeps, writes a dummy MP4; hard-exits on the first try of crash_ids."""
+    def stage(job_dir: Path, out_dir: Path, q: Queue, log) -> Dict[str, float]:
+        job_id = json.loads((job_dir / "job.json").read_text(encoding="utf-8"))["job_id"]
+        marker = q.root / f".crashed.{job_id}"
+        if job_id in crash_ids and not marker.exists():
+            marker.touch()
+            _log(f"pid {os.getpid()}: simulating a crash on {job_id}")
+            os._exit(9)
+        time.sleep(seconds)
+        (out_dir / f"{job_id}_VERTICAL_BOXED.mp4").write_bytes(b"\0" * 64)
+        return {"render": seconds}
+    return stage
+
+def _sim_worker(root: str, worker: str, ttl: float, crash_ids: List[str], seconds: float, scratch: str):
+    q = Queue(Path(root), ttl=ttl)
+    global POLL_S, HEARTBEAT_S
+    POLL_S, HEARTBEAT_S = min(POLL_S, ttl / 4), ttl / 4
+    sys.exit(1 if work(q, worker, fake_stage(crash_ids, seconds), Path(scratch)) else 0)
+
+def simulate(workers: int, jobs: int, crashes: int, ttl: float, seconds: float) -> int:
+    with tempfile.TemporaryDirectory(prefix="swp_queue_sim.") as td:
+        root = Path(td) / "queue"
+        q = Queue(root, ttl=ttl)
+        src = Path(td) / "incoming"
+        for i in range(jobs):
+            d = src / f"sim_{i:03d}"
+            d.mkdir(parents=True)
+            (d / "job.json").write_text(json.dumps({"job_id": d.name, "emotion": "peace", "lang": "en"}), encoding="utf-8")
+            (d / "input.srt").write_text(f"1\n00:00:00,000 --> 00:00:01,000\nLine {i}\n", encoding="utf-8")
+            (d / "sha256sum.txt").write_text(f"{sha256_file(d / 'input.srt')} *input.srt\n", encoding="utf-8")
+            q.enqueue(d)
+        crash_ids = [f"sim_{i:03d}" for i in range(min(crashes, jobs))]
+        _log(f"simulating {workers} worker(s), {jobs} job(s), {len(crash_ids)} crash(es), lease ttl {ttl:g}s")
+
+        t0 = time.perf_counter()
+        ctx = multiprocessing.get_context("spawn")
+        procs = [ctx.Process(target=_sim_worker, args=(str(root), f"w{n}", ttl, crash_ids, seconds, str(Path(td) / f"scratch{n}")))
+                 for n in range(workers)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        if q.pending_ids():              # every worker crashed: finish what they dropped
+            work(q, "w-late", fake_stage([], seconds), Path(td) / "scratch_late")
+        took = time.perf_counter() - t0
+
+        st = q.status()
+        done = st["done"]
+        results = [json.loads((q.done / j / "result.json").read_text(encoding="utf-8")) for j in done]
+        expected = sorted(f"sim_{i:03d}" for i in range(jobs))
+        ok = done == expected and not st["pending"] and not st["failed"] and not st["leased"]
+        by_worker: Dict[str, int] = {}
+        for r in results:
+            by_worker[r["worker"]] = by_worker.get(r["worker"], 0) + 1
+        retried = sorted(r["job_id"] for r in results if r["attempt"] > 1)
+        _log(f"{len(done)}/{jobs} done in {took:.1f}s; per worker {by_worker}; retried after lease expiry: {retried or 'none'}")
+        _log("exit codes: " + ", ".join(f"w{n}={p.exitcode}" for n, p in enumerate(procs)))
+        if not ok:
+            _log(f"FAIL: pending={st['pending']} leased={st['leased']} failed={st['failed']} "
+                 f"missing={sorted(set(expected) - set(done))}")
+            return 1
+        _log("OK: every job published exactly once")
+        return 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Distribute incoming/-format jobs across machines via a shared directory.")
+    ap.add_argument("--queue", default=os.environ.get("SWP_QUEUE", ""), help="shared queue root (or SWP_QUEUE)")
+    ap.add_argument("--ttl", type=float, default=LEASE_TTL_S, help="lease lifetime without a heartbeat (s)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("enqueue", help="copy incoming/ job dirs into the queue")
+    p.add_argument("jobs", nargs="+")
+    p = sub.add_parser("work", help="claim and render jobs until the queue is empty")
+    p.add_argument("--worker", default=f"{socket.gethostname()}-{os.getpid()}")
+    p.add_argument("--scratch", default=str(Path(tempfile.gettempdir()) / "swp_worker"), help="local work dir")
+    p.add_argument("--once", action="store_true", help="run at most one job")
+    sub.add_parser("status", help="list pending / leased / done / failed jobs")
+    p = sub.add_parser("simulate", help="local multi-process test with a fake render stage")
+    p.add_argument("--workers", type=int, default=3)
+    p.add_argument("--jobs", type=int, default=8)
+    p.add_argument("--crash", type=int, default=1, help="jobs whose first worker dies mid-render")
+    p.add_argument("--seconds", type=float, default=0.5, help="fake render time per job")
+    a = ap.parse_args()
+
+    if a.cmd == "simulate":
+        return simulate(a.workers, a.jobs, a.crash, min(a.ttl, 3.0), a.seconds)
+    if not a.queue:
+        ap.error("--queue (or SWP_QUEUE) is required")
+    q = Queue(Path(a.queue), ttl=a.ttl)
+    if a.cmd == "enqueue":
+        for j in a.jobs:
+            job_id = q.enqueue(Path(j))
+            _log(f"queued {job_id}" if job_id else f"skip {j}: already queued or done")
+        return 0
+    if a.cmd == "status":
+        for k, v in q.status().items():
+            print(f"{k:8s} {len(v):3d}  " + ", ".join(v))
+        return 0
+    return 1 if work(q, a.worker, render_stage, Path(a.scratch), once=a.once) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())